@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import pcrglobwb_utils
+import tempfile
+import shutil
+import os
+from . import generators
+
+EXTENT = (-70., -10., -50., 5.)
+
+class EvaluateStations:
+    """End-to-end evaluation of discharge at GRDC and GSIM stations for an increasing number of stations.
+    Simulations are daily on a 30-arcmin grid for 10 years.
+    """
+
+    params = [10, 50, 200]
+    param_names = ['n_stations']
+    timeout = 900
+    number = 1
+    repeat = (1, 3, 120.)
+
+    def setup_cache(self):
+
+        sim = generators.make_sim_cube('sim_daily.nc', resolution='30min', extent=EXTENT, periods=3652)
+        for n_stations in self.params:
+            generators.make_grdc_files('grdc_{}'.format(n_stations), sim, n_stations)
+            generators.make_gsim_files('gsim_{}'.format(n_stations), sim, n_stations)
+
+        return os.path.abspath(sim)
+
+    def setup(self, sim, n_stations):
+
+        self.out = tempfile.mkdtemp()
+
+    def teardown(self, sim, n_stations):
+
+        shutil.rmtree(self.out, ignore_errors=True)
+
+    def time_GRDC(self, sim, n_stations):
+
+        pcrglobwb_utils.eval.GRDC(sim, self.out, 'discharge', 'grdc_{}'.format(n_stations))
+
+    def time_GSIM(self, sim, n_stations):
+
+        pcrglobwb_utils.eval.GSIM(sim, self.out, 'discharge', 'gsim_{}'.format(n_stations))
+
+    def peakmem_GRDC(self, sim, n_stations):
+
+        pcrglobwb_utils.eval.GRDC(sim, self.out, 'discharge', 'grdc_{}'.format(n_stations))
+
+    def peakmem_GSIM(self, sim, n_stations):
+
+        pcrglobwb_utils.eval.GSIM(sim, self.out, 'discharge', 'gsim_{}'.format(n_stations))
+
+class EvaluatePolygons:
+    """Preprocessing of polygon masks and end-to-end evaluation of polygons for an increasing number of polygons.
+    Observations and simulations are monthly on a 30-arcmin grid for 10 years.
+    """
+
+    params = [4, 16, 64]
+    param_names = ['n_polygons']
+    timeout = 900
+    number = 1
+    repeat = (1, 3, 120.)
+
+    def setup_cache(self):
+
+        files = dict()
+        files['sim'] = generators.make_sim_cube('sim_monthly.nc', resolution='30min', extent=EXTENT, periods=120, freq='MS')
+        files['obs'] = generators.make_sim_cube('obs_monthly.nc', resolution='30min', extent=EXTENT, periods=120, freq='MS', var_name='Q', seed=1)
+        for n_polygons in self.params:
+            files[n_polygons] = generators.make_polygons('polygons_{}.geojson'.format(n_polygons), n_polygons, extent=EXTENT)
+
+        return {key: os.path.abspath(fo) for key, fo in files.items()}
+
+    def setup(self, files, n_polygons):
+
+        self.out = tempfile.mkdtemp()
+
+    def teardown(self, files, n_polygons):
+
+        shutil.rmtree(self.out, ignore_errors=True)
+
+    def time_mask_polygons(self, files, n_polygons):
+
+        pcrglobwb_utils.pre.mask_polygons(files['sim'], files[n_polygons], self.out, 'discharge', 'mask.list', 'ID')
+
+    def time_POLY(self, files, n_polygons):
+
+        pcrglobwb_utils.eval.POLY(files[n_polygons], files['sim'], files['obs'], self.out, 'ID', 'Q', 'discharge')
+
+    def peakmem_mask_polygons(self, files, n_polygons):
+
+        pcrglobwb_utils.pre.mask_polygons(files['sim'], files[n_polygons], self.out, 'discharge', 'mask.list', 'ID')
+
+    def peakmem_POLY(self, files, n_polygons):
+
+        pcrglobwb_utils.eval.POLY(files[n_polygons], files['sim'], files['obs'], self.out, 'ID', 'Q', 'discharge')
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import pcrglobwb_utils
+import pandas as pd
+import numpy as np
+import xarray as xr
+
+class CalcMetrics:
+    """Computing metrics for timeseries of increasing length.
+    """
+
+    params = [365, 3650, 36500]
+    param_names = ['n_time_steps']
+
+    def setup(self, n_time_steps):
+
+        rng = np.random.default_rng(0)
+        obs = rng.lognormal(mean=5., sigma=1., size=n_time_steps)
+        self.df = pd.DataFrame({'OBS': obs, 'SIM': obs * rng.lognormal(mean=0., sigma=0.2, size=n_time_steps)},
+                               index=pd.date_range('1900-01-01', periods=n_time_steps, freq='D'))
+
+    def time_calc_metrics(self, n_time_steps):
+
+        pcrglobwb_utils.eval.calc_metrics(self.df, 'OBS', 'SIM')
+
+class ConcatDataframes:
+    """Aggregating clipped cubes of observations and simulations to zonal series, as done per polygon.
+    """
+
+    params = [[12, 120, 480], [10, 50]]
+    param_names = ['n_months', 'n_cells']
+
+    def setup(self, n_months, n_cells):
+
+        rng = np.random.default_rng(0)
+        time = pd.date_range('1980-01-01', periods=n_months, freq='MS')
+        coords = {'time': time, 'lat': np.arange(n_cells, dtype=float), 'lon': np.arange(n_cells, dtype=float)}
+
+        values = rng.lognormal(mean=5., sigma=1., size=(n_months, n_cells, n_cells))
+        # cells outside the polygon are NaN after clipping
+        values[:, rng.random((n_cells, n_cells)) < 0.5] = np.nan
+
+        self.obs_data_c = xr.DataArray(values, coords=coords, dims=('time', 'lat', 'lon'))
+        self.sim_data_c = xr.DataArray(values * 1.1, coords=coords, dims=('time', 'lat', 'lon'))
+        self.idx = pd.to_datetime(time.strftime('%Y-%m'))
+
+    def time_concat_dataframes(self, n_months, n_cells):
+
+        pcrglobwb_utils.utils.concat_dataframes(self.obs_data_c, self.sim_data_c, 'OBS', 'SIM', self.idx, self.idx, 'monthly', False, False)
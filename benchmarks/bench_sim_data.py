@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import pcrglobwb_utils
+import numpy as np
+import xarray as xr
+from . import generators
+
+# same extent at both resolutions, such that the 5-arcmin grid has 36 times more cells
+EXTENT = (-70., -10., -50., 5.)
+
+class SimData:
+    """Locating stations in and extracting timeseries from cubes of simulated discharge.
+    """
+
+    params = ['30min', '5min']
+    param_names = ['resolution']
+
+    def setup_cache(self):
+
+        files = dict()
+        for resolution in self.params:
+            # without missing values, as the window search falls back to the original coordinates if there are any in the window
+            files[resolution] = generators.make_sim_cube('sim_{}.nc'.format(resolution), resolution=resolution, extent=EXTENT, periods=730, missing=0.)
+
+        return files
+
+    def setup(self, files, resolution):
+
+        self.ds = xr.open_dataset(files[resolution])
+
+        station = generators.sample_stations(files[resolution], 1).iloc[0]
+        self.lon, self.lat = station['longitude'], station['latitude']
+        self.row, self.col = int(station['row']), int(station['col'])
+        self.obs_mean = float(self.ds['discharge'][:, self.row, self.col].mean())
+        # the search window is given in km, here it covers about two cells in each direction at both resolutions
+        self.window = int(np.ceil(2 * generators.RESOLUTIONS[resolution] / 0.008333333))
+
+    def teardown(self, files, resolution):
+
+        self.ds.close()
+
+    def time_find_indices_from_coords(self, files, resolution):
+
+        pcrglobwb_utils.sim_data.find_indices_from_coords(self.ds, self.lon, self.lat)
+
+    def time_find_indices_from_coords_window_search(self, files, resolution):
+
+        pcrglobwb_utils.sim_data.find_indices_from_coords(self.ds, self.lon, self.lat, window_search=True, obs_mean=self.obs_mean, window=self.window)
+
+    def time_apply_window_search(self, files, resolution):
+
+        pcrglobwb_utils.sim_data.apply_window_search(self.ds, self.lon, self.lat, obs_mean=self.obs_mean, window=self.window)
+
+    def time_read_at_indices(self, files, resolution):
+
+        pcrglobwb_utils.sim_data.read_at_indices(self.ds, self.row, self.col)
+
+    def peakmem_apply_window_search(self, files, resolution):
+
+        pcrglobwb_utils.sim_data.apply_window_search(self.ds, self.lon, self.lat, obs_mean=self.obs_mean, window=self.window)
+
+    def peakmem_read_at_indices(self, files, resolution):
+
+        pcrglobwb_utils.sim_data.read_at_indices(self.ds, self.row, self.col)
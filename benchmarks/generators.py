@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Deterministic generators of synthetic input data for the benchmarks.
+All data is derived from a seed, such that repeated runs (and runs on other machines) use identical data.
+"""
+
+import pandas as pd
+import numpy as np
+import xarray as xr
+import geopandas as gpd
+from shapely.geometry import box
+import os
+
+# grid resolutions of PCR-GLOBWB in degrees
+RESOLUTIONS = {'30min': 0.5, '5min': 1. / 12.}
+
+def make_grid(resolution='30min', extent=(-70., -10., -50., 5.)) -> tuple:
+    """Creates cell center coordinates of a regular grid.
+    As in PCR-GLOBWB output, latitudes are ordered from north to south.
+
+    Args:
+        resolution (str, optional): either '30min' or '5min'. Defaults to '30min'.
+        extent (tuple, optional): (min_lon, min_lat, max_lon, max_lat) in degrees. Defaults to (-70., -10., -50., 5.).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: latitudes; longitudes.
+    """
+
+    res = RESOLUTIONS[resolution]
+    min_lon, min_lat, max_lon, max_lat = extent
+
+    lon = np.round(np.arange(min_lon + res / 2, max_lon, res), 6)
+    lat = np.round(np.arange(max_lat - res / 2, min_lat, -res), 6)
+
+    return lat, lon
+
+def make_sim_cube(fo: str, resolution='30min', extent=(-70., -10., -50., 5.), start='2000-01-01', periods=365, freq='D', var_name='discharge', missing=0.2, seed=0) -> str:
+    """Writes a netCDF-file with a synthetic PCR-GLOBWB-like cube of discharge (or any other variable).
+    Each cell has a log-normally distributed mean value, modulated by a seasonal cycle with a phase depending on latitude and by noise.
+    A fraction of the cells are missing values, similar to ocean cells.
+
+    Args:
+        fo (str): path to netCDF-file.
+        resolution (str, optional): either '30min' or '5min'. Defaults to '30min'.
+        extent (tuple, optional): (min_lon, min_lat, max_lon, max_lat) in degrees. Defaults to (-70., -10., -50., 5.).
+        start (str, optional): first time step. Defaults to '2000-01-01'.
+        periods (int, optional): number of time steps. Defaults to 365.
+        freq (str, optional): frequency of time steps, e.g. 'D' or 'MS'. Defaults to 'D'.
+        var_name (str, optional): variable name. Defaults to 'discharge'.
+        missing (float, optional): fraction of cells with missing values. Defaults to 0.2.
+        seed (int, optional): seed of random number generator. Defaults to 0.
+
+    Returns:
+        str: path to netCDF-file.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    lat, lon = make_grid(resolution, extent)
+    time = pd.date_range(start, periods=periods, freq=freq)
+
+    mean = rng.lognormal(mean=5., sigma=1.5, size=(lat.size, lon.size)).astype(np.float32)
+    mean[rng.random(mean.shape) < missing] = np.nan
+
+    phase = np.deg2rad(lat)[:, np.newaxis]
+    doy = 2 * np.pi * time.dayofyear.values / 365.25
+
+    values = np.empty((time.size, lat.size, lon.size), dtype=np.float32)
+    for i in range(time.size):
+        values[i] = mean * (1 + 0.5 * np.sin(doy[i] + phase)) * rng.lognormal(mean=0., sigma=0.1, size=mean.shape)
+
+    ds = xr.Dataset({var_name: (('time', 'lat', 'lon'), values)}, coords={'time': time, 'lat': lat, 'lon': lon})
+    ds[var_name].attrs['units'] = 'm3.s-1'
+    ds.to_netcdf(fo)
+
+    return fo
+
+def sample_stations(fo: str, n_stations: int, var_name='discharge', seed=0) -> pd.DataFrame:
+    """Samples station locations from valid cells of a cube.
+    Coordinates are shifted randomly within the cell, as station coordinates do not coincide with cell centers.
+
+    Args:
+        fo (str): path to netCDF-file as created with 'make_sim_cube'.
+        n_stations (int): number of stations.
+        var_name (str, optional): variable name. Defaults to 'discharge'.
+        seed (int, optional): seed of random number generator. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: dataframe with columns 'row', 'col', 'latitude', and 'longitude'.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    with xr.open_dataset(fo) as ds:
+        lat = ds['lat'].values
+        lon = ds['lon'].values
+        valid = np.isfinite(ds[var_name].isel(time=0).values)
+
+    rows, cols = np.where(valid)
+    idx = rng.choice(rows.size, size=n_stations, replace=n_stations > rows.size)
+    res = np.abs(lon[1] - lon[0])
+
+    df = pd.DataFrame({'row': rows[idx], 'col': cols[idx],
+                       'latitude': np.round(lat[rows[idx]] + rng.uniform(-0.4, 0.4, n_stations) * res, 4),
+                       'longitude': np.round(lon[cols[idx]] + rng.uniform(-0.4, 0.4, n_stations) * res, 4)})
+
+    return df
+
+def _perturb(values: np.ndarray, rng, missing=0.05) -> np.ndarray:
+
+    # observations deviate from simulations and contain gaps
+    values = values * rng.lognormal(mean=0., sigma=0.2, size=values.shape)
+    values[rng.random(values.shape) < missing] = -999.
+
+    return values
+
+def make_grdc_files(folder: str, fo: str, n_stations: int, var_name='discharge', seed=0) -> list:
+    """Writes GRDC-files with daily discharge for stations sampled from a cube.
+    Observed values are simulated values of the station cell with multiplicative noise and 5% missing values.
+    Values are stored in column ' Value'.
+
+    Args:
+        folder (str): output folder, will be created if not there yet.
+        fo (str): path to netCDF-file as created with 'make_sim_cube' with daily time steps.
+        n_stations (int): number of stations.
+        var_name (str, optional): variable name. Defaults to 'discharge'.
+        seed (int, optional): seed of random number generator. Defaults to 0.
+
+    Returns:
+        list: paths to GRDC-files.
+    """
+
+    rng = np.random.default_rng(seed)
+    os.makedirs(folder, exist_ok=True)
+
+    stations = sample_stations(fo, n_stations, var_name=var_name, seed=seed)
+
+    with xr.open_dataset(fo) as ds:
+        time = pd.to_datetime(ds['time'].values)
+        sim = ds[var_name].values[:, stations['row'].values, stations['col'].values]
+
+    dates = time.strftime('%Y-%m-%d').values.astype(object)
+
+    files = list()
+    for i, station in stations.iterrows():
+
+        grdc_no = 1000000 + i
+        values = _perturb(sim[:, i].astype(np.float64), rng)
+
+        header = ['# Title:                 GRDC STATION DATA FILE',
+                  '#                        --------------',
+                  '# Format:                DOS-ASCII',
+                  '# Field delimiter:       ;',
+                  '# missing values are indicated by -999.000',
+                  '#',
+                  '# GRDC-No.:              {}'.format(grdc_no),
+                  '# River:                 SYNTHETIC RIVER',
+                  '# Station:               STATION_{}'.format(grdc_no),
+                  '# Country:               XX',
+                  '# Latitude (DD):       {}'.format(station['latitude']),
+                  '# Longitude (DD):      {}'.format(station['longitude']),
+                  '# Catchment area (km2):      {}'.format(round(rng.uniform(1e3, 1e6), 1)),
+                  '# Altitude (m ASL):        -999.00',
+                  '#************************************************************',
+                  '#',
+                  '# Data Set Content:      MEAN DAILY DISCHARGE (Q)',
+                  '# Unit of measure:                  m3/s',
+                  '# Time series:           {} - {}'.format(time[0].strftime('%Y-%m'), time[-1].strftime('%Y-%m')),
+                  '# No. of years:          {}'.format(time[-1].year - time[0].year + 1),
+                  '#************************************************************',
+                  '#',
+                  '# Data lines: {}'.format(time.size),
+                  '# DATA',
+                  'YYYY-MM-DD;hh:mm; Value']
+
+        lines = dates + ';--:--; ' + np.char.mod('%.3f', values).astype(object)
+
+        f = os.path.join(folder, '{}_Q_Day.Cmd.txt'.format(grdc_no))
+        with open(f, 'w', encoding='ISO-8859-1') as fp:
+            fp.write('\n'.join(header + list(lines)) + '\n')
+        files.append(f)
+
+    return files
+
+def make_gsim_files(folder: str, fo: str, n_stations: int, var_name='discharge', seed=0) -> list:
+    """Writes GSIM-files with monthly indices for stations sampled from a cube.
+    Monthly mean values are computed from the simulated values of the station cell with multiplicative noise and 5% missing values.
+    Only the columns 'MEAN', 'n.missing', and 'n.available' are written.
+
+    Args:
+        folder (str): output folder, will be created if not there yet.
+        fo (str): path to netCDF-file as created with 'make_sim_cube' with daily time steps.
+        n_stations (int): number of stations.
+        var_name (str, optional): variable name. Defaults to 'discharge'.
+        seed (int, optional): seed of random number generator. Defaults to 0.
+
+    Returns:
+        list: paths to GSIM-files.
+    """
+
+    rng = np.random.default_rng(seed)
+    os.makedirs(folder, exist_ok=True)
+
+    stations = sample_stations(fo, n_stations, var_name=var_name, seed=seed)
+
+    with xr.open_dataset(fo) as ds:
+        df_sim = pd.DataFrame(ds[var_name].values[:, stations['row'].values, stations['col'].values], index=pd.to_datetime(ds['time'].values))
+
+    df_sim = df_sim.resample('M').mean()
+    dates = df_sim.index.strftime('%Y-%m-%d').values.astype(object)
+    n_days = df_sim.index.days_in_month.values
+
+    files = list()
+    for i, station in stations.iterrows():
+
+        gsim_no = 'XX_{:07d}'.format(i)
+        values = _perturb(df_sim[i].values, rng)
+        mean = np.where(values == -999., 'NA', np.char.mod('%.4f', values)).astype(object)
+        n_missing = np.where(values == -999., n_days, 0)
+
+        header = ['#' * 50,
+                  '# ',
+                  '# MONTHLY GSIM INDICES',
+                  '# ',
+                  '# ' + '-' * 48,
+                  '# META DATA:',
+                  '# ' + '-' * 48,
+                  '# gsim.no   : {} : [-]'.format(gsim_no),
+                  '# river     : SYNTHETIC RIVER : [-]',
+                  '# station   : STATION_{} : [-]'.format(i),
+                  '# country   : XX : [-]',
+                  '# latitude  : {} : [deg]'.format(station['latitude']),
+                  '# longitude : {} : [deg]'.format(station['longitude']),
+                  '# altitude  :  : [m]',
+                  '# area      : {} : [km2]'.format(round(rng.uniform(1e3, 1e6))),
+                  '# ' + '-' * 48,
+                  '# ',
+                  '#' * 50,
+                  '"date",\t"MEAN",\t"n.missing",\t"n.available"']
+
+        lines = dates + ',\t' + mean + ',\t' + n_missing.astype(str).astype(object) + ',\t' + (n_days - n_missing).astype(str).astype(object)
+
+        f = os.path.join(folder, '{}.mon'.format(gsim_no))
+        with open(f, 'w', encoding='UTF-8') as fp:
+            fp.write('\n'.join(header + list(lines)) + '\n')
+        files.append(f)
+
+    return files
+
+def make_polygons(fo: str, n_polygons: int, extent=(-70., -10., -50., 5.), poly_id='ID', seed=0) -> str:
+    """Writes a GeoJSON-file with polygons covering an extent, similar to catchments of a basin dataset.
+    The extent is divided into a regular grid of boxes, whose edges are shifted randomly to create polygons of varying size.
+
+    Args:
+        fo (str): path to GeoJSON-file.
+        n_polygons (int): number of polygons, rounded up to a full grid of boxes.
+        extent (tuple, optional): (min_lon, min_lat, max_lon, max_lat) in degrees. Defaults to (-70., -10., -50., 5.).
+        poly_id (str, optional): name of column with unique identifier. Defaults to 'ID'.
+        seed (int, optional): seed of random number generator. Defaults to 0.
+
+    Returns:
+        str: path to GeoJSON-file.
+    """
+
+    rng = np.random.default_rng(seed)
+    min_lon, min_lat, max_lon, max_lat = extent
+
+    n_x = int(np.ceil(np.sqrt(n_polygons)))
+    n_y = int(np.ceil(n_polygons / n_x))
+
+    # inner edges are shifted by up to a quarter of the box size
+    x_edges = np.linspace(min_lon, max_lon, n_x + 1)
+    y_edges = np.linspace(min_lat, max_lat, n_y + 1)
+    x_edges[1:-1] += rng.uniform(-0.25, 0.25, n_x - 1) * (max_lon - min_lon) / n_x
+    y_edges[1:-1] += rng.uniform(-0.25, 0.25, n_y - 1) * (max_lat - min_lat) / n_y
+
+    geoms = [box(x_edges[i], y_edges[j], x_edges[i + 1], y_edges[j + 1]) for j in range(n_y) for i in range(n_x)]
+
+    gdf = gpd.GeoDataFrame({poly_id: np.arange(1, len(geoms) + 1)}, geometry=geoms, crs='EPSG:4326')
+    gdf.to_file(fo, driver='GeoJSON')
+
+    return fo
@@ -10,6 +10,12 @@ from . import ensembles
 from . import pre
 from . import io
 from . import eval
+from . import regrid
+from . import cache
+from . import catalog
+from . import climatology
+from . import signatures
+from . import plotting
 
 __author__ = """Jannis M. Hoch, Niko Wanders"""
 __institute__= """Utrecht University"""
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import pandas as pd
+import numpy as np
+import shapely.wkt
+import hashlib
+import pickle
+import json
+import click
+import os
+
+def file_fingerprint(fo: str) -> str:
+    """Creates a fingerprint of a file based on its absolute path, size and modification time.
+    The content of the file is not read, such that fingerprinting is cheap also for large files.
+
+    Args:
+        fo (str): path to file.
+
+    Returns:
+        str: hexadecimal fingerprint of the file.
+    """
+
+    fo = os.path.abspath(fo)
+    stat = os.stat(fo)
+
+    h = hashlib.sha1('{}|{}|{}'.format(fo, stat.st_size, stat.st_mtime_ns).encode())
+
+    return h.hexdigest()
+
+def path_fingerprint(fo: str) -> str:
+    """Creates a fingerprint of a path, which can be a file or a folder.
+    For files, the fingerprint of 'file_fingerprint' is returned, for folders the absolute path.
+
+    Args:
+        fo (str): path to file or folder. Can also be None.
+
+    Returns:
+        str: fingerprint of path, or None.
+    """
+
+    if fo == None:
+        return None
+    if os.path.isfile(fo):
+        return file_fingerprint(fo)
+
+    return os.path.abspath(fo)
+
+def geometry_hash(geoms) -> str:
+    """Creates a hash of one or more geometries from their WKB representation.
+
+    Args:
+        geoms (iterable): shapely geometries, e.g. the values of a GeoSeries.
+
+    Returns:
+        str: hexadecimal hash of the geometries.
+    """
+
+    h = hashlib.sha1()
+    for geom in geoms:
+        h.update(geom.wkb)
+
+    return h.hexdigest()
+
+def settings_key(**kwargs) -> str:
+    """Creates a key from settings which affect the outcome of an evaluation.
+    Keyword arguments are sorted by name, such that their order does not matter.
+
+    Returns:
+        str: hexadecimal key of the settings.
+    """
+
+    h = hashlib.sha1()
+    for key in sorted(kwargs.keys()):
+        h.update('{}={}|'.format(key, kwargs[key]).encode())
+
+    return h.hexdigest()
+
+def zonal_cache_key(geoms, run_key: str) -> str:
+    """Creates the cache key of the zonal series of a polygon.
+    Combines the hash of the polygon geometry with the key of the run settings.
+
+    Args:
+        geoms (iterable): shapely geometries of the polygon.
+        run_key (str): key of the run settings, e.g. as created with 'settings_key'.
+
+    Returns:
+        str: hexadecimal cache key.
+    """
+
+    return hashlib.sha1('{}|{}'.format(geometry_hash(geoms), run_key).encode()).hexdigest()
+
+def load_zonal_series(cache_dir: str, key: str) -> pd.DataFrame:
+    """Loads a cached zonal series.
+
+    Args:
+        cache_dir (str): folder where zonal series are cached.
+        key (str): cache key of the zonal series.
+
+    Returns:
+        pd.DataFrame: cached zonal series, or None if nothing is cached for this key.
+    """
+
+    fo = os.path.join(cache_dir, '{}.pkl'.format(key))
+
+    if not os.path.isfile(fo):
+        return None
+
+    with open(fo, 'rb') as f:
+        df = pickle.load(f)
+
+    return df
+
+def store_zonal_series(cache_dir: str, key: str, df: pd.DataFrame) -> None:
+    """Stores a zonal series to the cache.
+    The file is first written under a temporary name, such that parallel processes never read a partial file.
+
+    Args:
+        cache_dir (str): folder where zonal series are cached.
+        key (str): cache key of the zonal series.
+        df (pd.DataFrame): zonal series to be cached.
+    """
+
+    fo = os.path.join(cache_dir, '{}.pkl'.format(key))
+    tmp = os.path.join(cache_dir, '.{}_{}.pkl'.format(key, os.getpid()))
+
+    with open(tmp, 'wb') as f:
+        pickle.dump(df, f)
+
+    os.replace(tmp, fo)
+
+def check_cache_dir(cache_dir: str, out: str) -> str:
+    """Checks and creates the cache folder.
+    As the output folder is recreated at the start of each run (unless resumed), the cache folder cannot be located inside it.
+
+    Args:
+        cache_dir (str): folder where zonal series are cached.
+        out (str): output folder of the run.
+
+    Returns:
+        str: absolute path to cache folder.
+    """
+
+    cache_dir = os.path.abspath(cache_dir)
+    out = os.path.abspath(out)
+
+    if os.path.commonpath([cache_dir, out]) == out:
+        raise ValueError('ERROR -- cache folder {} must not be located inside output folder {}.'.format(cache_dir, out))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    click.echo('INFO -- caching zonal series in folder {}'.format(cache_dir))
+
+    return cache_dir
+
+def manifest_file(out: str) -> str:
+    """Returns the path to the manifest of completed stations or polygons in an output folder.
+
+    Args:
+        out (str): output folder of the run.
+
+    Returns:
+        str: path to manifest.
+    """
+
+    return os.path.join(os.path.abspath(out), 'manifest.jsonl')
+
+def _to_json(value):
+
+    # numpy scalars and geometries cannot be serialized to JSON directly
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, 'wkt'):
+        return {'wkt': value.wkt}
+    # arrays of values or geometries are stored as lists
+    if hasattr(value, '__len__'):
+        return list(value)
+
+    raise TypeError('ERROR -- cannot serialize {} to JSON.'.format(type(value)))
+
+def append_manifest(out: str, run_key: str, unit: str, result: dict) -> None:
+    """Appends the result of a completed station or polygon to the manifest of a run.
+    Each result is written as one line with a single write to a file opened in append mode, followed by a sync to disk.
+    That way, an interrupted run leaves at most one incomplete line, which is ignored when reading the manifest.
+
+    Args:
+        out (str): output folder of the run.
+        run_key (str): key of the run settings, e.g. as created with 'settings_key'.
+        unit (str): name of station or ID of polygon.
+        result (dict): result of the station or polygon.
+    """
+
+    line = json.dumps({'run_key': run_key, 'unit': str(unit), 'result': result}, default=_to_json) + '\n'
+
+    fd = os.open(manifest_file(out), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line.encode())
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def read_manifest(out: str, run_key: str) -> dict:
+    """Reads the results of completed stations or polygons from the manifest of a run.
+    Only results with the same run key are returned, i.e. results of runs with other settings are ignored.
+    An incomplete last line left by an interrupted run is removed from the manifest, such that results can be appended again.
+
+    Args:
+        out (str): output folder of the run.
+        run_key (str): key of the run settings, e.g. as created with 'settings_key'.
+
+    Returns:
+        dict: result per name of station or ID of polygon.
+    """
+
+    results = dict()
+
+    if not os.path.isfile(manifest_file(out)):
+        return results
+
+    complete = 0
+
+    with open(manifest_file(out), 'r') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                break
+            complete += len(line.encode())
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry['run_key'] != run_key:
+                continue
+            result = entry['result']
+            # geometries of polygons are restored as array, as returned by the evaluation
+            if 'geometry' in result.keys():
+                result['geometry'] = np.array([shapely.wkt.loads(geom['wkt']) for geom in result['geometry']], dtype=object)
+            results[entry['unit']] = result
+
+    if os.path.getsize(manifest_file(out)) > complete:
+        os.truncate(manifest_file(out), complete)
+
+    return results
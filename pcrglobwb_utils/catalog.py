@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import pcrglobwb_utils
+import pandas as pd
+import numpy as np
+from functools import partial
+import sqlite3
+import click
+import glob
+import os
+
+# columns of the station table, next to the path of the file
+# all properties of the header are stored as JSON as well, such that they can be used instead of reading the header again
+CATALOG_COLUMNS = ['source', 'size', 'mtime', 'station', 'station_no', 'latitude', 'longitude', 'cat_area', 'no_years', 'ts_start', 'ts_end', 'altitude', 'river', 'properties']
+
+def connect(catalog_file: str) -> sqlite3.Connection:
+    """Opens a station catalog and creates the station table if not there yet.
+    Catalogs created before header properties were stored as JSON get an empty 'properties' column, which is filled when the catalog is refreshed.
+
+    Args:
+        catalog_file (str): path to SQLite-file containing the catalog.
+
+    Returns:
+        sqlite3.Connection: connection to catalog.
+    """
+
+    con = sqlite3.connect(os.path.abspath(catalog_file))
+    con.execute("""CREATE TABLE IF NOT EXISTS stations (
+                   file TEXT PRIMARY KEY, source TEXT, size INTEGER, mtime INTEGER,
+                   station TEXT, station_no TEXT, latitude REAL, longitude REAL, cat_area REAL, no_years INTEGER,
+                   ts_start TEXT, ts_end TEXT, altitude REAL, river TEXT, properties TEXT)""")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_station ON stations (source, station)")
+
+    if 'properties' not in [row[1] for row in con.execute("PRAGMA table_info(stations)")]:
+        con.execute("ALTER TABLE stations ADD COLUMN properties TEXT")
+
+    return con
+
+def read_header(f: str, source: str, encoding: str) -> dict:
+    """Reads the header of a GRDC or GSIM file and returns it as row of the station catalog.
+
+    Args:
+        f (str): path to GRDC or GSIM file.
+        source (str): either 'GRDC' or 'GSIM'.
+        encoding (str): encoding of file.
+
+    Returns:
+        dict: row of station catalog.
+    """
+
+    stat = os.stat(f)
+    row = dict.fromkeys(CATALOG_COLUMNS)
+    row.update({'file': f, 'source': source, 'size': stat.st_size, 'mtime': stat.st_mtime_ns})
+
+    with open(f, 'rb') as fo:
+        if source == 'GRDC':
+            props, _ = pcrglobwb_utils.obs_data.parse_grdc_header(fo, encoding=encoding)
+        else:
+            props, _ = pcrglobwb_utils.obs_data.parse_gsim_header(fo, encoding=encoding)
+
+    row['properties'] = pcrglobwb_utils.obs_data.props_to_json(props)
+
+    for key in ['station', 'latitude', 'longitude', 'no_years', 'altitude', 'river']:
+        if key in props.keys():
+            row[key] = props[key]
+
+    if source == 'GRDC':
+        row['station_no'] = str(props['grdc_no']) if 'grdc_no' in props.keys() else None
+    else:
+        row['station_no'] = props.get('gsim_no')
+
+    # GSIM files may not provide a catchment area
+    try:
+        row['cat_area'] = float(props['cat_area'])
+    except (KeyError, ValueError):
+        row['cat_area'] = None
+
+    for key in ['ts_start', 'ts_end']:
+        if key in props.keys():
+            row[key] = props[key].strftime('%Y-%m-%d')
+
+    if (row['altitude'] is not None) and np.isnan(row['altitude']):
+        row['altitude'] = None
+
+    return row
+
+def build_catalog(in_dir: str, catalog_file: str, source='GRDC', encoding=None, number_processes=None, verbose=False) -> pd.DataFrame:
+    """Builds or refreshes a catalog of station properties for all GRDC or GSIM files in a folder.
+    Only the headers of the files are read.
+    The catalog is updated incrementally, i.e. only files which are new or whose size or modification time changed, or whose properties are missing, are read.
+    Files which were removed from the folder are removed from the catalog.
+
+    Args:
+        in_dir (str): path to folder with GRDC or GSIM files.
+        catalog_file (str): path to SQLite-file containing the catalog. Is created if not there yet.
+        source (str, optional): either 'GRDC' or 'GSIM'. Defaults to 'GRDC'.
+        encoding (str, optional): encoding of files. If None, 'ISO-8859-1' is used for GRDC and 'UTF-8' for GSIM files. Defaults to None.
+        number_processes (int, optional): number of processes to be used for reading files. Defaults to None.
+        verbose (bool, optional): whether or not to print more info. Defaults to False.
+
+    Returns:
+        pd.DataFrame: catalog entries of all stations in the folder.
+    """
+
+    if source not in ['GRDC', 'GSIM']:
+        raise ValueError('ERROR -- source must be either "GRDC" or "GSIM", not {}.'.format(source))
+
+    if encoding == None:
+        encoding = 'ISO-8859-1' if source == 'GRDC' else 'UTF-8'
+
+    in_dir = os.path.abspath(in_dir)
+    click.echo('INFO -- updating catalog {} with {} files from folder {}'.format(os.path.abspath(catalog_file), source, in_dir))
+
+    files = sorted(glob.glob(os.path.join(in_dir, '*')))
+    files = [f for f in files if os.path.isfile(f)]
+
+    con = connect(catalog_file)
+
+    with con:
+
+        # entries without properties get a size of None, such that they are read again
+        known = dict(((row[0], (row[1] if row[3] else None, row[2])) for row in con.execute("SELECT file, size, mtime, properties IS NOT NULL FROM stations WHERE source = ? AND file LIKE ?", (source, os.path.join(in_dir, '%')))))
+
+        # only files in this folder, not in sub-folders, belong to it
+        known = {f: v for f, v in known.items() if os.path.dirname(f) == in_dir}
+
+        removed = set(known.keys()) - set(files)
+        if len(removed) > 0:
+            con.executemany("DELETE FROM stations WHERE file = ?", [(f,) for f in removed])
+
+        changed = list()
+        for f in files:
+            stat = os.stat(f)
+            if known.get(f) != (stat.st_size, stat.st_mtime_ns):
+                changed.append(f)
+
+        click.echo('INFO -- {} new or modified files, {} removed files'.format(len(changed), len(removed)))
+
+        rows = pcrglobwb_utils.utils._map_files(partial(read_header, source=source, encoding=encoding), changed, number_processes)
+
+        if verbose:
+            for row in rows:
+                click.echo('VERBOSE -- cataloged station {} from file {}.'.format(row['station'], row['file']))
+
+        columns = ['file'] + CATALOG_COLUMNS
+        con.executemany("INSERT OR REPLACE INTO stations ({}) VALUES ({})".format(', '.join(columns), ', '.join(['?'] * len(columns))),
+                        [tuple(row[c] for c in columns) for row in rows])
+
+    df = read_catalog(catalog_file, source=source, in_dir=in_dir, con=con)
+    con.close()
+
+    return df
+
+def read_catalog(catalog_file: str, source=None, in_dir=None, con=None) -> pd.DataFrame:
+    """Reads entries of a station catalog.
+
+    Args:
+        catalog_file (str): path to SQLite-file containing the catalog.
+        source (str, optional): if specified, only entries of either 'GRDC' or 'GSIM' are returned. Defaults to None.
+        in_dir (str, optional): if specified, only entries of files in this folder are returned. Defaults to None.
+        con (sqlite3.Connection, optional): already opened connection to catalog. Defaults to None.
+
+    Returns:
+        pd.DataFrame: catalog entries with station properties and path to file.
+    """
+
+    return select_stations(catalog_file, source=source, in_dir=in_dir, con=con)
+
+def select_stations(catalog_file: str, source=None, in_dir=None, cat_area_thld=None, nr_years_thld=None, timeseries_end=None, timeseries_start=None, con=None) -> pd.DataFrame:
+    """Selects stations from a station catalog based on their properties.
+    The criteria are the same as those applied by 'pre.select_grdc_stations'.
+
+    Args:
+        catalog_file (str): path to SQLite-file containing the catalog.
+        source (str, optional): if specified, only entries of either 'GRDC' or 'GSIM' are returned. Defaults to None.
+        in_dir (str, optional): if specified, only entries of files in this folder are returned. Defaults to None.
+        cat_area_thld (float, optional): minimum catchment area. Defaults to None.
+        nr_years_thld (int, optional): minimum number of years with data. Defaults to None.
+        timeseries_end (str, optional): minimum end date of timeseries. Defaults to None.
+        timeseries_start (str, optional): minimum start date of timeseries. Defaults to None.
+        con (sqlite3.Connection, optional): already opened connection to catalog. Defaults to None.
+
+    Returns:
+        pd.DataFrame: catalog entries of selected stations.
+    """
+
+    clauses, params = list(), list()
+
+    if source != None:
+        clauses.append('source = ?')
+        params.append(source)
+    if in_dir != None:
+        clauses.append('file LIKE ?')
+        params.append(os.path.join(os.path.abspath(in_dir), '%'))
+    if cat_area_thld != None:
+        clauses.append('cat_area >= ?')
+        params.append(cat_area_thld)
+    if nr_years_thld != None:
+        clauses.append('no_years >= ?')
+        params.append(nr_years_thld)
+    if timeseries_end != None:
+        clauses.append('ts_end >= ?')
+        params.append(pd.to_datetime(timeseries_end).strftime('%Y-%m-%d'))
+    if timeseries_start != None:
+        clauses.append('ts_start >= ?')
+        params.append(pd.to_datetime(timeseries_start).strftime('%Y-%m-%d'))
+
+    query = 'SELECT * FROM stations'
+    if len(clauses) > 0:
+        query += ' WHERE ' + ' AND '.join(clauses)
+    query += ' ORDER BY file'
+
+    close = con == None
+    if close:
+        con = connect(catalog_file)
+
+    df = pd.read_sql_query(query, con, params=params)
+
+    if close:
+        con.close()
+
+    if in_dir != None:
+        df = df.loc[df['file'].map(os.path.dirname) == os.path.abspath(in_dir)].reset_index(drop=True)
+
+    for key in ['ts_start', 'ts_end']:
+        df[key] = pd.to_datetime(df[key])
+
+    return df
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import pcrglobwb_utils
+import xarray as xr
+import pandas as pd
+import numpy as np
+import click
+import os
+
+# number of groups per type of climatology, the temporal mean is a climatology with a single group
+CLIMATOLOGY_GROUPS = {'monthly': 12, 'dayofyear': 366, 'mean': 1}
+
+def get_groups(times: np.ndarray, kind='monthly') -> np.ndarray:
+    """Determines the group of each time step for a climatology, i.e. either the month or the day of the year.
+    For the temporal mean, all time steps belong to the same group.
+
+    Args:
+        times (np.ndarray): dates of time steps.
+        kind (str, optional): either 'monthly', 'dayofyear', or 'mean'. Defaults to 'monthly'.
+
+    Returns:
+        np.ndarray: index of group per time step, starting at 0.
+    """
+
+    times = pd.DatetimeIndex(times)
+
+    if kind == 'monthly':
+        return times.month.values - 1
+    elif kind == 'dayofyear':
+        return times.dayofyear.values - 1
+    elif kind == 'mean':
+        return np.zeros(len(times), dtype=np.int64)
+    else:
+        raise ValueError('ERROR -- kind of climatology must be either "monthly", "dayofyear", or "mean", not {}.'.format(kind))
+
+def iter_time_blocks(da: xr.DataArray, block_size=365):
+    """Iterates over a data array in blocks along the time dimension.
+    Only one block is loaded into memory at a time.
+
+    Args:
+        da (xr.DataArray): data array with time dimension.
+        block_size (int, optional): number of time steps per block. Defaults to 365.
+
+    Yields:
+        tuple[int, np.ndarray, np.ndarray]: index of first time step; dates of time steps; values of block.
+    """
+
+    nt = da.sizes['time']
+
+    for start in range(0, nt, block_size):
+        block = da.isel(time=slice(start, start + block_size))
+        yield start, block['time'].values, block.values.astype(np.float64)
+
+def calc_climatology(da: xr.DataArray, kind='monthly', block_size=365, verbose=False) -> xr.DataArray:
+    """Computes the climatological mean per month or day of the year of gridded data, or its temporal mean.
+    The data is streamed in blocks along the time dimension, per block sums and counts of valid values are accumulated per group and cell.
+    Memory use is therefore bound by the block size and the number of groups, not by the length of the timeseries.
+
+    Args:
+        da (xr.DataArray): data array with time dimension and two spatial dimensions.
+        kind (str, optional): either 'monthly', 'dayofyear', or 'mean'. Defaults to 'monthly'.
+        block_size (int, optional): number of time steps loaded at once. Defaults to 365.
+        verbose (bool, optional): whether or not to print more info. Defaults to False.
+
+    Returns:
+        xr.DataArray: climatology with 'month' or 'dayofyear' as first dimension. For the temporal mean, there is no such dimension.
+    """
+
+    lat_dim, lon_dim = pcrglobwb_utils.regrid.get_spatial_dims(da)
+    da = da.transpose('time', lat_dim, lon_dim)
+
+    n_groups = CLIMATOLOGY_GROUPS.get(kind)
+    if n_groups == None:
+        raise ValueError('ERROR -- kind of climatology must be either "monthly", "dayofyear", or "mean", not {}.'.format(kind))
+
+    shape = (n_groups, da.sizes[lat_dim], da.sizes[lon_dim])
+    sums = np.zeros(shape, dtype=np.float64)
+    counts = np.zeros(shape, dtype=np.int64)
+
+    click.echo('INFO -- computing {} climatology.'.format(kind))
+
+    for start, times, block in iter_time_blocks(da, block_size=block_size):
+
+        if verbose: click.echo('VERBOSE -- accumulating time steps {} to {}.'.format(start, start + len(times)))
+
+        valid = ~np.isnan(block)
+        groups = get_groups(times, kind=kind)
+
+        # unbuffered addition, such that time steps of the same group within a block are all accumulated
+        np.add.at(sums, groups, np.where(valid, block, 0.0))
+        np.add.at(counts, groups, valid)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        clim = np.where(counts > 0, sums / counts, np.nan)
+
+    if kind == 'mean':
+        return xr.DataArray(clim[0], coords={lat_dim: da[lat_dim].values, lon_dim: da[lon_dim].values}, dims=(lat_dim, lon_dim), name=da.name, attrs=da.attrs)
+
+    group_dim = 'month' if kind == 'monthly' else 'dayofyear'
+
+    da_clim = xr.DataArray(clim, coords={group_dim: np.arange(1, n_groups + 1), lat_dim: da[lat_dim].values, lon_dim: da[lon_dim].values},
+                           dims=(group_dim, lat_dim, lon_dim), name=da.name, attrs=da.attrs)
+
+    return da_clim
+
+def calc_anomalies(da: xr.DataArray, kind='monthly', clim=None, out_file=None, block_size=365, verbose=False) -> xr.DataArray:
+    """Computes anomalies of gridded data with respect to its monthly or day-of-year climatology, or to its temporal mean.
+    Anomalies are computed block by block along the time dimension.
+    If an output file is specified, each block is written to it directly and the anomalies are returned as lazily loaded data array from this file.
+    Otherwise, anomalies are returned in memory.
+
+    Args:
+        da (xr.DataArray): data array with time dimension and two spatial dimensions.
+        kind (str, optional): either 'monthly', 'dayofyear', or 'mean'. Defaults to 'monthly'.
+        clim (xr.DataArray, optional): pre-computed climatology, e.g. from 'calc_climatology'. If None, it is computed from 'da'. Defaults to None.
+        out_file (str, optional): path to netCDF-file to which anomalies are written. Defaults to None.
+        block_size (int, optional): number of time steps loaded at once. Defaults to 365.
+        verbose (bool, optional): whether or not to print more info. Defaults to False.
+
+    Returns:
+        xr.DataArray: anomalies.
+    """
+
+    lat_dim, lon_dim = pcrglobwb_utils.regrid.get_spatial_dims(da)
+    da = da.transpose('time', lat_dim, lon_dim)
+
+    if clim is None:
+        clim = calc_climatology(da, kind=kind, block_size=block_size, verbose=verbose)
+
+    # the temporal mean is treated as climatology with a single group
+    clim = np.asarray(clim)
+    if clim.ndim == 2:
+        clim = clim[np.newaxis, ...]
+
+    var_name = da.name if da.name != None else 'anomaly'
+
+    if out_file != None:
+        out_file = os.path.abspath(out_file)
+        click.echo('INFO -- writing {} anomalies to {}.'.format(kind, out_file))
+        nc = pcrglobwb_utils.io.create_netcdf(out_file, da[lat_dim].values, da[lon_dim].values, [var_name], lat_dim=lat_dim, lon_dim=lon_dim, dtype='f8',
+                                              attrs={'history': 'anomalies w.r.t. {} climatology created with pcrglobwb_utils version {}'.format(kind, pcrglobwb_utils.__version__)})
+    else:
+        out = np.empty(da.shape, dtype=np.float64)
+
+    try:
+        for start, times, block in iter_time_blocks(da, block_size=block_size):
+
+            if verbose: click.echo('VERBOSE -- computing anomalies of time steps {} to {}.'.format(start, start + len(times)))
+
+            groups = get_groups(times, kind=kind)
+            anomaly = block - clim[groups]
+
+            if out_file != None:
+                pcrglobwb_utils.io.write_netcdf_block(nc, start, times, {var_name: anomaly})
+            else:
+                out[start:start + len(times)] = anomaly
+    finally:
+        if out_file != None:
+            nc.close()
+
+    if out_file != None:
+        da_out = xr.open_dataset(out_file)[var_name]
+        da_out.attrs = da.attrs
+    else:
+        da_out = xr.DataArray(out, coords={'time': da['time'].values, lat_dim: da[lat_dim].values, lon_dim: da[lon_dim].values},
+                              dims=('time', lat_dim, lon_dim), name=da.name, attrs=da.attrs)
+
+    return da_out
@@ -1,5 +1,13 @@
 
+import pcrglobwb_utils
 import pandas as pd
+import numpy as np
+import xarray as xr
+import multiprocessing as mp
+from functools import partial
+import click
+import warnings
+import os
 
 from . import time_funcs
 
@@ -21,20 +29,48 @@ class ensemble_data():
         self.df_ens = pd.concat(temp, axis=1)
 
     def calc_stats(self) -> pd.DataFrame:
-        """Calculates mean, max, and min for each time step.
+        """Calculates mean, max, min, and standard deviation for each time step.
+        For gridded ensembles stored in netCDF-files, use 'calc_ensemble_stats' instead.
 
         Returns:
-            pd.DataFrame: dataframe containing the input dataframes as well as columns for mean, max, and min.
+            pd.DataFrame: dataframe containing the input dataframes as well as columns for mean, max, min, and std.
         """        
 
         self.df_stats = self.df_ens.copy()
 
-        self.df_stats['mean'] = self.df_stats.mean(axis=1)
-        self.df_stats['max'] = self.df_stats.max(axis=1)
-        self.df_stats['min'] = self.df_stats.min(axis=1)
+        self.df_stats['mean'] = self.df_ens.mean(axis=1)
+        self.df_stats['max'] = self.df_ens.max(axis=1)
+        self.df_stats['min'] = self.df_ens.min(axis=1)
+        self.df_stats['std'] = self.df_ens.std(axis=1)
 
         return self.df_stats
 
+    def calc_quantiles(self, quantiles=[0.05, 0.5, 0.95], method='exact', n_bins=64) -> pd.DataFrame:
+        """Calculates quantiles across ensemble members for each time step.
+
+        Args:
+            quantiles (list, optional): quantiles to be computed, between 0 and 1. Defaults to [0.05, 0.5, 0.95].
+            method (str, optional): either 'exact' or 'sketch' for approximate quantiles from a 'quantile_sketch'. Defaults to 'exact'.
+            n_bins (int, optional): number of bins of the sketch (only used with method 'sketch'). Defaults to 64.
+
+        Returns:
+            pd.DataFrame: dataframe with one column per quantile, named e.g. 'p5', 'p50', and 'p95'.
+        """
+
+        if method == 'exact':
+            values = np.stack([np.nanquantile(self.df_ens.values, q, axis=1) for q in quantiles])
+        elif method == 'sketch':
+            sketch = quantile_sketch(self.df_ens.min(axis=1).values, self.df_ens.max(axis=1).values, n_bins=n_bins)
+            for col in range(self.df_ens.shape[1]):
+                sketch.add(self.df_ens.iloc[:, col].values)
+            values = sketch.quantile(quantiles)
+        else:
+            raise ValueError('ERROR -- method must be either "exact" or "sketch", not {}.'.format(method))
+
+        df_out = pd.DataFrame(values.T, index=self.df_ens.index, columns=[get_quantile_name(q) for q in quantiles])
+
+        return df_out
+
     def calc_climatology(self) -> pd.DataFrame:
         """Calculates the climatological (long-term) average per month.
 
@@ -48,3 +84,346 @@ class ensemble_data():
         df_out = time_funcs.calc_monthly_climatology(self.df_ens)
 
         return df_out
+
+class quantile_sketch():
+    """Mergeable sketch to approximate quantiles of many values per element of an array, e.g. across ensemble members per time step and cell.
+    Values are counted in equally spaced bins between known lower and upper bounds per element.
+    The error of each quantile is smaller than the bin width, i.e. (upper - lower) / n_bins.
+    Memory use is set by the number of bins and independent of the number of values added.
+    Sketches with identical bounds can be merged, such that values can be added by different workers.
+
+    Args:
+        lower (np.ndarray): lowest value per element.
+        upper (np.ndarray): highest value per element.
+        n_bins (int, optional): number of bins per element. Defaults to 64.
+    """
+
+    def __init__(self, lower: np.ndarray, upper: np.ndarray, n_bins=64):
+        """Creates an empty sketch.
+        """
+
+        self.lower = np.asarray(lower, dtype=np.float64)
+        self.upper = np.asarray(upper, dtype=np.float64)
+        self.n_bins = n_bins
+        self.counts = np.zeros(self.lower.shape + (n_bins,), dtype=np.int32)
+
+    def add(self, values: np.ndarray):
+        """Adds one value per element to the sketch. Missing values are ignored.
+
+        Args:
+            values (np.ndarray): values with same shape as bounds.
+        """
+
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+
+        width = self.upper - self.lower
+        with np.errstate(invalid='ignore', divide='ignore'):
+            idx = np.where(width > 0, np.floor((values - self.lower) / width * self.n_bins), 0)
+        idx = np.clip(np.nan_to_num(idx), 0, self.n_bins - 1).astype(np.int64)
+
+        # each element receives exactly one value, hence no duplicate indices
+        flat = self.counts.reshape(-1, self.n_bins)
+        flat[np.arange(flat.shape[0]), idx.ravel()] += valid.ravel()
+
+    def merge(self, other):
+        """Merges another sketch with identical bounds into this sketch.
+
+        Args:
+            other (quantile_sketch): sketch to be merged.
+
+        Returns:
+            quantile_sketch: this sketch.
+        """
+
+        if (self.n_bins != other.n_bins) or (not np.array_equal(self.lower, other.lower, equal_nan=True)) or (not np.array_equal(self.upper, other.upper, equal_nan=True)):
+            raise ValueError('ERROR -- only sketches with identical bounds and number of bins can be merged.')
+
+        self.counts += other.counts
+
+        return self
+
+    def quantile(self, quantiles: list) -> np.ndarray:
+        """Approximates quantiles per element.
+        As with numpy's default method, quantiles are linearly interpolated between the two closest ranked values.
+        Ranked values are approximated by spreading the values counted in a bin evenly over the bin.
+
+        Args:
+            quantiles (list): quantiles to be computed, between 0 and 1.
+
+        Returns:
+            np.ndarray: quantiles with the quantiles as first dimension, followed by the shape of the bounds.
+        """
+
+        cum = np.cumsum(self.counts, axis=-1)
+        n = cum[..., -1]
+
+        out = []
+        for q in quantiles:
+            rank = q * np.maximum(n - 1, 0)
+            lower_rank = np.floor(rank)
+            lower_value = self._get_ranked_value(cum, lower_rank)
+            upper_value = self._get_ranked_value(cum, np.minimum(lower_rank + 1, np.maximum(n - 1, 0)))
+            value = lower_value + (rank - lower_rank) * (upper_value - lower_value)
+            out.append(np.where(n > 0, value, np.nan))
+
+        return np.stack(out)
+
+    def _get_ranked_value(self, cum: np.ndarray, rank: np.ndarray) -> np.ndarray:
+
+        # bin containing the value with given rank (starting at 0)
+        b = np.minimum((cum <= rank[..., np.newaxis]).sum(axis=-1), self.n_bins - 1)
+        cum_before = np.take_along_axis(cum, b[..., np.newaxis], axis=-1)[..., 0] - np.take_along_axis(self.counts, b[..., np.newaxis], axis=-1)[..., 0]
+        count = np.take_along_axis(self.counts, b[..., np.newaxis], axis=-1)[..., 0]
+
+        width = (self.upper - self.lower) / self.n_bins
+        with np.errstate(invalid='ignore', divide='ignore'):
+            frac = np.where(count > 0, (rank - cum_before + 0.5) / count, 0.5)
+
+        return np.clip(self.lower + width * (b + frac), self.lower, self.upper)
+
+def get_quantile_name(q: float) -> str:
+    """Returns the name of a quantile as percentile, e.g. 'p5' for 0.05.
+
+    Args:
+        q (float): quantile between 0 and 1.
+
+    Returns:
+        str: name of quantile.
+    """
+
+    return 'p{:g}'.format(round(q * 100, 6))
+
+def calc_ensemble_stats(files: list, var_name: str, out_file: str, block_size=365, climatology='monthly', number_processes=None, verbose=False) -> None:
+    """Computes per-time ensemble statistics of gridded data stored in one netCDF-file per ensemble member.
+    Members are streamed in blocks along the time dimension, such that at most one block of one member is in memory per process.
+    Per block, mean, minimum, maximum, and standard deviation across members are accumulated member by member.
+    Blocks can be processed in parallel, they are written to the output file in order as soon as they are computed.
+    Missing values are ignored, the standard deviation is computed with one degree of freedom as with pandas.
+    Besides the per-time statistics, the climatology of the ensemble mean is written to the output file.
+
+    Args:
+        files (list): paths to netCDF-files with one ensemble member each. All members need to have the same grid and time axis.
+        var_name (str): variable name in netCDF-files.
+        out_file (str): path to netCDF-file to which statistics are written.
+        block_size (int, optional): number of time steps processed at once. Defaults to 365.
+        climatology (str, optional): either 'monthly', 'dayofyear', or None to skip the climatology. Defaults to 'monthly'.
+        number_processes (int, optional): number of processes to be used. If None, blocks are processed sequentially. Defaults to None.
+        verbose (bool, optional): whether or not to print more info. Defaults to False.
+    """
+
+    files = [os.path.abspath(f) for f in files]
+    click.echo('INFO -- computing ensemble statistics of variable {} for {} members.'.format(var_name, len(files)))
+
+    lat_dim, lon_dim, times, lat, lon = _get_member_coords(files, var_name)
+
+    blocks = [(start, min(start + block_size, len(times))) for start in range(0, len(times), block_size)]
+    calc_block = partial(_calc_block_stats, files=files, var_name=var_name, lat_dim=lat_dim, lon_dim=lon_dim)
+
+    if climatology != None:
+        n_groups = pcrglobwb_utils.climatology.CLIMATOLOGY_GROUPS[climatology]
+        clim_sums = np.zeros((n_groups, len(lat), len(lon)))
+        clim_counts = np.zeros((n_groups, len(lat), len(lon)), dtype=np.int64)
+
+    out_file = os.path.abspath(out_file)
+    nc = pcrglobwb_utils.io.create_netcdf(out_file, lat, lon, ['mean', 'min', 'max', 'std'], lat_dim=lat_dim, lon_dim=lon_dim, dtype='f8',
+                                          attrs={'variable': var_name, 'members': len(files), 'history': 'created with pcrglobwb_utils version {}'.format(pcrglobwb_utils.__version__)})
+
+    try:
+        if (number_processes == None) or (len(blocks) < 2):
+            results = map(calc_block, blocks)
+        else:
+            min_number_processes = min(number_processes, len(blocks), mp.cpu_count())
+            click.echo('INFO -- using {} CPUs for multiprocessing'.format(min_number_processes))
+            pool = mp.Pool(processes=min_number_processes)
+            results = pool.imap(calc_block, blocks)
+
+        for (start, stop), stats in zip(blocks, results):
+
+            if verbose: click.echo('VERBOSE -- writing statistics of time steps {} to {}.'.format(start, stop))
+
+            count = stats.pop('count')
+            pcrglobwb_utils.io.write_netcdf_block(nc, start, times[start:stop], stats)
+
+            if climatology != None:
+                groups = pcrglobwb_utils.climatology.get_groups(times[start:stop], kind=climatology)
+                np.add.at(clim_sums, groups, np.where(count > 0, stats['mean'], 0.0))
+                np.add.at(clim_counts, groups, count > 0)
+
+        if (number_processes != None) and (len(blocks) > 1):
+            pool.close()
+            pool.join()
+
+    finally:
+        nc.close()
+
+    if climatology != None:
+        group_dim = 'month' if climatology == 'monthly' else 'dayofyear'
+        with np.errstate(invalid='ignore', divide='ignore'):
+            clim = np.where(clim_counts > 0, clim_sums / clim_counts, np.nan)
+        da_clim = xr.DataArray(clim, coords={group_dim: np.arange(1, n_groups + 1), lat_dim: lat, lon_dim: lon}, dims=(group_dim, lat_dim, lon_dim), name='mean_climatology')
+        da_clim.to_netcdf(out_file, mode='a')
+
+    click.echo('INFO -- ensemble statistics written to {}.'.format(out_file))
+
+def _calc_block_stats(block: tuple, files: list, var_name: str, lat_dim: str, lon_dim: str) -> dict:
+
+    start, stop = block
+
+    # statistics are updated member by member (Welford's algorithm), such that members are never stacked
+    for i, f in enumerate(files):
+
+        with xr.open_dataset(f) as ds:
+            x = ds[var_name].isel(time=slice(start, stop)).transpose('time', lat_dim, lon_dim).values.astype(np.float64)
+
+        if i == 0:
+            count = np.zeros(x.shape, dtype=np.int64)
+            mean = np.zeros(x.shape)
+            m2 = np.zeros(x.shape)
+            x_min = np.full(x.shape, np.nan)
+            x_max = np.full(x.shape, np.nan)
+
+        valid = ~np.isnan(x)
+        count += valid
+        delta = np.where(valid, x - mean, 0.0)
+        mean += delta / np.maximum(count, 1)
+        m2 += np.where(valid, delta * (x - mean), 0.0)
+        x_min = np.fmin(x_min, x)
+        x_max = np.fmax(x_max, x)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.where(count > 1, np.sqrt(m2 / (count - 1)), np.nan)
+
+    return {'mean': np.where(count > 0, mean, np.nan), 'min': x_min, 'max': x_max, 'std': std, 'count': count}
+
+def calc_ensemble_quantiles(files: list, var_name: str, out_file: str, quantiles=[0.05, 0.5, 0.95], method='exact', n_bins=64, block_size=365, number_processes=None, verbose=False) -> None:
+    """Computes per-time quantiles across ensemble members of gridded data stored in one netCDF-file per ensemble member.
+    Two methods are available, trading accuracy for memory:
+
+    * 'exact': per block along the time dimension, all members are loaded and quantiles are computed exactly. Memory use scales with number of members times block size, hence the block size should be reduced for large ensembles. Blocks are processed in parallel.
+    * 'sketch': per block, members are streamed one by one into a 'quantile_sketch'. Memory use scales with the number of bins times block size, independent of the number of members, and the error per quantile is smaller than the ensemble range divided by the number of bins. Members are divided over the processes and the sketches of all processes are merged.
+
+    Args:
+        files (list): paths to netCDF-files with one ensemble member each. All members need to have the same grid and time axis.
+        var_name (str): variable name in netCDF-files.
+        out_file (str): path to netCDF-file to which quantiles are written, with one variable per quantile, e.g. 'p5', 'p50', and 'p95'.
+        quantiles (list, optional): quantiles to be computed, between 0 and 1. Defaults to [0.05, 0.5, 0.95].
+        method (str, optional): either 'exact' or 'sketch'. Defaults to 'exact'.
+        n_bins (int, optional): number of bins of the sketch (only used with method 'sketch'). Defaults to 64.
+        block_size (int, optional): number of time steps processed at once. Defaults to 365.
+        number_processes (int, optional): number of processes to be used. If None, all computations are sequential. Defaults to None.
+        verbose (bool, optional): whether or not to print more info. Defaults to False.
+    """
+
+    if method not in ['exact', 'sketch']:
+        raise ValueError('ERROR -- method must be either "exact" or "sketch", not {}.'.format(method))
+
+    files = [os.path.abspath(f) for f in files]
+    click.echo('INFO -- computing {} quantiles of variable {} for {} members.'.format(method, var_name, len(files)))
+
+    lat_dim, lon_dim, times, lat, lon = _get_member_coords(files, var_name)
+
+    blocks = [(start, min(start + block_size, len(times))) for start in range(0, len(times), block_size)]
+    var_names = [get_quantile_name(q) for q in quantiles]
+
+    # with the exact method, blocks are distributed over processes; with the sketch method, members are
+    n_tasks = len(blocks) if method == 'exact' else len(files)
+    if (number_processes != None) and (n_tasks > 1):
+        min_number_processes = min(number_processes, n_tasks, mp.cpu_count())
+        click.echo('INFO -- using {} CPUs for multiprocessing'.format(min_number_processes))
+        pool = mp.Pool(processes=min_number_processes)
+    else:
+        min_number_processes = 1
+        pool = None
+
+    out_file = os.path.abspath(out_file)
+    nc = pcrglobwb_utils.io.create_netcdf(out_file, lat, lon, var_names, lat_dim=lat_dim, lon_dim=lon_dim, dtype='f8',
+                                          attrs={'variable': var_name, 'members': len(files), 'method': method,
+                                                 'history': 'created with pcrglobwb_utils version {}'.format(pcrglobwb_utils.__version__)})
+
+    try:
+        if method == 'exact':
+            calc_block = partial(_calc_block_quantiles, files=files, var_name=var_name, lat_dim=lat_dim, lon_dim=lon_dim, quantiles=quantiles)
+            results = pool.imap(calc_block, blocks) if pool != None else map(calc_block, blocks)
+        else:
+            member_groups = [files[i::min_number_processes] for i in range(min_number_processes)]
+            results = (_calc_block_sketch(block, member_groups, var_name, lat_dim, lon_dim, quantiles, n_bins, pool) for block in blocks)
+
+        for (start, stop), values in zip(blocks, results):
+            if verbose: click.echo('VERBOSE -- writing quantiles of time steps {} to {}.'.format(start, stop))
+            pcrglobwb_utils.io.write_netcdf_block(nc, start, times[start:stop], dict(zip(var_names, values)))
+
+    finally:
+        nc.close()
+        if pool != None:
+            pool.close()
+            pool.join()
+
+    click.echo('INFO -- ensemble quantiles written to {}.'.format(out_file))
+
+def _get_member_coords(files: list, var_name: str) -> tuple:
+
+    # only the coordinates of the members are read here
+    with xr.open_dataset(files[0]) as ds:
+        lat_dim, lon_dim = pcrglobwb_utils.regrid.get_spatial_dims(ds[var_name])
+        times = ds['time'].values
+        lat, lon = ds[lat_dim].values, ds[lon_dim].values
+
+    for f in files[1:]:
+        with xr.open_dataset(f) as ds:
+            if (ds.sizes['time'] != len(times)) or (ds.sizes[lat_dim] != len(lat)) or (ds.sizes[lon_dim] != len(lon)):
+                raise ValueError('ERROR -- grid or time axis of member {} differs from member {}.'.format(f, files[0]))
+
+    return lat_dim, lon_dim, times, lat, lon
+
+def _read_member_block(f: str, var_name: str, start: int, stop: int, lat_dim: str, lon_dim: str) -> np.ndarray:
+
+    with xr.open_dataset(f) as ds:
+        return ds[var_name].isel(time=slice(start, stop)).transpose('time', lat_dim, lon_dim).values.astype(np.float64)
+
+def _calc_block_quantiles(block: tuple, files: list, var_name: str, lat_dim: str, lon_dim: str, quantiles: list) -> np.ndarray:
+
+    start, stop = block
+    values = np.stack([_read_member_block(f, var_name, start, stop, lat_dim, lon_dim) for f in files])
+
+    # cells without any valid member yield NaN
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        return np.nanquantile(values, quantiles, axis=0)
+
+def _calc_block_bounds(files: list, block: tuple, var_name: str, lat_dim: str, lon_dim: str) -> tuple:
+
+    start, stop = block
+    lower, upper = None, None
+    for f in files:
+        x = _read_member_block(f, var_name, start, stop, lat_dim, lon_dim)
+        lower = x if lower is None else np.fmin(lower, x)
+        upper = x if upper is None else np.fmax(upper, x)
+
+    return lower, upper
+
+def _fill_block_sketch(files: list, block: tuple, var_name: str, lat_dim: str, lon_dim: str, lower: np.ndarray, upper: np.ndarray, n_bins: int) -> quantile_sketch:
+
+    start, stop = block
+    sketch = quantile_sketch(lower, upper, n_bins=n_bins)
+    for f in files:
+        sketch.add(_read_member_block(f, var_name, start, stop, lat_dim, lon_dim))
+
+    return sketch
+
+def _calc_block_sketch(block: tuple, member_groups: list, var_name: str, lat_dim: str, lon_dim: str, quantiles: list, n_bins: int, pool=None) -> np.ndarray:
+
+    map_func = pool.map if pool != None else map
+
+    # first pass determines the range across all members, second pass fills sketches with identical bounds per group of members
+    bounds = list(map_func(partial(_calc_block_bounds, block=block, var_name=var_name, lat_dim=lat_dim, lon_dim=lon_dim), member_groups))
+    lower = np.fmin.reduce([b[0] for b in bounds])
+    upper = np.fmax.reduce([b[1] for b in bounds])
+
+    sketches = list(map_func(partial(_fill_block_sketch, block=block, var_name=var_name, lat_dim=lat_dim, lon_dim=lon_dim, lower=lower, upper=upper, n_bins=n_bins), member_groups))
+
+    sketch = sketches[0]
+    for other in sketches[1:]:
+        sketch.merge(other)
+
+    return sketch.quantile(quantiles)
@@ -8,15 +8,13 @@ import xarray as xr
 import numpy as np
 from shapely.geometry import Point
 import multiprocessing as mp
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+from functools import partial
 import click
 from datetime import datetime
 import spotpy
 import os
 
-def evaluate_polygons(ID, ply_id, extent_gdf, obs_data, sim_data, obs_var_name, sim_var_name, obs_idx, sim_idx, obs_masks, sim_masks, time_step, anomaly, verbose):
+def evaluate_polygons(ID, ply_id, extent_gdf, obs_data, sim_data, obs_var_name, sim_var_name, obs_idx, sim_idx, obs_masks, sim_masks, time_step, anomaly, verbose, cache_dir=None, run_key=None):
     """[summary]
 
     Args:
@@ -33,6 +31,8 @@ def evaluate_polygons(ID, ply_id, extent_gdf, obs_data, sim_data, obs_var_name,
         ll_pickled_masks
         anomaly ([type]): [description]
         verbose ([type]): [description]
+        cache_dir (str, optional): folder where zonal series are cached per polygon. Defaults to None.
+        run_key (str, optional): key of the settings of this run, needed when 'cache_dir' is used. Defaults to None.
 
     Returns:
         [type]: [description]
@@ -45,9 +45,21 @@ def evaluate_polygons(ID, ply_id, extent_gdf, obs_data, sim_data, obs_var_name,
     poly_geom = poly['geometry'].values
 
     gdd = {'ID': ID, 'geometry': poly_geom}
-    
+
+    # if a cache is used, zonal series of unchanged polygons are taken from there
+    if cache_dir != None:
+        cache_key = pcrglobwb_utils.cache.zonal_cache_key(poly_geom, run_key)
+        final_df = pcrglobwb_utils.cache.load_zonal_series(cache_dir, cache_key)
+    else:
+        final_df = None
+
+    # if zonal series was found in cache, there is no need to clip data
+    if final_df is not None:
+
+        if verbose: click.echo('VERBOSE -- using cached zonal series.')
+
     # if clip was done in preprocessing, just use these pickled masks
-    if isinstance(obs_masks, pd.DataFrame) and isinstance(sim_masks, pd.DataFrame):
+    elif isinstance(obs_masks, pd.DataFrame) and isinstance(sim_masks, pd.DataFrame):
         
         if verbose: click.echo('VERBOSE -- using preprocessed mask.')
 
@@ -68,6 +80,9 @@ def evaluate_polygons(ID, ply_id, extent_gdf, obs_data, sim_data, obs_var_name,
 
             final_df = pcrglobwb_utils.utils.concat_dataframes(obs_data_c, sim_data_c, obs_var_name, sim_var_name, obs_idx, sim_idx, time_step, anomaly, verbose)
 
+            if cache_dir != None:
+                pcrglobwb_utils.cache.store_zonal_series(cache_dir, cache_key, final_df)
+
         # if no data is found for poly ID (i.e. an empty df is returned) for observation data, then create empty dummy df for evaluation later
         elif obs_masks_ID.empty:
 
@@ -95,6 +110,9 @@ def evaluate_polygons(ID, ply_id, extent_gdf, obs_data, sim_data, obs_var_name,
 
         final_df = pcrglobwb_utils.utils.concat_dataframes(obs_data_c, sim_data_c, obs_var_name, sim_var_name, obs_idx, sim_idx, time_step, anomaly, verbose)
 
+        if cache_dir != None:
+            pcrglobwb_utils.cache.store_zonal_series(cache_dir, cache_key, final_df)
+
     metrics_dict = calc_metrics(final_df, obs_var_name, sim_var_name, verbose=verbose)
 
     gdd['R2'] = round(metrics_dict['R2'], 3)
@@ -104,16 +122,32 @@ def evaluate_polygons(ID, ply_id, extent_gdf, obs_data, sim_data, obs_var_name,
 
     return gdd
 
-def POLY(ply, sim, obs, out, ply_id, obs_var_name, sim_var_name, obs_masks=None, sim_masks=None, time_step='monthly', number_processes=None, anomaly=False, conversion_factor=1, coordinate_system='epsg:4326', obs_log=False, sim_log=False, plot=False, verbose=False):
+def POLY(ply, sim, obs, out, ply_id, obs_var_name, sim_var_name, obs_masks=None, sim_masks=None, time_step='monthly', number_processes=None, anomaly=False, conversion_factor=1, coordinate_system='epsg:4326', obs_log=False, sim_log=False, plot=False, verbose=False, regrid=False, weights_dir=None, cache_dir=None, anomaly_type='mean', resume=False, vector_format='geojson'):
 
     t_start = datetime.now()
 
     click.echo(click.style('INFO -- start.', fg='green'))
     click.echo(click.style('INFO -- pcrglobwb_utils version {}.'.format(pcrglobwb_utils.__version__), fg='green'))
 
-    # get full path name of output-dir and create it if not there yet
+    pcrglobwb_utils.io.check_output_format(vector_format=vector_format)
+
+    # get full path name of output-dir and create it if not there yet, when resuming a run it is kept
     out = os.path.abspath(out)
-    pcrglobwb_utils.utils.create_out_dir(out)
+    pcrglobwb_utils.utils.create_out_dir(out, clean=not resume)
+
+    # settings determining the zonal series are combined into one key
+    # together with the geometry, this key identifies cached zonal series of a polygon
+    run_key = pcrglobwb_utils.cache.settings_key(obs=pcrglobwb_utils.cache.file_fingerprint(obs), sim=pcrglobwb_utils.cache.file_fingerprint(sim),
+                                                 obs_var_name=obs_var_name, sim_var_name=sim_var_name, conversion_factor=conversion_factor,
+                                                 obs_log=obs_log, sim_log=sim_log, time_step=time_step, anomaly=anomaly, anomaly_type=anomaly_type, regrid=regrid,
+                                                 obs_masks=None if obs_masks == None else pcrglobwb_utils.cache.file_fingerprint(obs_masks),
+                                                 sim_masks=None if sim_masks == None else pcrglobwb_utils.cache.file_fingerprint(sim_masks))
+    if cache_dir != None:
+        cache_dir = pcrglobwb_utils.cache.check_cache_dir(cache_dir, out)
+
+    # together with the polygons, the same settings identify results of an interrupted run which can be resumed
+    manifest_key = pcrglobwb_utils.cache.settings_key(run_key=run_key, ply=pcrglobwb_utils.cache.file_fingerprint(ply), ply_id=ply_id)
+    previous = get_previous_results(out, manifest_key, resume=resume)
 
     # read nc-files with xarray to datasets
     click.echo(click.style('INFO -- reading observed variable {} from {}'.format(obs_var_name, obs), fg='red'))
@@ -127,13 +161,39 @@ def POLY(ply, sim, obs, out, ply_id, obs_var_name, sim_var_name, obs_masks=None,
     if verbose: click.echo('VERBOSE -- applying conversion factor {} to SIM data'.format(conversion_factor))
     sim_data = sim_ds[sim_var_name] * conversion_factor
 
+    # if specified, bring observations onto the grid of the simulations
+    # weights are computed only once per pair of grids if a weights directory is provided
+    # regridded observations are streamed to a file in the output folder and read lazily from there
+    if regrid:
+        click.echo('INFO -- regridding observations conservatively to grid of simulations.')
+        obs_data = pcrglobwb_utils.regrid.regrid_conservative(obs_data, sim_data, weights_dir=weights_dir, out_file=os.path.join(out, 'obs_regridded.nc'), verbose=verbose)
+
+    # log10 is applied before anomalies are computed, as anomalies are negative for half of the values
+    if obs_log:
+        if verbose: click.echo('VERBOSE -- applying log10 to OBS data')
+        obs_data = xr.ufuncs.log10(obs_data)
+    if sim_log:
+        if verbose: click.echo('VERBOSE -- applying log10 to SIM data')
+        sim_data = xr.ufuncs.log10(sim_data)
+
+    # with 'mean', anomalies are computed of the zonal series of simulations
+    # monthly and day-of-year anomalies are computed on the grid for both observations and simulations
+    # they are streamed to files in the output folder and read lazily from there
+    if anomaly and (anomaly_type != 'mean'):
+        click.echo('INFO -- computing {} anomalies of observations and simulations.'.format(anomaly_type))
+        obs_data = pcrglobwb_utils.climatology.calc_anomalies(obs_data, kind=anomaly_type, out_file=os.path.join(out, 'obs_anomalies_{}.nc'.format(anomaly_type)), verbose=verbose)
+        sim_data = pcrglobwb_utils.climatology.calc_anomalies(sim_data, kind=anomaly_type, out_file=os.path.join(out, 'sim_anomalies_{}.nc'.format(anomaly_type)), verbose=verbose)
+        zonal_anomaly = False
+    else:
+        zonal_anomaly = anomaly
+
     # retrieve time indices
     obs_idx = pd.to_datetime(pd.to_datetime(obs_ds.time.values).strftime('%Y-%m'))
     sim_idx = pd.to_datetime(pd.to_datetime(sim_ds.time.values).strftime('%Y-%m'))
 
     # read shapefile with one or more polygons
     click.echo(click.style('INFO -- reading polygons from {}'.format(os.path.abspath(ply)), fg='red'))
-    extent_gdf = gpd.read_file(ply, crs=coordinate_system, driver='GeoJSON')
+    extent_gdf = pcrglobwb_utils.io.read_vector(ply, crs=coordinate_system, columns=[ply_id])
 
     # align spatial settings of nc-files to be compatible with geosjon-file or ply-file
     if verbose: click.echo('VERBOSE -- setting spatial dimensions and crs of nc-files')
@@ -149,13 +209,6 @@ def POLY(ply, sim, obs, out, ply_id, obs_var_name, sim_var_name, obs_masks=None,
         sim_data.rio.set_spatial_dims(x_dim='longitude', y_dim='latitude', inplace=True)
     sim_data.rio.write_crs(coordinate_system, inplace=True)
 
-    if obs_log:
-        if verbose: click.echo('VERBOSE -- applying log10 to OBS data')
-        obs_data = xr.ufuncs.log10(obs_data)
-    if sim_log:
-        if verbose: click.echo('VERBOSE -- applying log10 to SIM data')
-        sim_data = xr.ufuncs.log10(sim_data)
-
     # if masks for observations is provided...
     if obs_masks != None:
         # ... check first if there is also one provided for simulations
@@ -180,9 +233,15 @@ def POLY(ply, sim, obs, out, ply_id, obs_var_name, sim_var_name, obs_masks=None,
         sim_masks = None
         poly_list = extent_gdf[ply_id].unique()
 
+    # polygons evaluated in a previous run are skipped
+    todo_list = [ID for ID in poly_list if str(ID) not in previous.keys()]
+
+    # scores are appended to this file during the run and it is rewritten in order of polygons at the end
+    scores_file = os.path.join(out, '{}_vs_{}.csv'.format(sim_var_name, obs_var_name))
+
     click.echo('INFO -- evaluating each polygon')
     # if a number of processes for parallelization are provided, set up multiprocessing and evalute polygons
-    if number_processes != None:
+    if (number_processes != None) and (len(todo_list) > 0):
 
         # derive actually available and sensible number of cores to use for application
         min_number_processes = min(number_processes, len(extent_gdf), mp.cpu_count())
@@ -195,17 +254,27 @@ def POLY(ply, sim, obs, out, ply_id, obs_var_name, sim_var_name, obs_masks=None,
         pool = mp.Pool(processes=min_number_processes)
 
         # apply function and convert returned data to list
-        results = [pool.apply_async(evaluate_polygons,args=(ID, ply_id, extent_gdf, obs_data, sim_data, obs_var_name, sim_var_name, obs_idx, sim_idx, obs_masks, sim_masks, time_step, anomaly, verbose)) for ID in poly_list]
-        outputList = [p.get() for p in results]
+        # apply function and collect results in order of completion
+        func = partial(evaluate_polygons, ply_id=ply_id, extent_gdf=extent_gdf, obs_data=obs_data, sim_data=sim_data, obs_var_name=obs_var_name, sim_var_name=sim_var_name,
+                       obs_idx=obs_idx, sim_idx=sim_idx, obs_masks=obs_masks, sim_masks=sim_masks, time_step=time_step, anomaly=zonal_anomaly, verbose=verbose,
+                       cache_dir=cache_dir, run_key=run_key)
+        results = pool.imap_unordered(partial(_call_with_kwargs, func=func), ({'ID': ID} for ID in todo_list))
+        outputList = collect_results(results, out, run_key=manifest_key, unit_key='ID', scores_file=scores_file, previous=previous, total=len(poly_list))
+
+        pool.close()
+        pool.join()
 
     # otherwise, evaluate polygons without multiprocessing
     else:
 
         # apply function and retrieve list
-        outputList = [evaluate_polygons(ID, ply_id, extent_gdf, obs_data, sim_data, obs_var_name, sim_var_name, obs_idx, sim_idx, obs_masks, sim_masks, time_step, anomaly, verbose) for ID in poly_list]
+        outputList = collect_results((evaluate_polygons(ID, ply_id, extent_gdf, obs_data, sim_data, obs_var_name, sim_var_name, obs_idx, sim_idx, obs_masks, sim_masks, time_step, zonal_anomaly, verbose, cache_dir, run_key) for ID in todo_list),
+                                     out, run_key=manifest_key, unit_key='ID', scores_file=scores_file, previous=previous, total=len(poly_list))
+
+    outputList = merge_results(poly_list, previous, outputList, unit_key='ID')
     
     # write output from list
-    pcrglobwb_utils.io.write_output_poly(outputList, sim_var_name, obs_var_name, out, plot)
+    pcrglobwb_utils.io.write_output_poly(outputList, sim_var_name, obs_var_name, out, plot, vector_format)
 
     t_end = datetime.now()
     delta_t  = t_end - t_start
@@ -213,23 +282,28 @@ def POLY(ply, sim, obs, out, ply_id, obs_var_name, sim_var_name, obs_masks=None,
     click.echo(click.style('INFO -- done.', fg='green'))
     click.echo(click.style('INFO -- run time: {}.'.format(delta_t), fg='green'))
 
-def evaluate_station(station: str, pcr_ds: xr.Dataset, out: str, mode: str, yaml_root: str, station_data_dict: dict, time_scale=None, sim_var_name='discharge', search_window=5, encoding='ISO-8859-1', verbose=False) -> dict:
+def evaluate_station(station: str, pcr_ds: xr.Dataset, out: str, mode: str, yaml_root: str, station_data_dict: dict, time_scale=None, sim_var_name='discharge', search_window=5, encoding='ISO-8859-1', verbose=False, signatures=False, output_format='csv', return_timeseries=False) -> dict:
     """Evaluates simulated discharge with observations for a given station.
     Returns a dictionary containing geo-spatial information of station plus metric values.
     Per station, evaluated timeseries plus metric scores are stored to a station-specific folder within 'out'.
+    For other output formats than 'csv', no files are written and the evaluated timeseries are returned with key 'timeseries' instead.
+    The evaluated timeseries can also be returned for 'csv', e.g. to compute signatures of many stations at once with 'collect_results'.
 
     Args:
         station (str): station name or other ID.
         pcr_ds (xr.Dataset): dataset containing simulated data.
         out (str): main output folder.
-        mode (str): whether data is read from a yaml-file ("yml") or collected from a folder ("fld")
+        mode (str): whether data is read from a yaml-file ("yml"), an observation store ("store"), or collected from a folder ("fld")
         yaml_root (str): location where yaml-file is located. only needed if 'mode' is "yml".
-        station_data_dict (dict): dictionary containing data of GRDC stations.
+        station_data_dict (dict): dictionary containing data of GRDC stations. Instead of values, a function reading properties and values may be given per station.
         time_scale (str, optional): time scale at which to perform evaluation, i.e., data is resampled if needed. Needs to comply with pandas conventions. Defaults to None.
         sim_var_name (str, optional): variable name in 'pcr_ds' containing data. Defaults to 'discharge'.
         search_window (int, optional): size of search window to apply around GRDC coords. Defaults to 5.
         encoding (str, optional): encoding of GRDC files. Defaults to 'ISO-8859-1'.
         verbose (bool, optional): whether or not to print more info. Defaults to False.
+        signatures (bool, optional): whether or not to compute hydrological signatures and their errors besides the metrics. Defaults to False.
+        output_format (str, optional): either 'csv' for files per station, or 'netcdf' or 'parquet' to write all stations to a single file later. Defaults to 'csv'.
+        return_timeseries (bool, optional): whether or not to return the evaluated timeseries with key 'timeseries' also for output format 'csv'. Defaults to False.
 
     Returns:
         dict: dictionary containing geo-spatial information of station plus metric values.
@@ -238,17 +312,28 @@ def evaluate_station(station: str, pcr_ds: xr.Dataset, out: str, mode: str, yaml
     # print some info
     click.echo(click.style('INFO -- validating station {}.'.format(station), fg='cyan'))
     
-    # create sub-directory per station
-    out_dir = out + '/{}'.format(station)
-    pcrglobwb_utils.utils.create_out_dir(out_dir)
+    # create sub-directory per station, unless all stations are written to a single file
+    if output_format == 'csv':
+        out_dir = out + '/{}'.format(station)
+        pcrglobwb_utils.utils.create_out_dir(out_dir)
+    else:
+        out_dir = None
 
     # if data is via yml-file, the data is read here as well as are station properties
     if mode == 'yml': 
         df_obs, station_props, apply_window_search = pcrglobwb_utils.obs_data.get_data_from_yml(yaml_root, station_data_dict, station, var_name=station, encoding=encoding, verbose=verbose)
 
-    # if data comes from folder, it was already read and can now be retrieved from dictionary
-    if mode == 'fld':
-        df_obs, station_props = station_data_dict[str(station)][1], station_data_dict[str(station)][0]
+    # if data comes from a folder or an observation store, it is retrieved from dictionary
+    if mode in ['fld', 'store']:
+        station_props, df_obs = station_data_dict[str(station)][0], station_data_dict[str(station)][1]
+        # in the dictionary, there is a function per station which reads the data only now
+        # properties in the dictionary may have been updated and take precedence over those read from file
+        if callable(df_obs):
+            props, df_obs = df_obs()
+            station_props = dict(props, **station_props)
+        # values are kept as compact arrays until they are evaluated
+        if isinstance(df_obs, pcrglobwb_utils.obs_data.station_series):
+            df_obs = df_obs.to_pandas()
         # apply window search by default when gathering data from a folder
         apply_window_search = True
 
@@ -256,7 +341,8 @@ def evaluate_station(station: str, pcr_ds: xr.Dataset, out: str, mode: str, yaml
     df_obs_mean = df_obs.dropna().mean()
 
     # prepare a geojson-file for output later (if specified)
-    gdd = {'station': station, 'geometry': Point(station_props['longitude'], station_props['latitude'])}
+    # geometries are only created when writing output
+    gdd = {'station': station, 'longitude': station_props['longitude'], 'latitude': station_props['latitude']}
 
     # get row/col combination for cell corresponding to lon/lat combination
     if verbose: click.echo('VERBOSE -- getting row/column combination from longitude/latitude.')
@@ -269,21 +355,182 @@ def evaluate_station(station: str, pcr_ds: xr.Dataset, out: str, mode: str, yaml
 
     if time_scale != None:
         click.echo('INFO -- Resampling timeseries to period {}'.format(time_scale))
-        df_obs = pcrglobwb_utils.time_funcs.resample_time(df_obs, resampling_period=time_scale).mean()
-        df_sim = pcrglobwb_utils.time_funcs.resample_time(df_sim, resampling_period=time_scale).mean()
+        df_obs = pcrglobwb_utils.time_funcs.resample_frame(df_obs, time_scale, stat_func='mean')
+        df_sim = pcrglobwb_utils.time_funcs.resample_frame(df_sim, time_scale, stat_func='mean')
 
     # compute scores
     click.echo('INFO -- computing scores.')
-    scores_dict = pcrglobwb_utils.sim_data.validate_timeseries(df_sim, df_obs, out_dir, station, suffix=time_scale, return_all_KGE=False)
+    if (output_format == 'csv') and (not return_timeseries):
+        scores_dict = pcrglobwb_utils.sim_data.validate_timeseries(df_sim, df_obs, out_dir, station, suffix=time_scale, return_all_KGE=False, signatures=signatures)
+    else:
+        scores_dict, gdd['timeseries'] = pcrglobwb_utils.sim_data.validate_timeseries(df_sim, df_obs, out_dir, station, suffix=time_scale, return_all_KGE=False, signatures=signatures, return_timeseries=True)
 
     for key in scores_dict.keys():
         gdd[key] = scores_dict[key]
 
     return gdd
 
-def GRDC(ncf: str, out: str, sim_var_name: str, data_loc: str, grdc_column=' Value', search_window=5, encoding='ISO-8859-1', selection_file=None, time_scale=None, number_processes=None, verbose=False) -> None:
+def collect_results(results, out: str, time_scale=None, output_format='csv', run_key=None, unit_key='station', scores_file=None, previous=None, total=None, signatures=False, batch_size=250) -> list:
+    """Collects the results of evaluated stations (or polygons) as they become available, e.g. in order of completion.
+    For output formats other than 'csv', the evaluated timeseries are passed to a single 'io.timeseries_writer' and removed from the results.
+    If a run key is provided, each result is appended to the manifest of the run, such that the run can be resumed later.
+    With output formats other than 'csv', this happens only once the timeseries of a result are written to file, such that a crash never loses timeseries of stations in the manifest.
+    If a scores file is provided, the scores of each result are appended to it immediately, such that intermediate results can be inspected during the run.
+    Only the scores are kept in memory, and the number of completed stations or polygons is printed after each result.
+    If specified, hydrological signatures are computed from the evaluated timeseries for batches of stations at once, which is much faster than one call per station.
+    Results are then recorded once their batch is complete.
+
+    Args:
+        results (iterable): dictionaries as returned by 'evaluate_station' or 'evaluate_polygons'.
+        out (str): main output folder.
+        time_scale (str, optional): time scale of evaluation, used as suffix of the output file. Defaults to None.
+        output_format (str, optional): either 'csv', 'netcdf', or 'parquet'. Defaults to 'csv'.
+        run_key (str, optional): key of the run settings used in the manifest. Defaults to None.
+        unit_key (str, optional): key of the station name or polygon ID in the results. Defaults to 'station'.
+        scores_file (str, optional): path to csv-file to which scores are appended. Defaults to None.
+        previous (dict, optional): results of a previous run, which are written to the scores file first. Defaults to None.
+        total (int, optional): total number of stations or polygons, including those of a previous run, used to report progress. Defaults to None.
+        signatures (bool, optional): whether or not to compute hydrological signatures, requires evaluated timeseries in the results. Defaults to False.
+        batch_size (int, optional): number of stations per batch of signatures. Defaults to 250.
+
+    Returns:
+        list: dictionaries containing geo-spatial information of stations plus metric values.
+    """
+
+    previous = previous if previous != None else dict()
+    unit_name = 'stations' if unit_key == 'station' else 'polygons'
+
+    if scores_file != None:
+        exclude = [unit_key, 'longitude', 'latitude'] if unit_key == 'station' else [unit_key, 'geometry']
+        scores = pcrglobwb_utils.io.scores_writer(scores_file, exclude=exclude + ['timeseries'])
+        for dd in previous.values():
+            scores.add(dd[unit_key], dd)
+
+    if output_format != 'csv':
+        extension = {'netcdf': 'nc', 'parquet': 'parquet'}[output_format]
+        suffix = '_{}'.format(time_scale) if time_scale != None else ''
+        # when resuming a run, timeseries of stations evaluated before are kept in their files and new ones are written to further parts
+        # files are only created once timeseries are written
+        writer = pcrglobwb_utils.io.timeseries_writer(os.path.join(out, 'evaluated_timeseries{}.{}'.format(suffix, extension)), output_format=output_format)
+
+    # results are only added to the manifest once their timeseries are written to file
+    pending = dict()
+
+    if signatures:
+        results = add_signature_scores(results, batch_size=batch_size)
+
+    outputList = list()
+    try:
+        for gdd in results:
+            timeseries = gdd.pop('timeseries', None)
+            if output_format != 'csv':
+                pending[str(gdd[unit_key])] = gdd
+                _append_manifest(out, run_key, [pending.pop(unit) for unit in writer.add(gdd[unit_key], timeseries)], unit_key)
+            elif signatures:
+                # per-station file with scores was written before signatures were available
+                suffix = '_{}'.format(time_scale) if time_scale != None else ''
+                scores_dict = {key: gdd[key] for key in gdd.keys() if key not in [unit_key, 'longitude', 'latitude']}
+                pd.DataFrame().from_dict(scores_dict, columns=[gdd[unit_key]], orient='index').to_csv(os.path.join(out, str(gdd[unit_key]), 'evaluation{}.csv'.format(suffix)))
+            if output_format == 'csv':
+                _append_manifest(out, run_key, [gdd], unit_key)
+            if scores_file != None:
+                scores.add(gdd[unit_key], gdd)
+            outputList.append(gdd)
+            if total != None:
+                click.echo('INFO -- {}/{} {} evaluated.'.format(len(previous) + len(outputList), total, unit_name))
+    finally:
+        if output_format != 'csv':
+            _append_manifest(out, run_key, [pending.pop(unit) for unit in writer.close()], unit_key)
+        if scores_file != None:
+            scores.close()
+
+    return outputList
+
+def _append_manifest(out: str, run_key: str, results: list, unit_key: str) -> None:
+
+    if run_key == None:
+        return
+
+    for gdd in results:
+        pcrglobwb_utils.cache.append_manifest(out, run_key, gdd[unit_key], gdd)
+
+def add_signature_scores(results, batch_size=250):
+    """Adds hydrological signatures and their errors to results of evaluated stations, computed for batches of stations at once.
+    Results are yielded once their batch is complete, such that only one batch of timeseries is kept in memory.
+
+    Args:
+        results (iterable): dictionaries as returned by 'evaluate_station' with evaluated timeseries under key 'timeseries'.
+        batch_size (int, optional): number of stations per batch. Defaults to 250.
+
+    Yields:
+        dict: result of a station including signature scores.
+    """
+
+    batch = list()
+    for gdd in results:
+        batch.append(gdd)
+        if len(batch) == batch_size:
+            yield from _add_batch_signature_scores(batch)
+            batch = list()
+
+    yield from _add_batch_signature_scores(batch)
+
+def _add_batch_signature_scores(batch: list) -> list:
+
+    if len(batch) == 0:
+        return batch
+
+    for gdd, scores in zip(batch, pcrglobwb_utils.signatures.calc_signature_scores_batch([gdd['timeseries'] for gdd in batch])):
+        gdd.update(scores)
+
+    return batch
+
+def _call_with_kwargs(kwargs: dict, func):
+
+    # tasks of multiprocessing.Pool.imap_unordered are single objects, here dictionaries of keyword arguments
+    return func(**kwargs)
+
+def get_previous_results(out: str, run_key: str, resume=False) -> dict:
+    """Retrieves results of stations or polygons evaluated in a previous, interrupted run with the same settings.
+
+    Args:
+        out (str): main output folder.
+        run_key (str): key of the run settings used in the manifest.
+        resume (bool, optional): whether or not the run is resumed. If False, no previous results are used. Defaults to False.
+
+    Returns:
+        dict: result per name of station or ID of polygon.
+    """
+
+    if not resume:
+        return dict()
+
+    previous = pcrglobwb_utils.cache.read_manifest(out, run_key)
+    click.echo('INFO -- resuming run, {} stations or polygons were already evaluated.'.format(len(previous)))
+
+    return previous
+
+def merge_results(units: list, previous: dict, outputList: list, unit_key='station') -> list:
+    """Merges results of a previous run with those of the current run, in order of the stations or polygons evaluated.
+
+    Args:
+        units (list): names of stations or IDs of polygons.
+        previous (dict): result per name of station or ID of polygon from a previous run.
+        outputList (list): results of the current run.
+        unit_key (str, optional): key of the station name or polygon ID in the results. Defaults to 'station'.
+
+    Returns:
+        list: results of all stations or polygons.
+    """
+
+    results = dict((str(dd[unit_key]), dd) for dd in outputList)
+    results.update(previous)
+
+    return [results[str(unit)] for unit in units if str(unit) in results.keys()]
+
+def GRDC(ncf: str, out: str, sim_var_name: str, data_loc: str, grdc_column=' Value', search_window=5, encoding='ISO-8859-1', selection_file=None, time_scale=None, number_processes=None, verbose=False, signatures=False, output_format='csv', resume=False, vector_format='geojson', catalog=None) -> None:
     """Top-level function to evaluate GRDC stations.
-    GRDC stations to be evaluated can either be defined in a yaml-file or, using a "batch mode", all GRDC files in a folder are used.
+    GRDC stations to be evaluated can either be defined in a yaml-file or, using a "batch mode", all GRDC files in a folder or in an observation store are used.
     In case of the latter, a selection can be made using a 'selection_file'.
     The actual evaluation takes place in function 'evaluate_stations' and can be executed in parallel or sequentially.
 
@@ -291,14 +538,19 @@ def GRDC(ncf: str, out: str, sim_var_name: str, data_loc: str, grdc_column=' Val
         ncf (str): netCDF file with simulated data.
         out (str): output directory where to store evaluation output.
         sim_var_name: str (str): variable name in 'ncf' to be considered.
-        data_loc (str): either yml-file specifying GRDC stations or a folder with GRDC files.
+        data_loc (str): either yml-file specifying GRDC stations, an observation store created with 'pre.pack_obs_store', or a folder with GRDC files.
         grdc_column (str, optional): column in GRDC file to use for data extraction. Defaults to ' Value'.
         search_window (int, optional): search window to be applied around GRDC coords.
         encoding (str, optional): encoding of GRDC files. Defaults to 'ISO-8859-1'.
-        selection_file (str, optional): file with selected GRDC stations. Only used when 'data_loc' is a folder. Defaults to None.
+        selection_file (str, optional): file with selected GRDC stations. Only used when 'data_loc' is a folder or an observation store. Defaults to None.
         time_scale (str, optional): time scale at which to perform the evaluation. For resampling purposes, the provided string needs to follow pandas conventions. Defaults to 'None'.
         number_processes (int, optional): number of cores to use when executing evaluation in parallel. Defaults to None.
         verbose (bool, optional): whether or not to print more info. Defaults to False.
+        signatures (bool, optional): whether or not to compute hydrological signatures (FDC slope, Q5, Q95, BFI) and their errors per station. Defaults to False.
+        output_format (str, optional): either 'csv' to write evaluated timeseries and scores per station to a separate folder, or 'netcdf' or 'parquet' to write timeseries of all stations to a single file. Defaults to 'csv'.
+        resume (bool, optional): whether or not to resume an interrupted run with identical settings in the same output folder. Stations listed in its manifest are not evaluated again. Defaults to False.
+        vector_format (str, optional): format of file with scores per location, either 'geojson', 'fgb' (FlatGeobuf), or 'parquet' (GeoParquet). Defaults to 'geojson'.
+        catalog (str, optional): path to SQLite-file containing a station catalog, see 'catalog.build_catalog'. If provided, station properties are taken from it instead of reading all headers. Only used when 'data_loc' is a folder. Defaults to None.
     """
 
     t_start = datetime.now()
@@ -306,9 +558,12 @@ def GRDC(ncf: str, out: str, sim_var_name: str, data_loc: str, grdc_column=' Val
     click.echo(click.style('INFO -- start.', fg='green'))
     click.echo(click.style('INFO -- pcrglobwb_utils version {}.'.format(pcrglobwb_utils.__version__), fg='green'))
 
-    # create main output dir
+    # missing dependencies of output formats are reported before any output is written or station is evaluated
+    pcrglobwb_utils.io.check_output_format(output_format, vector_format)
+
+    # create main output dir, when resuming a run it is kept
     out = os.path.abspath(out)
-    pcrglobwb_utils.utils.create_out_dir(out)
+    pcrglobwb_utils.utils.create_out_dir(out, clean=not resume)
 
     # now get started with simulated data
     ncf = os.path.abspath(ncf)
@@ -327,13 +582,23 @@ def GRDC(ncf: str, out: str, sim_var_name: str, data_loc: str, grdc_column=' Val
 
     if mode == 'fld':
         # note that 'data' is in fact a dictionary here with a list per station
-        # for each station, GRDC station properties and timeseries are stored
-        grdc_data_dict = pcrglobwb_utils.utils.glob_GRDC_folder(data_loc, col_name=grdc_column, verbose=verbose, encoding=encoding)
+        # for each station, GRDC station properties and a function to read the timeseries are stored
+        # only the headers are read here, the timeseries are read when evaluating the station
+        grdc_data_dict = pcrglobwb_utils.utils.index_GRDC_folder(data_loc, col_name=grdc_column, verbose=verbose, encoding=encoding, number_processes=number_processes, catalog=catalog)
+        yaml_root = None
+
+    if mode == 'store':
+        # only station properties are read here, values are read per station during evaluation
+        store = pcrglobwb_utils.obs_data.store_data(os.path.abspath(data_loc))
+        if store.source != 'GRDC':
+            raise ValueError('ERROR -- observation store {} contains {} data, not GRDC data.'.format(os.path.abspath(data_loc), store.source))
+        click.echo(click.style('INFO -- reading GRDC data from observation store {}.'.format(os.path.abspath(data_loc)), fg='red'))
+        grdc_data_dict = store.get_station_index()
         yaml_root = None
 
     # if specified, getting station numbers of selected stations
     # selected stations are listed in a separate 'selection_file'
-    if (selection_file != None) and (mode == 'fld'):
+    if (selection_file != None) and (mode in ['fld', 'store']):
         
         click.echo('INFO -- reading selected GRDC No.s from {}.'.format(os.path.abspath(selection_file)))
         selection_file = os.path.abspath(selection_file)
@@ -351,26 +616,47 @@ def GRDC(ncf: str, out: str, sim_var_name: str, data_loc: str, grdc_column=' Val
     if selected_stations == []:
         raise Warning('WARNING: no stations selected to be evaluated!')
 
+    # settings affecting the results are combined into one key, such that only results of runs with identical settings are resumed
+    run_key = pcrglobwb_utils.cache.settings_key(source='GRDC', ncf=pcrglobwb_utils.cache.file_fingerprint(ncf), data_loc=pcrglobwb_utils.cache.path_fingerprint(data_loc),
+                                                 selection_file=pcrglobwb_utils.cache.path_fingerprint(selection_file), column=grdc_column, sim_var_name=sim_var_name,
+                                                 search_window=search_window, time_scale=time_scale, signatures=signatures, output_format=output_format, encoding=encoding)
+
+    # stations evaluated in a previous run are skipped
+    previous = get_previous_results(out, run_key, resume=resume)
+    todo_stations = [station for station in selected_stations if str(station) not in previous.keys()]
+
+    # scores are appended to this file during the run and it is rewritten in order of stations at the end
+    scores_file = os.path.join(out, 'all_scores_{}.csv'.format(time_scale) if time_scale != None else 'all_scores.csv')
+
     # if specified, evaluate stations in parallel
-    if number_processes != None:
+    if (number_processes != None) and (len(todo_stations) > 0):
 
-        min_number_processes = min(number_processes, len(selected_stations), mp.cpu_count())
+        min_number_processes = min(number_processes, len(todo_stations), mp.cpu_count())
         if number_processes > min_number_processes: 
             click.echo('INFO -- number of CPUs reduced to {}'.format(min_number_processes))
         else:
             click.echo('INFO -- using {} CPUs for multiprocessing'.format(min_number_processes))
         pool = mp.Pool(processes=min_number_processes)
 
-        results = [pool.apply_async(evaluate_station,args=(station, pcr_ds, out, mode, yaml_root, grdc_data_dict, time_scale, sim_var_name, search_window, encoding, verbose)) for station in selected_stations]
+        # results are collected in order of completion, such that a slow station does not hold back others
+        func = partial(evaluate_station, pcr_ds=pcr_ds, out=out, mode=mode, yaml_root=yaml_root, time_scale=time_scale, sim_var_name=sim_var_name,
+                       search_window=search_window, encoding=encoding, verbose=verbose, output_format=output_format, return_timeseries=signatures)
+        tasks = ({'station': station, 'station_data_dict': {str(station): grdc_data_dict[str(station)]}} for station in todo_stations)
+        results = pool.imap_unordered(partial(_call_with_kwargs, func=func), tasks)
+
+        outputList = collect_results(results, out, time_scale, output_format, run_key=run_key, scores_file=scores_file, previous=previous, total=len(selected_stations), signatures=signatures)
 
-        outputList = [p.get() for p in results]
+        pool.close()
+        pool.join()
 
     # if not, analyse stations sequentially
     else:
 
-        outputList = [evaluate_station(station, pcr_ds, out, mode, yaml_root, grdc_data_dict, time_scale, sim_var_name, search_window, encoding, verbose) for station in selected_stations]
+        outputList = collect_results((evaluate_station(station, pcr_ds, out, mode, yaml_root, grdc_data_dict, time_scale=time_scale, sim_var_name=sim_var_name, search_window=search_window, encoding=encoding, verbose=verbose, output_format=output_format, return_timeseries=signatures) for station in todo_stations), out, time_scale, output_format, run_key=run_key, scores_file=scores_file, previous=previous, total=len(selected_stations), signatures=signatures)
 
-    pcrglobwb_utils.io.write_output(outputList, time_scale, out)
+    outputList = merge_results(selected_stations, previous, outputList)
+
+    pcrglobwb_utils.io.write_output(outputList, time_scale, out, vector_format)
 
     t_end = datetime.now()
     delta_t  = t_end - t_start
@@ -378,16 +664,19 @@ def GRDC(ncf: str, out: str, sim_var_name: str, data_loc: str, grdc_column=' Val
     click.echo(click.style('INFO -- done.', fg='green'))
     click.echo(click.style('INFO -- run time: {}.'.format(delta_t), fg='green'))
 
-def GSIM(ncf: str, out: str, sim_var_name: str, data_loc: str, gsim_column='"MEAN"', search_window=5, selection_file=None, time_scale='M', number_processes=None, verbose=False) -> None:
+def GSIM(ncf: str, out: str, sim_var_name: str, data_loc: str, gsim_column='"MEAN"', search_window=5, selection_file=None, time_scale='M', number_processes=None, update_props=False, verbose=False, signatures=False, output_format='csv', resume=False, vector_format='geojson', catalog=None) -> None:
 
     t_start = datetime.now()
 
     click.echo(click.style('INFO -- start.', fg='green'))
     click.echo(click.style('INFO -- pcrglobwb_utils version {}.'.format(pcrglobwb_utils.__version__), fg='green'))
 
-    # create main output dir
+    # missing dependencies of output formats are reported before any output is written or station is evaluated
+    pcrglobwb_utils.io.check_output_format(output_format, vector_format)
+
+    # create main output dir, when resuming a run it is kept
     out = os.path.abspath(out)
-    pcrglobwb_utils.utils.create_out_dir(out)
+    pcrglobwb_utils.utils.create_out_dir(out, clean=not resume)
 
     # now get started with simulated data
     ncf = os.path.abspath(ncf)
@@ -406,19 +695,34 @@ def GSIM(ncf: str, out: str, sim_var_name: str, data_loc: str, gsim_column='"MEA
 
     if mode == 'fld':
         # note that 'data' is in fact a dictionary here with a list per station
-        # for each station, GRDC station properties and timeseries are stored
-        gsim_data_dict = pcrglobwb_utils.utils.glob_GSIM_folder(data_loc, col_name=gsim_column, verbose=verbose)
+        # for each station, GSIM station properties and a function to read the timeseries are stored
+        # only the headers are read here, the timeseries are read when evaluating the station
+        gsim_data_dict = pcrglobwb_utils.utils.index_GSIM_folder(data_loc, col_name=gsim_column, verbose=verbose, number_processes=number_processes, catalog=catalog)
+        yaml_root = None
+
+    if mode == 'store':
+        # only station properties are read here, values are read per station during evaluation
+        store = pcrglobwb_utils.obs_data.store_data(os.path.abspath(data_loc))
+        if store.source != 'GSIM':
+            raise ValueError('ERROR -- observation store {} contains {} data, not GSIM data.'.format(os.path.abspath(data_loc), store.source))
+        click.echo(click.style('INFO -- reading GSIM data from observation store {}.'.format(os.path.abspath(data_loc)), fg='red'))
+        gsim_data_dict = store.get_station_index()
         yaml_root = None
 
     # if specified, getting station numbers of selected stations
     # selected stations are listed in a separate 'selection_file'
-    if (selection_file != None) and (mode == 'fld'):
+    if (selection_file != None) and (mode in ['fld', 'store']):
         
         click.echo('INFO -- reading selected GSIM No.s from {}.'.format(os.path.abspath(selection_file)))
         selection_file = os.path.abspath(selection_file)
 
-        df_select = pd.read_csv(selection_file, delimiter=',', index_col=0, low_memory=False)
-        selected_stations = df_select['gsim.no'].to_list()
+        # the file is read only once, for both selecting stations and updating their properties
+        df_select = pcrglobwb_utils.obs_data.read_gsim_override_table(selection_file)
+        selected_stations = df_select.index.to_list()
+
+        if update_props:
+            # properties are updated in place, such that only the selected stations need to be passed
+            pcrglobwb_utils.obs_data.apply_gsim_overrides(dict((station, gsim_data_dict[station]) for station in selected_stations if station in gsim_data_dict.keys()), df_select, fo=selection_file)
 
     # otherwise, all stations in folder are considered
     # when providing stations via a yml-file, they are always considered
@@ -429,26 +733,47 @@ def GSIM(ncf: str, out: str, sim_var_name: str, data_loc: str, gsim_column='"MEA
     if selected_stations == []:
         raise Warning('WARNING: no stations selected to be evaluated!')
 
+    # settings affecting the results are combined into one key, such that only results of runs with identical settings are resumed
+    run_key = pcrglobwb_utils.cache.settings_key(source='GSIM', ncf=pcrglobwb_utils.cache.file_fingerprint(ncf), data_loc=pcrglobwb_utils.cache.path_fingerprint(data_loc),
+                                                 selection_file=pcrglobwb_utils.cache.path_fingerprint(selection_file), column=gsim_column, sim_var_name=sim_var_name,
+                                                 search_window=search_window, time_scale=time_scale, signatures=signatures, output_format=output_format, update_props=update_props)
+
+    # stations evaluated in a previous run are skipped
+    previous = get_previous_results(out, run_key, resume=resume)
+    todo_stations = [station for station in selected_stations if str(station) not in previous.keys()]
+
+    # scores are appended to this file during the run and it is rewritten in order of stations at the end
+    scores_file = os.path.join(out, 'all_scores_{}.csv'.format(time_scale) if time_scale != None else 'all_scores.csv')
+
     # if specified, evaluate stations in parallel
-    if number_processes != None:
+    if (number_processes != None) and (len(todo_stations) > 0):
 
-        min_number_processes = min(number_processes, len(selected_stations), mp.cpu_count())
+        min_number_processes = min(number_processes, len(todo_stations), mp.cpu_count())
         if number_processes > min_number_processes: 
             click.echo('INFO -- number of CPUs reduced to {}'.format(min_number_processes))
         else:
             click.echo('INFO -- using {} CPUs for multiprocessing'.format(min_number_processes))
         pool = mp.Pool(processes=min_number_processes)
 
-        results = [pool.apply_async(evaluate_station,args=(station, pcr_ds, out, mode, yaml_root, gsim_data_dict, time_scale, sim_var_name, search_window, 'UTF-8',verbose)) for station in selected_stations]
+        # results are collected in order of completion, such that a slow station does not hold back others
+        func = partial(evaluate_station, pcr_ds=pcr_ds, out=out, mode=mode, yaml_root=yaml_root, time_scale=time_scale, sim_var_name=sim_var_name,
+                       search_window=search_window, encoding='UTF-8', verbose=verbose, output_format=output_format, return_timeseries=signatures)
+        tasks = ({'station': station, 'station_data_dict': {str(station): gsim_data_dict[str(station)]}} for station in todo_stations)
+        results = pool.imap_unordered(partial(_call_with_kwargs, func=func), tasks)
+
+        outputList = collect_results(results, out, time_scale, output_format, run_key=run_key, scores_file=scores_file, previous=previous, total=len(selected_stations), signatures=signatures)
 
-        outputList = [p.get() for p in results]
+        pool.close()
+        pool.join()
 
     # if not, analyse stations sequentially
     else:
 
-        outputList = [evaluate_station(station, pcr_ds, out, mode, yaml_root, gsim_data_dict, time_scale, sim_var_name, search_window, 'UTF-8', verbose) for station in selected_stations]
+        outputList = collect_results((evaluate_station(station, pcr_ds, out, mode, yaml_root, gsim_data_dict, time_scale=time_scale, sim_var_name=sim_var_name, search_window=search_window, encoding='UTF-8', verbose=verbose, output_format=output_format, return_timeseries=signatures) for station in todo_stations), out, time_scale, output_format, run_key=run_key, scores_file=scores_file, previous=previous, total=len(selected_stations), signatures=signatures)
 
-    pcrglobwb_utils.io.write_output(outputList, time_scale, out)
+    outputList = merge_results(selected_stations, previous, outputList)
+
+    pcrglobwb_utils.io.write_output(outputList, time_scale, out, vector_format)
 
     t_end = datetime.now()
     delta_t  = t_end - t_start
@@ -458,7 +783,7 @@ def GSIM(ncf: str, out: str, sim_var_name: str, data_loc: str, gsim_column='"MEA
 
     return
 
-def EXCEL(ncf, xls, loc, out, var_name, location_id, time_scale, plot, geojson, verbose):
+def EXCEL(ncf, xls, loc, out, var_name, location_id, time_scale, plot, geojson, verbose, number_processes=None):
 
     t_start = datetime.now()
 
@@ -559,20 +884,6 @@ def EXCEL(ncf, xls, loc, out, var_name, location_id, time_scale, plot, geojson,
                 geo_dict['RMSE'].append(scores['RMSE'][0])
                 geo_dict['RRMSE'].append(scores['RRMSE'][0])
 
-            # make as simple plot of time series if specified and save
-            if plot:
-                if verbose: click.echo('VERBOSE -- plotting.')
-                fig, ax = plt.subplots(1, 1, figsize=(20,10))
-                df_sim.plot(ax=ax, c='r')
-                station_obs.plot(ax=ax, c='k')
-                ax.set_ylabel('discharge [m3/s]')
-                ax.set_xlabel(None)
-                plt.legend()
-                if time_scale != None:
-                    plt.savefig(os.path.join(out_dir, 'timeseries_{}.png'.format(time_scale)), bbox_inches='tight', dpi=300)
-                else:
-                    plt.savefig(os.path.join(out_dir, 'timeseries.png'), bbox_inches='tight', dpi=300)
-
     click.echo('INFO -- saving all scores to {}.'.format(os.path.join(out, 'all_scores.csv')))
     if time_scale != None:
         all_scores.to_csv(os.path.join(out, 'all_scores_{}.csv'.format(time_scale)))
@@ -587,6 +898,10 @@ def EXCEL(ncf, xls, loc, out, var_name, location_id, time_scale, plot, geojson,
         else:
             gdf.to_file(os.path.join(os.path.abspath(out), 'scores_per_location.geojson'), driver='GeoJSON')
 
+    # timeseries are plotted from the saved results after all stations are evaluated
+    if plot:
+        pcrglobwb_utils.plotting.plot_output(out, number_processes=number_processes, verbose=verbose)
+
     t_end = datetime.now()
     delta_t  = t_end - t_start
 
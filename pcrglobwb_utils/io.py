@@ -1,14 +1,123 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import pcrglobwb_utils
 import geopandas as gpd
 import pandas as pd
-import matplotlib.pyplot as plt
+import numpy as np
+import netCDF4
 import click
 import pickle
+import csv
 import os
 
-def write_output(outputList, time_scale, out):    
+# supported vector formats with file extension and OGR driver
+VECTOR_FORMATS = {'geojson': ('.geojson', 'GeoJSON'),
+                  'fgb': ('.fgb', 'FlatGeobuf'),
+                  'parquet': ('.parquet', None)}
+
+def _has_arrow() -> bool:
+
+    try:
+        import pyarrow
+    except ImportError:
+        return False
+
+    return True
+
+def _has_pyogrio() -> bool:
+
+    try:
+        import pyogrio
+    except ImportError:
+        return False
+
+    return True
+
+def get_vector_format(fo: str) -> str:
+    """Determines the vector format of a file from its extension.
+    Files with extensions not listed in 'VECTOR_FORMATS', e.g. shp-files, are treated as 'geojson', i.e. read with OGR.
+
+    Args:
+        fo (str): path to file.
+
+    Returns:
+        str: vector format, one of the keys of 'VECTOR_FORMATS'.
+    """
+
+    ext = os.path.splitext(fo)[1].lower()
+
+    for vector_format, (format_ext, driver) in VECTOR_FORMATS.items():
+        if ext == format_ext:
+            return vector_format
+
+    return 'geojson'
+
+def read_vector(fo: str, crs=None, columns=None) -> gpd.GeoDataFrame:
+    """Reads a vector file, with the format determined from the file extension.
+    GeoParquet is read columnar with pyarrow, all other formats with pyogrio, which reads via Arrow if pyarrow is installed.
+    Reading only the columns needed (plus geometry) avoids parsing all attributes of large files.
+    If pyogrio is not installed, the default engine of geopandas is used and columns are selected after reading.
+
+    Args:
+        fo (str): path to file, e.g. GeoJSON, FlatGeobuf, GeoParquet, or shp-file.
+        crs (str, optional): coordinate system assigned if the file does not define one. Defaults to None.
+        columns (list, optional): attribute columns to be read. Defaults to None, i.e. all columns.
+
+    Returns:
+        gpd.GeoDataFrame: geodataframe read from file.
+    """
+
+    if get_vector_format(fo) == 'parquet':
+        if not _has_arrow():
+            raise ImportError('ERROR -- reading GeoParquet requires pyarrow, please install it, e.g. with "pip install pcrglobwb-utils[parquet]".')
+        gdf = gpd.read_parquet(fo, columns=None if columns == None else list(columns) + ['geometry'])
+    elif _has_pyogrio():
+        gdf = gpd.read_file(fo, engine='pyogrio', columns=columns, use_arrow=_has_arrow())
+    else:
+        gdf = gpd.read_file(fo)
+        if columns != None:
+            gdf = gdf[list(columns) + [gdf.geometry.name]]
+
+    if (gdf.crs == None) and (crs != None):
+        gdf = gdf.set_crs(crs)
+
+    return gdf
+
+def write_vector(gdf: gpd.GeoDataFrame, fo: str, vector_format='geojson') -> str:
+    """Writes a geodataframe to file in one of the formats of 'VECTOR_FORMATS'.
+    The file extension is set according to the format.
+    GeoParquet is written columnar with pyarrow, GeoJSON and FlatGeobuf with pyogrio, which writes via Arrow if pyarrow is installed.
+    FlatGeobuf is written with a spatial index, such that features are not necessarily stored in the order of the geodataframe.
+    If pyogrio is not installed, the default engine of geopandas is used.
+
+    Args:
+        gdf (gpd.GeoDataFrame): geodataframe to be written.
+        fo (str): path to file, without or with extension.
+        vector_format (str, optional): 'geojson', 'fgb' (FlatGeobuf), or 'parquet' (GeoParquet). Defaults to 'geojson'.
+
+    Returns:
+        str: path to file written.
+    """
+
+    if vector_format not in VECTOR_FORMATS.keys():
+        raise ValueError('ERROR -- vector format {} not supported, choose from {}.'.format(vector_format, list(VECTOR_FORMATS.keys())))
+
+    ext, driver = VECTOR_FORMATS[vector_format]
+    fo = os.path.splitext(fo)[0] + ext
+
+    if vector_format == 'parquet':
+        if not _has_arrow():
+            raise ImportError('ERROR -- writing GeoParquet requires pyarrow, please install it, e.g. with "pip install pcrglobwb-utils[parquet]".')
+        gdf.to_parquet(fo, index=False)
+    elif _has_pyogrio():
+        gdf.to_file(fo, driver=driver, engine='pyogrio', use_arrow=_has_arrow())
+    else:
+        gdf.to_file(fo, driver=driver)
+
+    return fo
+
+def write_output(outputList, time_scale, out, vector_format='geojson'):    
 
     all_scores, geo_dict = create_output(outputList)
 
@@ -21,16 +130,16 @@ def write_output(outputList, time_scale, out):
         click.echo('INFO -- saving all scores to {}.'.format(os.path.join(out, 'all_scores.csv')))
         all_scores.to_csv(os.path.join(out, 'all_scores.csv'))
 
-    # write geojson-file to disc
+    # write vector file to disc
     gdf = gpd.GeoDataFrame(geo_dict, crs="EPSG:4326")
     if time_scale != None:
-        click.echo('INFO -- saving spatial information to {}'.format(os.path.join(os.path.abspath(out), 'scores_per_location_{}.geojson'.format(time_scale))))
-        gdf.to_file(os.path.join(os.path.abspath(out), 'scores_per_location_{}.geojson'.format(time_scale)), driver='GeoJSON')
+        fo = os.path.join(os.path.abspath(out), 'scores_per_location_{}'.format(time_scale))
     else:
-        click.echo('INFO -- saving spatial information to {}'.format(os.path.join(os.path.abspath(out), 'scores_per_location.geojson')))
-        gdf.to_file(os.path.join(os.path.abspath(out), 'scores_per_location.geojson'), driver='GeoJSON')
+        fo = os.path.join(os.path.abspath(out), 'scores_per_location')
+    fo = write_vector(gdf, fo, vector_format)
+    click.echo('INFO -- saved spatial information to {}'.format(fo))
 
-def write_output_poly(outputList, sim_var_name, obs_var_name, out, plot):
+def write_output_poly(outputList, sim_var_name, obs_var_name, out, plot, vector_format='geojson'):
     """[summary]
 
     Args:
@@ -39,6 +148,7 @@ def write_output_poly(outputList, sim_var_name, obs_var_name, out, plot):
         obs_var_name ([type]): [description]
         out ([type]): [description]
         plot ([type]): [description]
+        vector_format (str, optional): format of file with polygons and scores, see 'write_vector'. Defaults to 'geojson'.
     """    
 
     all_scores, geo_dict = create_output_poly(outputList)
@@ -48,83 +158,132 @@ def write_output_poly(outputList, sim_var_name, obs_var_name, out, plot):
 
     # assign evaluation metrics per polygon to geometry and store to file
     gdf = gpd.GeoDataFrame(geo_dict, crs="EPSG:4326")
-    click.echo('INFO -- storing polygons to {}.'.format(os.path.join(out, 'output_polygons.geojson')))
-    gdf.to_file(os.path.join(out, '{}_vs_{}.geojson'.format(sim_var_name, obs_var_name)), driver='GeoJSON')
+    fo = write_vector(gdf, os.path.join(out, '{}_vs_{}'.format(sim_var_name, obs_var_name)), vector_format)
+    click.echo('INFO -- stored polygons to {}.'.format(fo))
 
-    # plot if specified
+    # plot if specified, the map is rendered from the file just written
     if plot:
-        fig, axes = plt.subplots(2, 2, figsize=(10, 10), sharex=True, sharey=True)
-        gdf.plot(ax=axes[0,0], column='R2', legend=True)
-        axes[0,0].set_title('R2')
-        gdf.plot(ax=axes[0,1], column='MSE', legend=True)
-        axes[0,1].set_title('MSE')
-        gdf.plot(ax=axes[1,0], column='RMSE', legend=True)
-        axes[1,0].set_title('RMSE')
-        gdf.plot(ax=axes[1,1], column='RRMSE', legend=True)
-        axes[1,1].set_title('RRMSE')
-        plt.savefig(os.path.join(out, '{}_vs_{}.png'.format(sim_var_name, obs_var_name)), dpi=300, bbox_inches='tight')
+        fo = pcrglobwb_utils.plotting.plot_polygon_scores(fo)
+        click.echo('INFO -- saved map of scores to {}.'.format(fo))
+
+def collect_columns(outputList: list, exclude=[]) -> dict:
+    """Collects the values of a list of result dictionaries column-wise.
+    Per key found in any of the dictionaries, an array with one entry per dictionary is allocated and filled.
+    Entries of dictionaries missing a key remain NaN.
+
+    Args:
+        outputList (list): list of dictionaries, e.g. one per station or polygon.
+        exclude (list, optional): keys not to be collected. Defaults to [].
+
+    Returns:
+        dict: array per key, in order of first appearance of the keys.
+    """
+
+    keys = list(dict.fromkeys(key for dd in outputList for key in dd.keys() if key not in exclude))
+
+    columns = {key: np.full(len(outputList), np.nan, dtype=object) for key in keys}
+
+    for i, dd in enumerate(outputList):
+        for key in keys:
+            if key in dd.keys():
+                columns[key][i] = dd[key]
+
+    return columns
 
 def create_output(outputList):
-    """[summary]
+    """Collects results of all stations into a table of scores and a dictionary for a GeoDataFrame.
+    Both are built at once from column arrays, i.e. in linear time with the number of stations.
 
     Args:
-        outputList ([type]): [description]
+        outputList (list): list of dictionaries with station name, longitude, latitude, and scores per station.
 
     Returns:
-        [type]: [description]
+        tuple[pd.DataFrame, dict]: scores with one column per station; station names, main scores, and point geometries.
     """    
 
-    geo_dict = {'station': list(), 'KGE': list(), 'R2': list(), 'NSE': list(), 'MSE': list(), 'RMSE': list(), 'RRMSE': list(), 'geometry': list()}
+    columns = collect_columns(outputList)
 
-    all_scores = pd.DataFrame()
+    stations = columns['station'] if len(outputList) > 0 else []
+    scores = dict((key, values) for key, values in columns.items() if key not in ['station', 'longitude', 'latitude'])
 
-    for dd in outputList:
+    all_scores = pd.DataFrame(scores, index=stations).T
 
-        geo_dict['station'].append(dd['station'])
-        geo_dict['KGE'].append(dd['KGE'])
-        geo_dict['R2'].append(dd['R2'])
-        geo_dict['NSE'].append(dd['NSE'])
-        geo_dict['MSE'].append(dd['MSE'])
-        geo_dict['RMSE'].append(dd['RMSE'])
-        geo_dict['RRMSE'].append(dd['RRMSE'])
-        geo_dict['geometry'].append(dd['geometry'])
+    geo_dict = {'station': list(stations)}
+    for key in ['KGE', 'R2', 'NSE', 'MSE', 'RMSE', 'RRMSE']:
+        geo_dict[key] = list(columns[key]) if key in columns.keys() else list()
 
-        df = pd.DataFrame.from_dict(dd, orient='index', columns=[dd['station']]).drop(['station', 'geometry'])
-
-        all_scores = pd.concat([all_scores, df], axis=1)
+    # station locations are passed as coordinates and converted to points at once
+    if len(outputList) > 0:
+        geo_dict['geometry'] = gpd.points_from_xy(columns['longitude'].astype(float), columns['latitude'].astype(float))
+    else:
+        geo_dict['geometry'] = list()
 
     return all_scores, geo_dict
 
 def create_output_poly(outputList):
-    """[summary]
+    """Collects results of all polygons into a table of scores and a dictionary for a GeoDataFrame.
+    Both are built at once from column arrays, i.e. in linear time with the number of polygons.
 
     Args:
-        outputList ([type]): [description]
+        outputList (list): list of dictionaries with ID, geometry, and scores per polygon.
 
     Returns:
-        [type]: [description]
+        tuple[pd.DataFrame, dict]: scores with one row per polygon; polygon IDs, scores, and geometries.
     """    
 
-    geo_dict = {'ID': list(), 'R2': list(), 'MSE': list(), 'RMSE': list(), 'RRMSE': list(), 'geometry': list()}
+    columns = collect_columns(outputList)
 
-    all_scores = pd.DataFrame()
+    ids = columns['ID'] if len(outputList) > 0 else []
+    scores = dict((key, values) for key, values in columns.items() if key not in ['ID', 'geometry'])
 
-    for dd in outputList:
+    all_scores = pd.DataFrame(scores, index=ids)
 
-        geo_dict['ID'].append(dd['ID'])
-        geo_dict['R2'].append(dd['R2'])
-        geo_dict['MSE'].append(dd['MSE'])
-        geo_dict['RMSE'].append(dd['RMSE'])
-        geo_dict['RRMSE'].append(dd['RRMSE'])
-        geo_dict['geometry'].append(dd['geometry'][0])
+    geo_dict = {'ID': list(ids)}
+    for key in ['R2', 'MSE', 'RMSE', 'RRMSE']:
+        geo_dict[key] = list(columns[key]) if key in columns.keys() else list()
+    geo_dict['geometry'] = [dd['geometry'][0] for dd in outputList]
 
-        df = pd.DataFrame.from_dict(dd, orient='index', columns=[dd['ID']]).drop(['ID', 'geometry'])
+    return all_scores, geo_dict
 
-        all_scores = pd.concat([all_scores, df], axis=1)
+class scores_writer():
+    """Appends scores of stations or polygons to a csv-file as soon as they are available.
+    Columns are determined by the first scores added, with the name of the station or polygon as first column.
 
-    all_scores = all_scores.T
+    Args:
+        out_file (str): path to csv-file.
+        exclude (list, optional): keys of results not written as column. Defaults to [].
+    """
 
-    return all_scores, geo_dict
+    def __init__(self, out_file: str, exclude=[]):
+        """Creates the csv-file.
+        """
+
+        self.out_file = os.path.abspath(out_file)
+        self.exclude = exclude
+        self.columns = None
+        self.f = open(self.out_file, 'w', newline='')
+        self.writer = csv.writer(self.f)
+
+    def add(self, unit: str, dd: dict):
+        """Appends the scores of a station or polygon and flushes them to disk.
+
+        Args:
+            unit (str): name of station or ID of polygon.
+            dd (dict): result containing the scores.
+        """
+
+        if self.columns == None:
+            self.columns = [key for key in dd.keys() if key not in self.exclude]
+            self.writer.writerow([''] + self.columns)
+
+        self.writer.writerow([unit] + [dd.get(key, '') for key in self.columns])
+        self.f.flush()
+
+    def close(self):
+        """Closes the csv-file.
+        """
+
+        self.f.close()
 
 def unpickle_object(loc):
     """
@@ -140,4 +299,287 @@ def unpickle_object(loc):
     with open(loc, "rb") as f:
         out = pickle.load(f)
 
-    return out
\ No newline at end of file
+    return out
+
+def create_netcdf(out_file: str, lat: np.ndarray, lon: np.ndarray, var_names: list, lat_dim='lat', lon_dim='lon', dtype='f4', attrs=None) -> netCDF4.Dataset:
+    """Creates a netCDF-file with an unlimited time dimension to which gridded data can be written block by block with 'write_netcdf_block'.
+    The returned dataset needs to be closed after the last block was written.
+
+    Args:
+        out_file (str): path to netCDF-file.
+        lat (np.ndarray): latitude of cell centers.
+        lon (np.ndarray): longitude of cell centers.
+        var_names (list): names of variables with dimensions (time, lat, lon).
+        lat_dim (str, optional): name of latitude dimension. Defaults to 'lat'.
+        lon_dim (str, optional): name of longitude dimension. Defaults to 'lon'.
+        dtype (str, optional): data type of variables. Defaults to 'f4'.
+        attrs (dict, optional): global attributes. Defaults to None.
+
+    Returns:
+        netCDF4.Dataset: opened netCDF-file.
+    """
+
+    nc = netCDF4.Dataset(out_file, 'w')
+
+    nc.createDimension('time', None)
+    nc.createDimension(lat_dim, len(lat))
+    nc.createDimension(lon_dim, len(lon))
+
+    time = nc.createVariable('time', 'f8', ('time',))
+    time.units = 'days since 1900-01-01'
+    time.calendar = 'standard'
+    nc.createVariable(lat_dim, 'f8', (lat_dim,))[:] = lat
+    nc.createVariable(lon_dim, 'f8', (lon_dim,))[:] = lon
+
+    for var_name in var_names:
+        nc.createVariable(var_name, dtype, ('time', lat_dim, lon_dim), zlib=True, complevel=1, fill_value=np.nan,
+                          chunksizes=(1, len(lat), len(lon)))
+
+    if attrs != None:
+        nc.setncatts(attrs)
+
+    return nc
+
+def write_netcdf_block(nc: netCDF4.Dataset, start: int, times: np.ndarray, blocks: dict) -> None:
+    """Writes a block of time steps to a netCDF-file created with 'create_netcdf'.
+
+    Args:
+        nc (netCDF4.Dataset): opened netCDF-file.
+        start (int): index of first time step of block.
+        times (np.ndarray): dates of time steps in block.
+        blocks (dict): arrays of shape (time, lat, lon) per variable name.
+    """
+
+    days = (np.asarray(times, dtype='datetime64[s]') - np.datetime64('1900-01-01', 's')).astype(np.float64) / 86400.
+
+    nc['time'][start:start + len(days)] = days
+    for var_name, block in blocks.items():
+        nc[var_name][start:start + len(days)] = block
+
+def check_output_format(output_format='csv', vector_format='geojson') -> None:
+    """Checks the output formats of an evaluation, such that missing dependencies are reported before any station is evaluated.
+
+    Args:
+        output_format (str, optional): format of evaluated timeseries, either 'csv', 'netcdf', or 'parquet'. Defaults to 'csv'.
+        vector_format (str, optional): format of file with scores per location, one of the keys of 'VECTOR_FORMATS'. Defaults to 'geojson'.
+    """
+
+    if output_format not in ['csv', 'netcdf', 'parquet']:
+        raise ValueError('ERROR -- output format must be either "csv", "netcdf", or "parquet", not {}.'.format(output_format))
+
+    if vector_format not in VECTOR_FORMATS.keys():
+        raise ValueError('ERROR -- vector format {} not supported, choose from {}.'.format(vector_format, list(VECTOR_FORMATS.keys())))
+
+    if ((output_format == 'parquet') or (vector_format == 'parquet')) and (not _has_arrow()):
+        raise ImportError('ERROR -- writing parquet-files requires pyarrow, please install it, e.g. with "pip install pcrglobwb-utils[parquet]", or use another output format.')
+
+class timeseries_writer():
+    """Writes evaluated timeseries of many stations into a few files instead of one csv-file per station.
+    Timeseries are buffered and written in batches by a single writer, i.e. typically the main process collecting results of all workers.
+    Each batch is written to a separate file, which is complete once 'flush' returns, such that a crash does not affect batches written before.
+    The first batch is written to 'out_file', the following ones to parts next to it, e.g. 'evaluated_timeseries_part2.nc'.
+    Existing files are never overwritten, such that a resumed run continues with the next free part.
+    Two formats are supported:
+
+    * 'netcdf': a netCDF-file following the CF conventions for a contiguous ragged array of timeseries, with the number of time steps per station in 'row_size'.
+    * 'parquet': a Parquet-file in long format with columns 'station', 'time', 'OBS', and 'SIM'. Requires pyarrow.
+
+    Args:
+        out_file (str): path to first output file.
+        output_format (str, optional): either 'netcdf' or 'parquet'. Defaults to 'netcdf'.
+        batch_size (int, optional): number of stations buffered before writing. Defaults to 100.
+    """
+
+    def __init__(self, out_file: str, output_format='netcdf', batch_size=100):
+        """Initiates the writer. Files are only created when timeseries are written.
+        """
+
+        if output_format not in ['netcdf', 'parquet']:
+            raise ValueError('ERROR -- output format must be either "netcdf" or "parquet", not {}.'.format(output_format))
+        check_output_format(output_format)
+
+        self.out_file = os.path.abspath(out_file)
+        self.output_format = output_format
+        self.batch_size = batch_size
+        self.buffer = list()
+        self.out_files = list()
+        self.n_stations = 0
+        self.n_obs = 0
+
+    def add(self, station: str, df: pd.DataFrame) -> list:
+        """Adds the evaluated timeseries of a station. The first column is stored as 'OBS', the second as 'SIM'.
+
+        Args:
+            station (str): station name or other ID.
+            df (pd.DataFrame): dataframe with observed and simulated timeseries and datetime index.
+
+        Returns:
+            list: stations written to file by this call, i.e. an empty list unless the buffer was full.
+        """
+
+        self.buffer.append((str(station), df))
+
+        if len(self.buffer) >= self.batch_size:
+            return self.flush()
+
+        return list()
+
+    def flush(self) -> list:
+        """Writes all buffered timeseries to a new file.
+        The file is written under a temporary name first, such that it only appears once it is complete.
+
+        Returns:
+            list: stations written to file.
+        """
+
+        if len(self.buffer) == 0:
+            return list()
+
+        stations = [station for station, df in self.buffer]
+        row_size = np.array([len(df) for station, df in self.buffer], dtype=np.int64)
+        times = np.concatenate([df.index.values.astype('datetime64[s]') for station, df in self.buffer])
+        obs = np.concatenate([df.iloc[:, 0].values.astype(np.float64) for station, df in self.buffer])
+        sim = np.concatenate([df.iloc[:, 1].values.astype(np.float64) for station, df in self.buffer])
+
+        out_file = self._get_part_file()
+        tmp = os.path.join(os.path.dirname(out_file), '.{}.{}.tmp'.format(os.path.basename(out_file), os.getpid()))
+
+        if self.output_format == 'netcdf':
+            with netCDF4.Dataset(tmp, 'w') as nc:
+                nc.createDimension('station', len(stations))
+                nc.createDimension('obs', len(times))
+                nc.createVariable('station_name', str, ('station',)).cf_role = 'timeseries_id'
+                nc.createVariable('row_size', 'i8', ('station',)).sample_dimension = 'obs'
+                time = nc.createVariable('time', 'f8', ('obs',))
+                time.units = 'days since 1900-01-01'
+                time.calendar = 'standard'
+                for var_name in ['OBS', 'SIM']:
+                    nc.createVariable(var_name, 'f8', ('obs',), zlib=True, complevel=1, fill_value=np.nan)
+                nc.setncatts({'Conventions': 'CF-1.8', 'featureType': 'timeSeries'})
+                nc['station_name'][:] = np.array(stations, dtype=object)
+                nc['row_size'][:] = row_size
+                nc['time'][:] = (times - np.datetime64('1900-01-01', 's')).astype(np.float64) / 86400.
+                nc['OBS'][:] = obs
+                nc['SIM'][:] = sim
+
+        else:
+            import pyarrow
+            import pyarrow.parquet
+            table = pyarrow.table({'station': np.repeat(np.array(stations, dtype=object), row_size), 'time': times, 'OBS': obs, 'SIM': sim})
+            pyarrow.parquet.write_table(table, tmp)
+
+        os.replace(tmp, out_file)
+        click.echo('INFO -- timeseries of {} stations written to {}.'.format(len(stations), out_file))
+
+        self.out_files.append(out_file)
+        self.n_stations += len(stations)
+        self.n_obs += len(times)
+        self.buffer = list()
+
+        return stations
+
+    def close(self) -> list:
+        """Writes remaining buffered timeseries.
+
+        Returns:
+            list: stations written to file by this call.
+        """
+
+        stations = self.flush()
+
+        if self.n_stations > 0:
+            click.echo('INFO -- {} time steps of {} stations written to {} files.'.format(self.n_obs, self.n_stations, len(self.out_files)))
+
+        return stations
+
+    def _get_part_file(self) -> str:
+
+        root, ext = os.path.splitext(self.out_file)
+
+        out_file, part = self.out_file, 1
+        while os.path.isfile(out_file):
+            part += 1
+            out_file = '{}_part{}{}'.format(root, part, ext)
+
+        return out_file
+
+def read_timeseries_file(fo: str) -> pd.DataFrame:
+    """Reads a file written with 'timeseries_writer' into a dataframe in long format.
+
+    Args:
+        fo (str): path to netCDF-file or Parquet-file.
+
+    Returns:
+        pd.DataFrame: dataframe with columns 'station', 'time', 'OBS', and 'SIM'.
+    """
+
+    if os.path.splitext(fo)[-1] == '.parquet':
+        return pd.read_parquet(fo)
+
+    with netCDF4.Dataset(fo) as nc:
+        stations = nc['station_name'][:]
+        row_size = nc['row_size'][:]
+        times = _days_to_datetime(nc['time'][:])
+        df = pd.DataFrame({'station': np.repeat(stations, row_size), 'time': times, 'OBS': nc['OBS'][:].filled(np.nan), 'SIM': nc['SIM'][:].filled(np.nan)})
+
+    return df
+
+def index_timeseries_file(fo: str) -> list:
+    """Lists the stations in a file written with 'timeseries_writer', without reading their timeseries.
+    For netCDF-files, also the offset and number of time steps per station in the ragged array are returned.
+
+    Args:
+        fo (str): path to netCDF-file or Parquet-file.
+
+    Returns:
+        list: tuples of station, offset, and number of time steps, with offset and number of time steps being None for Parquet-files.
+    """
+
+    if os.path.splitext(fo)[-1] == '.parquet':
+        stations = pd.read_parquet(fo, columns=['station'])['station'].unique()
+        return [(str(station), None, None) for station in stations]
+
+    with netCDF4.Dataset(fo) as nc:
+        stations = nc['station_name'][:]
+        row_size = np.asarray(nc['row_size'][:], dtype=np.int64)
+
+    row_offset = np.concatenate([[0], np.cumsum(row_size)[:-1]])
+
+    return [(str(station), int(offset), int(count)) for station, offset, count in zip(stations, row_offset, row_size)]
+
+def read_station_timeseries(fo: str, station: str, offset=None, count=None) -> pd.DataFrame:
+    """Reads the evaluated timeseries of a single station from a file written with 'timeseries_writer'.
+    From netCDF-files, only the slice of the station in the ragged array is read, given its offset and number of time steps from 'index_timeseries_file'.
+    From Parquet-files, only the rows of the station are read.
+
+    Args:
+        fo (str): path to netCDF-file or Parquet-file.
+        station (str): station name or other ID.
+        offset (int, optional): index of first time step of station in netCDF-file. Defaults to None.
+        count (int, optional): number of time steps of station in netCDF-file. Defaults to None.
+
+    Returns:
+        pd.DataFrame: dataframe with time as index and columns 'OBS' and 'SIM'.
+    """
+
+    if os.path.splitext(fo)[-1] == '.parquet':
+        df = pd.read_parquet(fo, columns=['time', 'OBS', 'SIM'], filters=[('station', '==', str(station))])
+        return df.set_index('time')
+
+    if (offset == None) or (count == None):
+        for station_file, offset, count in index_timeseries_file(fo):
+            if station_file == str(station):
+                break
+        else:
+            raise ValueError('ERROR -- station {} not found in {}.'.format(station, os.path.abspath(fo)))
+
+    with netCDF4.Dataset(fo) as nc:
+        obs_slice = slice(int(offset), int(offset) + int(count))
+        df = pd.DataFrame({'OBS': nc['OBS'][obs_slice].filled(np.nan), 'SIM': nc['SIM'][obs_slice].filled(np.nan)},
+                          index=pd.DatetimeIndex(_days_to_datetime(nc['time'][obs_slice]), name='time'))
+
+    return df
+
+def _days_to_datetime(days: np.ndarray) -> np.ndarray:
+
+    return (np.datetime64('1900-01-01', 's') + np.round(np.asarray(days) * 86400.).astype('timedelta64[s]')).astype('datetime64[ns]')
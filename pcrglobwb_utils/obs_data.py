@@ -2,7 +2,11 @@
 
 import pandas as pd
 import numpy as np
+import xarray as xr
 import warnings
+import json
+from functools import partial
+import io
 import os
 import click
 
@@ -23,6 +27,7 @@ class grdc_data:
         
     def get_grdc_station_properties(self, encoding='ISO-8859-1') -> dict:
         """Retrieves GRDC station properties from txt-file. Creates and returns header from those properties as well as a dictionary containt station name, lat, and lon info.
+        Only the header of the file is read.
 
         Args:
             encoding (str, optional): encoding of GDRC files. Defaults to 'ISO-8859-1'.
@@ -31,64 +36,10 @@ class grdc_data:
             dict: dictionary containing properties.
         """
 
-        # open file
-        f = open(self.fo, encoding=encoding)
+        with open(self.fo, 'rb') as f:
+            self.props, _ = parse_grdc_header(f, encoding=encoding)
 
-        self.props = dict()
-        
-        # go through lines in file
-        for i, line in enumerate(f):
-
-            split_line = line.split(":")[0]
-
-            if 'GRDC-No.' in split_line:
-                grdc_no = line.split(":")[-1].strip()
-                self.props['grdc_no'] = int(grdc_no)
-
-            if 'Station' in split_line:
-                station_grdc = line.split(":")[-1].strip()
-                self.props['station'] = str(station_grdc)
-
-            if 'Latitude' in split_line:
-                lat_grdc = line.split(":")[-1].strip()
-                self.props['latitude'] = float(lat_grdc)
-
-            if 'Longitude' in split_line:
-                lon_grdc = line.split(":")[-1].strip()
-                self.props['longitude'] = float(lon_grdc)
-
-            if 'Catchment area' in split_line:
-                cat_area = line.split(":")[-1].strip()
-                if cat_area == '':
-                    cat_area = 0.0
-                self.props['cat_area'] = float(cat_area)
-
-            if 'Time series' in split_line:
-                ts_time = line.split(":")[-1].strip()
-                ts_start = ts_time.split(" - ")[0].strip()
-                ts_end = ts_time.split(" - ")[1].strip()
-                self.props['ts_start'] = pd.to_datetime(ts_start)
-                self.props['ts_end'] = pd.to_datetime(ts_end)
-
-            if 'No. of years' in split_line:
-                no_years = line.split(":")[-1].strip()
-                self.props['no_years'] = int(no_years)
-
-            # break loop to save time and not read all observed values   
-            if i > 25:
-                break
-                
-        # close file        
-        f.close()
-
-        if 'grdc_no' not in self.props.keys(): warnings.warn('WARNING -- no "GRDC-No." information found in file.')
-        if 'station' not in self.props.keys(): warnings.warn('WARNING -- no "Station" information found in file.')
-        if 'latitude' not in self.props.keys(): warnings.warn('WARNING -- no "Latitude" information found in file.')
-        if 'longitude' not in self.props.keys(): warnings.warn('WARNING -- no "Longitude" information found in file.')
-        if 'cat_area' not in self.props.keys(): warnings.warn('WARNING -- no "Catchment area" information found in file.')
-        if 'ts_start' not in self.props.keys(): warnings.warn('WARNING -- no start date of timeseries found in file.')
-        if 'ts_end' not in self.props.keys(): warnings.warn('WARNING -- no end date of timeseries found in file.')
-        if 'no_years' not in self.props.keys(): warnings.warn('WARNING -- no "No. of years" information found in file.')
+        check_grdc_station_properties(self.props)
 
         return self.props
 
@@ -109,45 +60,7 @@ class grdc_data:
             pd.DataFrame: dataframe containing observational data.
         """
 
-        # open file
-        f = open(self.fo, encoding=encoding)
-
-        # find line in file in which meta-data starts and observational record starts
-        for i, line in enumerate(f):
-            if '#' in line:
-                pass
-            else:
-                stopline = i
-                break
-
-        df = pd.read_csv(self.fo, skiprows=stopline, sep=';', encoding=encoding)
-
-        # if var_name is specified, use it
-        if var_name != None:
-            var_name = var_name
-        else:
-            var_name = str(col_name)
-
-        try: 
-            if verbose: click.echo('VERBOSE -- reading column {}'.format(col_name))
-            df[var_name] = df[str(col_name)].copy()
-
-        except:
-            if col_name == ' Value':
-                raise ValueError('ERROR: column "{}" - which is also the fall back option - cannot be found in file {}'.format(col_name, self.fo))
-            else:
-                warnings.warn('WARNING: column {} not found, falling back to column Value'.format(col_name))
-                df[var_name] = df[' Value'].copy()
-                del df[' Value']
-
-        df['date'] = pd.to_datetime(df['YYYY-MM-DD'])
-        df.set_index(df['date'], inplace=True)
-
-        df_out = pd.DataFrame(index=df.index,
-                            data=df[var_name])
-        
-        if remove_mv == True:
-            df_out.replace(mv_val, np.nan, inplace=True)
+        _, df_out = read_grdc_file(self.fo, col_name=col_name, var_name=var_name, remove_mv=remove_mv, mv_val=mv_val, encoding=encoding, verbose=verbose)
 
         if (pd.infer_freq(df_out.index) == 'M') or (pd.infer_freq(df_out.index) == 'MS'):
             # if verbose: print('changing index strftime to %Y-%m')
@@ -204,75 +117,26 @@ class gsim_data:
 
         self.fo = fo
 
-    def get_gsim_station_properties(self) -> dict:
+    def get_gsim_station_properties(self, encoding='UTF-8') -> dict:
         """Retrieves GSIM station properties from txt-file. 
         Creates and returns header from those properties as well as a dictionary containt station name, lat, and lon info.
+        Only the header of the file is read.
+
+        Args:
+            encoding (str, optional): encoding of GSIM files. Defaults to 'UTF-8'.
 
         Returns:
             dict: dictionary containing properties.
         """
 
-        # open file
-        f = open(self.fo)
+        with open(self.fo, 'rb') as f:
+            self.props, _ = parse_gsim_header(f, encoding=encoding)
 
-        self.props = dict()
-        
-        # go through lines in file
-        for i, line in enumerate(f):
-
-            split_line = line.split(":")[0]
-
-            if 'gsim.no' in split_line:
-                gsim_no = line.split(":")[-2].strip()
-                self.props['gsim_no'] = gsim_no
-
-            if 'station' in split_line:
-                station_gsim = line.split(":")[-2].strip()
-                self.props['station'] = station_gsim
-
-            if 'latitude' in split_line:
-                lat_gsim = line.split(":")[-2].strip()
-                self.props['latitude'] = float(lat_gsim)
-
-            if 'longitude' in split_line:
-                lon_gsim = line.split(":")[-2].strip()
-                self.props['longitude'] = float(lon_gsim)
-
-            if 'area' in split_line:
-                cat_area = line.split(":")[-2].strip()
-                if cat_area == '':
-                    cat_area = 'N/A'
-                self.props['cat_area'] = cat_area
-
-            if 'altitude' in split_line:
-                alt_gsim = line.split(":")[-2].strip()
-                try:                
-                    self.props['altitude'] = float(alt_gsim)
-                except:
-                    self.props['altitude'] = np.nan
-
-            if 'river' in split_line:
-                river = line.split(":")[-2].strip()
-                self.props['river'] = river
-
-            # break loop to save time and not read all observed values   
-            if i > 20:
-                break
-                
-        # close file        
-        f.close()
-
-        if 'gsim_no' not in self.props.keys(): warnings.warn('WARNING -- no "gsim.no" information found in file {}.'.format(os.path.abspath(self.fo)))
-        if 'station' not in self.props.keys(): warnings.warn('WARNING -- no "station" information found in file {}.'.format(os.path.abspath(self.fo)))
-        if 'latitude' not in self.props.keys(): warnings.warn('WARNING -- no "latitude" information found in file {}.'.format(os.path.abspath(self.fo)))
-        if 'longitude' not in self.props.keys(): warnings.warn('WARNING -- no "longitude" information found in file {}.'.format(os.path.abspath(self.fo)))
-        if 'cat_area' not in self.props.keys(): warnings.warn('WARNING -- no "area" information found in file {}.'.format(os.path.abspath(self.fo)))
-        if 'altitude' not in self.props.keys(): warnings.warn('WARNING -- no "altitude" information found in file {}.'.format(os.path.abspath(self.fo)))
-        if 'river' not in self.props.keys(): warnings.warn('WARNING -- no "river" information found in file {}.'.format(os.path.abspath(self.fo)))
+        check_gsim_station_properties(self.props, self.fo)
 
         return self.props
 
-    def get_gsim_station_values(self, var_name='GSIM', col_name='"MEAN"', remove_mv=True, mv_val=-999, verbose=False) -> tuple[pd.DataFrame, dict]:
+    def get_gsim_station_values(self, var_name='GSIM', col_name='"MEAN"', remove_mv=True, mv_val=-999, encoding='UTF-8', verbose=False) -> tuple[pd.DataFrame, dict]:
         """Reads (discharge-)values of GSIM station from txt-file and returns them as dataframe. 
         Creates a pandas dataframe with a user-specified column header for values instead of default ' Values' header name. 
         Possible to remove possible missing values in the timeseries and plot the resulting series.
@@ -282,70 +146,24 @@ class gsim_data:
             col_name (str, optional): name of column in GSIM-file to be read. Defaults to '	"MEAN"'.
             remove_mv (bool, optional): whether or not remove missing values in timeseries. Defaults to True.
             mv_val (int, optional): missing value in timeseries. Defaults to -999.
+            encoding (str, optional): encoding of GSIM files. Defaults to 'UTF-8'.
             verbose (bool, optional): whether or not to show more info. Defaults to False.
 
         Returns:
             [pd.DataFrame, dict]: dataframe containing observational data; updated station properties dictionary
         """
 
-        # open file
-        f = open(self.fo)
-
-        # find line in file in which meta-data starts and observational record starts
-        for i, line in enumerate(f):
-            if '#' in line:
-                pass
-            else:
-                stopline = i
-                break
-
-        df = pd.read_csv(self.fo, skiprows=stopline, sep=',\t', skipinitialspace=True, na_values='NA', engine='python')
-
-        # if var_name is specified, use it
-        if var_name != None:
-            var_name = var_name
-        else:
-            var_name = str(col_name)
-
-        try: 
-            if verbose: click.echo('VERBOSE -- reading column {}'.format(col_name))
-            df[var_name] = df[str(col_name)].copy()
-
-        except:
-            if col_name == "MEAN":
-                raise ValueError('ERROR: column "{}" - which is also the fall back option - cannot be found in file {}'.format(col_name, self.fo))
-            else:
-                warnings.warn('WARNING: column {} not found, falling back to column Value'.format(col_name))
-                df[var_name] = df[' Value'].copy()
-                del df[' Value']
-
-        df.rename(columns={'"date"': 'date'}, inplace=True)
-        df['date'] = pd.to_datetime(df['date'])
-        df.set_index(df['date'], inplace=True)
-
-        df_out = pd.DataFrame(index=df.index,
-                            data=df[var_name])
-        
-        if remove_mv == True:
-            df_out.replace(mv_val, np.nan, inplace=True)
-
-        mean_val = df_out[var_name].mean()
-        ts_start = df_out.index.values[0]
-        ts_end = df_out.index.values[-1]
-
-        self.props['mean'] = round(mean_val, 3)
-        self.props['ts_start'] = pd.to_datetime(ts_start, format='%Y-%m-%d')
-        self.props['ts_end'] = pd.to_datetime(ts_end, format='%Y-%m-%d')
-
-        self.df = df_out
+        self.props, self.df = read_gsim_file(self.fo, col_name=col_name, var_name=var_name, remove_mv=remove_mv, mv_val=mv_val, encoding=encoding, verbose=verbose)
 
         return self.df, self.props
 
-    def update_props_from_file(self, fo: str) -> dict:
+    def update_props_from_file(self, fo: str, table=None) -> dict:
         """Updates station properties longitude, latitude, and area with data from a user-defined file.
+        When updating many stations, the file should be read only once with 'read_gsim_override_table' and passed as 'table'.
 
         Args:
             fo (str): path to file containing data.
+            table (pd.DataFrame, optional): content of 'fo' as returned by 'read_gsim_override_table'. If None, 'fo' is read. Defaults to None.
 
         Returns:
             dict: dictionary with updated station properties.
@@ -353,14 +171,12 @@ class gsim_data:
 
         click.echo('INFO -- Updating station properties for station {}.'.format(self.props['gsim_no']))
 
-        df = pd.read_csv(fo, delimiter=',', index_col=0, low_memory=False)
+        if table is None:
+            table = read_gsim_override_table(fo)
 
-        df_station = df[df['gsim.no'].isin([self.props['gsim_no']])]
-
-        if not df_station.empty:
-            self.props['longitude'] = df_station['lon_snapped'].values[0]
-            self.props['latitude'] = df_station['lat_snapped'].values[0]
-            self.props['area'] = df_station['area_snapped'].values[0]
+        if self.props['gsim_no'] in table.index:
+            for col, prop in GSIM_OVERRIDE_COLUMNS.items():
+                self.props[prop] = table.at[self.props['gsim_no'], col]
 
         else:
             warnings.warn('WARNING -- No data for station {} found in file {}.'.format(self.props['gsim_no'], fo))
@@ -384,6 +200,221 @@ class gsim_data:
         
         return df
 
+class store_data:
+    """Retrieve data of single stations from an observation store.
+    The store is a netCDF-file created with 'pre.pack_obs_store', containing all timeseries of a GRDC or GSIM archive as contiguous ragged array.
+    Only station properties are read when initiating the object, values are read per station by their offset in the store.
+
+    Args:
+        fo (str): path to netCDF-file with observation store.
+    """
+
+    def __init__(self, fo):
+        """Initiates store_data object.
+        """
+
+        self.fo = fo
+
+        with xr.open_dataset(self.fo) as ds:
+            self.source = ds.attrs['source']
+            self.stations = [str(station) for station in ds['station_name'].values]
+            self.row_offset = ds['row_offset'].values
+            self.row_size = ds['row_size'].values
+            self.properties = ds['properties'].values
+
+        self.index = dict((station, i) for i, station in enumerate(self.stations))
+
+    def get_station_properties(self, station: str) -> dict:
+        """Retrieves properties of a station from the store.
+
+        Args:
+            station (str): station name (GRDC) or number (GSIM).
+
+        Returns:
+            dict: dictionary containing properties.
+        """
+
+        return props_from_json(self.properties[self._get_index(station)])
+
+    def get_station_values(self, station: str, var_name='OBS') -> pd.DataFrame:
+        """Reads values of a station from the store.
+        Only the slice of the store belonging to this station is read.
+
+        Args:
+            station (str): station name (GRDC) or number (GSIM).
+            var_name (str, optional): variable name to be given to column. Defaults to 'OBS'.
+
+        Returns:
+            pd.DataFrame: dataframe with datetime index containing observational data.
+        """
+
+        i = self._get_index(station)
+
+        return self.read_slice(self.row_offset[i], self.row_size[i], var_name=var_name)
+
+    def read_slice(self, offset: int, count: int, var_name='OBS') -> pd.DataFrame:
+        """Reads a slice of the ragged array of the store.
+
+        Args:
+            offset (int): index of first value.
+            count (int): number of values.
+            var_name (str, optional): variable name to be given to column. Defaults to 'OBS'.
+
+        Returns:
+            pd.DataFrame: dataframe with datetime index containing observational data.
+        """
+
+        return read_store_slice(self.fo, offset, count, var_name=var_name)
+
+    def get_station_index(self) -> dict:
+        """Returns properties of all stations in the store, together with a function to read their values.
+        The dictionary has the same layout as the one returned by 'utils.index_GRDC_folder'.
+        The functions hold the offset and size of the slice of each station, such that only that slice is read and the store is not indexed again per station.
+
+        Returns:
+            dict: dictionary with station as key and a list with properties and a function to read values as value.
+        """
+
+        station_index = dict()
+        for i, station in enumerate(self.stations):
+            props = props_from_json(self.properties[i])
+            station_index[station] = [props, partial(load_station_series, read_store_station, self.fo, props, int(self.row_offset[i]), int(self.row_size[i]))]
+
+        return station_index
+
+    def _get_index(self, station: str) -> int:
+
+        if str(station) not in self.index.keys():
+            raise ValueError('ERROR -- station {} not found in observation store {}.'.format(station, os.path.abspath(self.fo)))
+
+        return self.index[str(station)]
+
+class station_series:
+    """Compact, array-backed timeseries of a single station.
+    Instead of a dataframe with datetime index, values are stored as float32 array on a regular daily or monthly time axis.
+    The time axis is defined by the day ordinal of the first time step (days since 1970-01-01) and the frequency.
+    Missing values and gaps in the time axis are flagged in a bitmap with one bit per time step.
+    A dataframe is only created on demand with 'to_pandas'.
+
+    Args:
+        values (np.ndarray): values per time step.
+        valid (np.ndarray): bitmap created with np.packbits, flagging valid values.
+        start (int): day ordinal of first time step.
+        freq (str): frequency of time axis, either 'D' (daily), 'M' (month end), or 'MS' (month start).
+        props (dict, optional): station properties. Defaults to None.
+        name (str, optional): variable name of values. Defaults to 'OBS'.
+    """
+
+    __slots__ = ('values', 'valid', 'start', 'freq', 'props', 'name')
+
+    def __init__(self, values, valid, start, freq, props=None, name='OBS'):
+        """Initiates station_series object.
+        """
+
+        if freq not in ['D', 'M', 'MS']:
+            raise ValueError('ERROR -- frequency must be one of "D", "M", or "MS", not {}.'.format(freq))
+
+        self.values = np.asarray(values, dtype=np.float32)
+        self.valid = np.asarray(valid, dtype=np.uint8)
+        self.start = np.int32(start)
+        self.freq = freq
+        self.props = props
+        self.name = name
+
+    def __len__(self) -> int:
+
+        return self.values.size
+
+    @classmethod
+    def from_pandas(cls, df: pd.DataFrame, props=None) -> 'station_series':
+        """Creates a station_series object from a dataframe with datetime index and one column.
+        Daily timeseries with gaps are placed on a regular daily time axis, the gaps are flagged as missing.
+        Duplicate time steps are removed, keeping the first occurrence.
+
+        Args:
+            df (pd.DataFrame): dataframe with datetime index, e.g. as returned by 'read_grdc_file' or 'read_gsim_file'.
+            props (dict, optional): station properties. Defaults to None.
+
+        Returns:
+            station_series: compact timeseries.
+        """
+
+        df = df[~df.index.duplicated(keep='first')].sort_index()
+
+        days = df.index.values.astype('datetime64[D]')
+        values = df.iloc[:, 0].values.astype(np.float64)
+
+        if days.size == 0:
+            return cls(np.empty(0), np.empty(0), 0, 'D', props=props, name=df.columns[0])
+
+        if (days != df.index.values).any():
+            raise ValueError('ERROR -- only timeseries with daily or monthly time steps are supported.')
+
+        # monthly timeseries are stored per month, all others per day
+        if (days.size > 1) and (np.diff(days).astype(np.int64) == 1).all():
+            freq = 'D'
+        elif df.index.is_month_end.all():
+            freq = 'M'
+        elif df.index.is_month_start.all():
+            freq = 'MS'
+        else:
+            freq = 'D'
+
+        if freq == 'D':
+            steps = days.astype(np.int64)
+        else:
+            steps = days.astype('datetime64[M]').astype(np.int64)
+        pos = steps - steps[0]
+
+        valid = np.zeros(pos[-1] + 1, dtype=bool)
+        valid[pos] = ~np.isnan(values)
+
+        out = np.zeros(pos[-1] + 1, dtype=np.float32)
+        out[pos[valid[pos]]] = values[valid[pos]]
+
+        return cls(out, np.packbits(valid), days[0].astype(np.int64), freq, props=props, name=df.columns[0])
+
+    def get_valid(self) -> np.ndarray:
+        """Returns a boolean array flagging valid values.
+
+        Returns:
+            np.ndarray: True where values are valid.
+        """
+
+        return np.unpackbits(self.valid, count=self.values.size).astype(bool)
+
+    def get_dates(self) -> pd.DatetimeIndex:
+        """Returns the time axis of the timeseries.
+
+        Returns:
+            pd.DatetimeIndex: dates of all time steps.
+        """
+
+        start = np.datetime64(int(self.start), 'D')
+
+        if self.freq == 'D':
+            dates = start + np.arange(self.values.size)
+        else:
+            months = start.astype('datetime64[M]') + np.arange(self.values.size)
+            dates = months.astype('datetime64[D]') if self.freq == 'MS' else (months + 1).astype('datetime64[D]') - 1
+
+        return pd.DatetimeIndex(dates.astype('datetime64[ns]'), name='date')
+
+    def to_pandas(self, var_name=None) -> pd.DataFrame:
+        """Converts the timeseries to a dataframe with datetime index.
+        Missing values are set to NaN.
+
+        Args:
+            var_name (str, optional): column name. If None, the name of the timeseries is used. Defaults to None.
+
+        Returns:
+            pd.DataFrame: dataframe with datetime index containing values.
+        """
+
+        values = np.where(self.get_valid(), self.values.astype(np.float64), np.nan)
+
+        return pd.DataFrame(data={self.name if var_name == None else var_name: values}, index=self.get_dates())
+
 class other_data:
 
     """Retrieve, re-work and visualize data from other data sources than GRDC files
@@ -484,6 +515,422 @@ class other_data:
 
 ## FUNCTIONS
 
+# maps the labels in the header of GRDC files to the names of station properties
+GRDC_HEADER_LABELS = {'GRDC-No.': 'grdc_no',
+                      'Station': 'station',
+                      'Latitude': 'latitude',
+                      'Longitude': 'longitude',
+                      'Catchment area': 'cat_area',
+                      'Time series': 'time_series',
+                      'No. of years': 'no_years'}
+
+def parse_grdc_header(f, encoding='ISO-8859-1') -> tuple[dict, str]:
+    """Parses the header of an opened GRDC file, i.e. all lines starting with '#'.
+    Reading stops at the first line of the data block, such that the file is positioned right after the line with column names.
+
+    Args:
+        f (file object): GRDC file opened in binary mode.
+        encoding (str, optional): encoding of GRDC file. Defaults to 'ISO-8859-1'.
+
+    Returns:
+        tuple[dict, str]: dictionary containing station properties; line with column names of the data block.
+    """
+
+    props = dict()
+
+    line = f.readline().decode(encoding)
+    while line.startswith('#'):
+
+        label, sep, _ = line[1:].partition(':')
+
+        if sep:
+            # labels may contain units in brackets, e.g. 'Latitude (dec. degree)'
+            prop = GRDC_HEADER_LABELS.get(label.split('(')[0].strip())
+
+            if prop != None:
+                value = line.rsplit(':', 1)[-1].strip()
+
+                if prop == 'grdc_no':
+                    props['grdc_no'] = int(value)
+                elif prop == 'station':
+                    props['station'] = str(value)
+                elif prop in ['latitude', 'longitude']:
+                    props[prop] = float(value)
+                elif prop == 'cat_area':
+                    props['cat_area'] = float(value) if value != '' else 0.0
+                elif prop == 'time_series':
+                    ts_start, ts_end = value.split(' - ')
+                    props['ts_start'] = pd.to_datetime(ts_start.strip())
+                    props['ts_end'] = pd.to_datetime(ts_end.strip())
+                elif prop == 'no_years':
+                    props['no_years'] = int(value)
+
+        line = f.readline().decode(encoding)
+
+    return props, line
+
+def check_grdc_station_properties(props: dict) -> None:
+    """Warns if expected station properties were not found in the header of a GRDC file.
+
+    Args:
+        props (dict): dictionary containing station properties.
+    """
+
+    if 'grdc_no' not in props.keys(): warnings.warn('WARNING -- no "GRDC-No." information found in file.')
+    if 'station' not in props.keys(): warnings.warn('WARNING -- no "Station" information found in file.')
+    if 'latitude' not in props.keys(): warnings.warn('WARNING -- no "Latitude" information found in file.')
+    if 'longitude' not in props.keys(): warnings.warn('WARNING -- no "Longitude" information found in file.')
+    if 'cat_area' not in props.keys(): warnings.warn('WARNING -- no "Catchment area" information found in file.')
+    if 'ts_start' not in props.keys(): warnings.warn('WARNING -- no start date of timeseries found in file.')
+    if 'ts_end' not in props.keys(): warnings.warn('WARNING -- no end date of timeseries found in file.')
+    if 'no_years' not in props.keys(): warnings.warn('WARNING -- no "No. of years" information found in file.')
+
+def read_grdc_file(fo: str, col_name=' Value', var_name=None, remove_mv=True, mv_val=-999, encoding='ISO-8859-1', verbose=False) -> tuple[dict, pd.DataFrame]:
+    """Reads station properties and values from a GRDC file in a single pass.
+    The header is parsed line by line until the data block starts.
+    From the data block, only the date column and the requested value column are read with explicit data types.
+
+    Args:
+        fo (str): path to GRDC file.
+        col_name (str, optional): name of column in GRDC file to be read. Defaults to ' Value'.
+        var_name (str, optional): user-specified variable name to be given to column. If None, col_name is used. Defaults to None.
+        remove_mv (bool, optional): whether or not remove missing values in timeseries. Defaults to True.
+        mv_val (int, optional): missing value in timeseries. Defaults to -999.
+        encoding (str, optional): encoding of GRDC file. Defaults to 'ISO-8859-1'.
+        verbose (bool, optional): whether or not to show more info. Defaults to False.
+
+    Returns:
+        tuple[dict, pd.DataFrame]: dictionary containing station properties; dataframe with datetime index containing observational data.
+    """
+
+    # if var_name is specified, use it
+    if var_name == None:
+        var_name = str(col_name)
+
+    with open(fo, 'rb') as f:
+
+        props, header = parse_grdc_header(f, encoding=encoding)
+        check_grdc_station_properties(props)
+
+        # the data block is read at once, the file is not touched again afterwards
+        raw = f.read()
+
+    columns = header.rstrip('\r\n').split(';')
+
+    if str(col_name) not in columns:
+        if col_name == ' Value':
+            raise ValueError('ERROR: column "{}" - which is also the fall back option - cannot be found in file {}'.format(col_name, fo))
+        else:
+            warnings.warn('WARNING: column {} not found, falling back to column Value'.format(col_name))
+            col_name = ' Value'
+            if col_name not in columns:
+                raise ValueError('ERROR: column "{}" - which is also the fall back option - cannot be found in file {}'.format(col_name, fo))
+
+    if verbose: click.echo('VERBOSE -- reading column {}'.format(col_name))
+    col_idx = columns.index(str(col_name))
+    values = pd.read_csv(io.BytesIO(raw), sep=';', header=None, usecols=[col_idx], dtype={col_idx: np.float64}, 
+                         engine='c', low_memory=False)[col_idx].values
+
+    # dates are in ISO format (YYYY-MM-DD) at the start of each line and can be converted by numpy directly
+    # for all other formats, fall back to pandas
+    try:
+        dates = np.array(raw.splitlines(), dtype='S10').astype('datetime64[D]').astype('datetime64[ns]')
+        if dates.size != values.size:
+            raise ValueError
+    except ValueError:
+        dates = pd.read_csv(io.BytesIO(raw), sep=';', header=None, usecols=[0], dtype={0: str}, 
+                            encoding=encoding, engine='c', low_memory=False)[0].values
+        dates = pd.to_datetime(dates)
+
+    if remove_mv == True:
+        values[values == mv_val] = np.nan
+
+    df_out = pd.DataFrame(data={var_name: values}, index=pd.DatetimeIndex(dates, name='date'))
+
+    return props, df_out
+
+# maps the labels in the header of GSIM files to the names of station properties
+GSIM_HEADER_LABELS = {'gsim.no': 'gsim_no',
+                      'station': 'station',
+                      'latitude': 'latitude',
+                      'longitude': 'longitude',
+                      'area': 'cat_area',
+                      'altitude': 'altitude',
+                      'river': 'river'}
+
+def parse_gsim_header(f, encoding='UTF-8') -> tuple[dict, str]:
+    """Parses the header of an opened GSIM file, i.e. all lines starting with '#'.
+    Reading stops at the first line of the data block, such that the file is positioned right after the line with column names.
+
+    Args:
+        f (file object): GSIM file opened in binary mode.
+        encoding (str, optional): encoding of GSIM file. Defaults to 'UTF-8'.
+
+    Returns:
+        tuple[dict, str]: dictionary containing station properties; line with column names of the data block.
+    """
+
+    props = dict()
+
+    line = f.readline().decode(encoding)
+    while line.startswith('#'):
+
+        # property lines are formatted as '# label : value : [unit]'
+        fields = line[1:].split(':')
+
+        if len(fields) > 2:
+            prop = GSIM_HEADER_LABELS.get(fields[0].strip())
+            value = fields[-2].strip()
+
+            if prop in ['gsim_no', 'station', 'river']:
+                props[prop] = value
+            elif prop in ['latitude', 'longitude']:
+                props[prop] = float(value)
+            elif prop == 'cat_area':
+                props['cat_area'] = value if value != '' else 'N/A'
+            elif prop == 'altitude':
+                try:
+                    props['altitude'] = float(value)
+                except ValueError:
+                    props['altitude'] = np.nan
+
+        line = f.readline().decode(encoding)
+
+    return props, line
+
+# maps the columns of a GSIM catalog file to the station properties they override
+GSIM_OVERRIDE_COLUMNS = {'lon_snapped': 'longitude',
+                         'lat_snapped': 'latitude',
+                         'area_snapped': 'area'}
+
+def read_gsim_override_table(fo: str) -> pd.DataFrame:
+    """Reads a GSIM catalog file, e.g. with snapped station locations, and indexes it by 'gsim.no'.
+    If a station is listed more than once, its first entry is used.
+
+    Args:
+        fo (str): path to csv-file with at least a 'gsim.no' column.
+
+    Returns:
+        pd.DataFrame: content of file with 'gsim.no' as index.
+    """
+
+    df = pd.read_csv(fo, delimiter=',', index_col=0, low_memory=False)
+
+    if 'gsim.no' not in df.columns:
+        raise ValueError('ERROR -- no column "gsim.no" found in file {}.'.format(os.path.abspath(fo)))
+
+    df = df.drop_duplicates(subset='gsim.no').set_index('gsim.no')
+
+    return df
+
+def apply_gsim_overrides(data_dict: dict, table: pd.DataFrame, fo=None) -> dict:
+    """Overrides longitude, latitude, and area of all GSIM stations in a dictionary at once.
+    The table is aligned with the stations in a single step, after which the properties of each station are updated by dictionary lookup.
+    Stations not found in the table keep their properties.
+
+    Args:
+        data_dict (dict): dictionary with GSIM station as key and a list with properties and values as value, e.g. from 'utils.index_GSIM_folder'.
+        table (pd.DataFrame): table as returned by 'read_gsim_override_table'.
+        fo (str, optional): path to file from which table was read. Only used for printing. Defaults to None.
+
+    Returns:
+        dict: dictionary with updated station properties.
+    """
+
+    columns = [col for col in GSIM_OVERRIDE_COLUMNS.keys() if col in table.columns]
+    if len(columns) < len(GSIM_OVERRIDE_COLUMNS):
+        warnings.warn('WARNING -- columns {} not found in file {}.'.format([col for col in GSIM_OVERRIDE_COLUMNS.keys() if col not in columns], fo))
+
+    stations = list(data_dict.keys())
+    found = pd.Index(stations).isin(table.index)
+
+    df_new = table.reindex(stations)[columns].rename(columns=GSIM_OVERRIDE_COLUMNS).loc[found]
+
+    for station, props in df_new.to_dict('index').items():
+        data_dict[station][0].update(props)
+
+    click.echo('INFO -- updated properties of {}/{} stations with data from file {}.'.format(found.sum(), len(stations), fo))
+    if not found.all():
+        warnings.warn('WARNING -- No data for {} stations found in file {}.'.format((~found).sum(), fo))
+
+    return data_dict
+
+def check_gsim_station_properties(props: dict, fo: str) -> None:
+    """Warns if expected station properties were not found in the header of a GSIM file.
+
+    Args:
+        props (dict): dictionary containing station properties.
+        fo (str): path to GSIM file.
+    """
+
+    if 'gsim_no' not in props.keys(): warnings.warn('WARNING -- no "gsim.no" information found in file {}.'.format(os.path.abspath(fo)))
+    if 'station' not in props.keys(): warnings.warn('WARNING -- no "station" information found in file {}.'.format(os.path.abspath(fo)))
+    if 'latitude' not in props.keys(): warnings.warn('WARNING -- no "latitude" information found in file {}.'.format(os.path.abspath(fo)))
+    if 'longitude' not in props.keys(): warnings.warn('WARNING -- no "longitude" information found in file {}.'.format(os.path.abspath(fo)))
+    if 'cat_area' not in props.keys(): warnings.warn('WARNING -- no "area" information found in file {}.'.format(os.path.abspath(fo)))
+    if 'altitude' not in props.keys(): warnings.warn('WARNING -- no "altitude" information found in file {}.'.format(os.path.abspath(fo)))
+    if 'river' not in props.keys(): warnings.warn('WARNING -- no "river" information found in file {}.'.format(os.path.abspath(fo)))
+
+def read_gsim_file(fo: str, col_name='"MEAN"', var_name='GSIM', remove_mv=True, mv_val=-999, encoding='UTF-8', verbose=False) -> tuple[dict, pd.DataFrame]:
+    """Reads station properties and values from a GSIM file in a single pass.
+    GSIM files separate columns by a comma followed by a tab.
+    This two-character separator is normalized to a comma before parsing, such that the C engine of pandas can be used.
+    Column names are parsed once from the header, they can be specified with or without quotes.
+    Besides the header properties, the mean value and start and end date of the timeseries are added to the station properties.
+
+    Args:
+        fo (str): path to GSIM file.
+        col_name (str, optional): name of column in GSIM file to be read. Defaults to '"MEAN"'.
+        var_name (str, optional): user-specified variable name to be given to column. If None, col_name is used. Defaults to 'GSIM'.
+        remove_mv (bool, optional): whether or not remove missing values in timeseries. Defaults to True.
+        mv_val (int, optional): missing value in timeseries. Defaults to -999.
+        encoding (str, optional): encoding of GSIM file. Defaults to 'UTF-8'.
+        verbose (bool, optional): whether or not to show more info. Defaults to False.
+
+    Returns:
+        tuple[dict, pd.DataFrame]: dictionary containing station properties; dataframe with datetime index containing observational data.
+    """
+
+    # if var_name is specified, use it
+    if var_name == None:
+        var_name = str(col_name)
+
+    with open(fo, 'rb') as f:
+
+        props, header = parse_gsim_header(f, encoding=encoding)
+        check_gsim_station_properties(props, fo)
+
+        # the data block is read at once and the separator normalized
+        raw = f.read().replace(b',\t', b',')
+
+    columns = [column.strip() for column in header.split(',')]
+
+    # column names are quoted in GSIM files, but may be specified without quotes
+    col_name = str(col_name).strip()
+    if (col_name not in columns) and ('"{}"'.format(col_name) in columns):
+        col_name = '"{}"'.format(col_name)
+
+    if col_name not in columns:
+        if col_name == '"MEAN"':
+            raise ValueError('ERROR: column "{}" - which is also the fall back option - cannot be found in file {}'.format(col_name, fo))
+        else:
+            warnings.warn('WARNING: column {} not found, falling back to column "MEAN"'.format(col_name))
+            col_name = '"MEAN"'
+            if col_name not in columns:
+                raise ValueError('ERROR: column "{}" - which is also the fall back option - cannot be found in file {}'.format(col_name, fo))
+
+    if verbose: click.echo('VERBOSE -- reading column {}'.format(col_name))
+    col_idx = columns.index(col_name)
+    values = pd.read_csv(io.BytesIO(raw), sep=',', header=None, usecols=[col_idx], dtype={col_idx: np.float64}, 
+                         na_values=['NA'], keep_default_na=False, engine='c', low_memory=False)[col_idx].values
+
+    # dates are in ISO format (YYYY-MM-DD) at the start of each line and can be converted by numpy directly
+    # for all other formats, fall back to pandas
+    try:
+        dates = np.array(raw.splitlines(), dtype='S10').astype('datetime64[D]').astype('datetime64[ns]')
+        if dates.size != values.size:
+            raise ValueError
+    except ValueError:
+        dates = pd.read_csv(io.BytesIO(raw), sep=',', header=None, usecols=[0], dtype={0: str}, 
+                            encoding=encoding, engine='c', low_memory=False)[0].values
+        dates = pd.to_datetime(dates)
+
+    if remove_mv == True:
+        values[values == mv_val] = np.nan
+
+    df_out = pd.DataFrame(data={var_name: values}, index=pd.DatetimeIndex(dates, name='date'))
+
+    props['mean'] = round(np.nanmean(values), 3) if np.any(~np.isnan(values)) else np.nan
+    props['ts_start'] = df_out.index[0]
+    props['ts_end'] = df_out.index[-1]
+
+    return props, df_out
+
+def read_store_slice(fo: str, offset: int, count: int, var_name='OBS') -> pd.DataFrame:
+    """Reads a slice of the ragged array of an observation store.
+
+    Args:
+        fo (str): path to netCDF-file with observation store.
+        offset (int): index of first value.
+        count (int): number of values.
+        var_name (str, optional): variable name to be given to column. Defaults to 'OBS'.
+
+    Returns:
+        pd.DataFrame: dataframe with datetime index containing observational data.
+    """
+
+    with xr.open_dataset(fo) as ds:
+        ds_slice = ds[['time', 'value']].isel(obs=slice(int(offset), int(offset) + int(count))).load()
+
+    df_out = pd.DataFrame(data={var_name: ds_slice['value'].values}, index=pd.DatetimeIndex(ds_slice['time'].values, name='date'))
+
+    return df_out
+
+def read_store_station(fo: str, props: dict, offset: int, count: int, var_name='OBS') -> tuple[dict, pd.DataFrame]:
+    """Reads values of a single station from an observation store, given the properties of the station and its slice of the store.
+    Offset and size of the slice are known from 'store_data.get_station_index', such that only the slice is read.
+
+    Args:
+        fo (str): path to netCDF-file with observation store.
+        props (dict): dictionary containing station properties.
+        offset (int): index of first value of station.
+        count (int): number of values of station.
+        var_name (str, optional): variable name to be given to column. Defaults to 'OBS'.
+
+    Returns:
+        tuple[dict, pd.DataFrame]: dictionary containing station properties; dataframe with datetime index containing observational data.
+    """
+
+    return props, read_store_slice(fo, offset, count, var_name=var_name)
+
+def load_station_series(read_func, *args, **kwargs) -> tuple[dict, station_series]:
+    """Reads station properties and values with a reader function and converts the values to a compact station_series object.
+    Together with functools.partial, it creates functions reading a station which can be sent to other processes.
+
+    Args:
+        read_func (function): function returning station properties and dataframe, e.g. 'read_grdc_file'.
+        *args: positional arguments passed to 'read_func'.
+        **kwargs: keyword arguments passed to 'read_func'.
+
+    Returns:
+        tuple[dict, station_series]: dictionary containing station properties; compact timeseries.
+    """
+
+    props, df = read_func(*args, **kwargs)
+
+    return props, station_series.from_pandas(df, props=props)
+
+def props_to_json(props: dict) -> str:
+    """Serializes station properties to a JSON string.
+    Timestamps are stored in ISO format.
+
+    Args:
+        props (dict): dictionary containing station properties.
+
+    Returns:
+        str: JSON string.
+    """
+
+    return json.dumps(dict((key, value.isoformat() if isinstance(value, pd.Timestamp) else value) for key, value in props.items()))
+
+def props_from_json(s: str) -> dict:
+    """Deserializes station properties from a JSON string created with 'props_to_json'.
+
+    Args:
+        s (str): JSON string.
+
+    Returns:
+        dict: dictionary containing station properties.
+    """
+
+    props = json.loads(s)
+
+    for key in ['ts_start', 'ts_end']:
+        if key in props.keys():
+            props[key] = pd.Timestamp(props[key])
+
+    return props
+
 def get_data_from_yml(yaml_root: str, data_dict: dict, station: str, var_name: str, encoding='ISO-8859-1', verbose=False) -> tuple[pd.DataFrame, dict, bool]: 
     """Extracting data from yaml-file for one station.
     This data contains of a dataframe with a timeseries and a dictionary with station properties.
@@ -513,21 +960,14 @@ def get_data_from_yml(yaml_root: str, data_dict: dict, station: str, var_name: s
         grdc_file = station_dict['file']           
     click.echo('INFO -- reading observations from file {}.'.format(grdc_file))
 
-    grdc_obj = grdc_data(grdc_file)
-
-    if verbose: click.echo('VERBOSE -- retrieving GRDC station properties.')
-    grdc_props = grdc_obj.get_grdc_station_properties(encoding=encoding)
-
-    # retrieving values from GRDC file
+    # retrieving station properties and values from GRDC file
     # either use a specific column name for the GRDC file
     if 'column' in station_dict.keys():
-        df_obs = grdc_obj.get_grdc_station_values(col_name=station_dict['column'], var_name=var_name, encoding=encoding, verbose=verbose)
+        grdc_props, df_obs = read_grdc_file(grdc_file, col_name=station_dict['column'], var_name=var_name, encoding=encoding, verbose=verbose)
     
     # or use the default name
     else:
-        df_obs = grdc_obj.get_grdc_station_values(var_name=var_name, verbose=verbose, encoding=encoding)
-
-    df_obs.set_index(pd.to_datetime(df_obs.index), inplace=True)
+        grdc_props, df_obs = read_grdc_file(grdc_file, var_name=var_name, encoding=encoding, verbose=verbose)
 
     # if 'lat' or 'lon' are specified for a station in the yaml-file,
     # use this instead of GRDC coordinates
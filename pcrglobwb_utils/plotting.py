@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import pcrglobwb_utils
+import pandas as pd
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import multiprocessing as mp
+from functools import partial
+import click
+import glob
+import os
+
+# scores shown in map of polygons, in order of panels
+POLY_SCORES = ['R2', 'MSE', 'RMSE', 'RRMSE']
+
+def plot_timeseries(df: pd.DataFrame, out_file: str, ylabel='discharge [m3/s]', dpi=300) -> str:
+    """Plots observed and simulated timeseries of one station and saves the figure.
+
+    Args:
+        df (pd.DataFrame): dataframe with time as index, observed values in the first and simulated values in the second column.
+        out_file (str): path to png-file.
+        ylabel (str, optional): label of y-axis. Defaults to 'discharge [m3/s]'.
+        dpi (int, optional): resolution of figure. Defaults to 300.
+
+    Returns:
+        str: path to png-file.
+    """
+
+    fig, ax = plt.subplots(1, 1, figsize=(20, 10))
+    df.iloc[:, 1].plot(ax=ax, c='r', label='SIM')
+    df.iloc[:, 0].plot(ax=ax, c='k', label='OBS')
+    ax.set_ylabel(ylabel)
+    ax.set_xlabel(None)
+    ax.legend()
+    fig.savefig(out_file, bbox_inches='tight', dpi=dpi)
+    # figures are closed explicitly, as many are rendered by the same process
+    plt.close(fig)
+
+    return out_file
+
+def plot_timeseries_file(fo: str, dpi=300) -> str:
+    """Plots the evaluated timeseries of one station as stored in a csv-file per station.
+    The figure is saved next to the csv-file, e.g. 'evaluated_timeseries_M.csv' is plotted to 'timeseries_M.png'.
+
+    Args:
+        fo (str): path to csv-file with evaluated timeseries.
+        dpi (int, optional): resolution of figure. Defaults to 300.
+
+    Returns:
+        str: path to png-file.
+    """
+
+    df = pd.read_csv(fo, index_col=0, parse_dates=True)
+    out_file = os.path.join(os.path.dirname(fo), os.path.basename(fo).replace('evaluated_', '').replace('.csv', '.png'))
+
+    return plot_timeseries(df, out_file, dpi=dpi)
+
+def plot_station_timeseries(fo: str, station: str, out_file: str, offset=None, count=None, dpi=300) -> str:
+    """Plots the evaluated timeseries of one station as stored in a single file for all stations (see 'io.timeseries_writer').
+    Only the timeseries of this station is read from the file.
+    The folder of the png-file is created if not there yet.
+
+    Args:
+        fo (str): path to netCDF-file or Parquet-file with evaluated timeseries.
+        station (str): station name or other ID.
+        out_file (str): path to png-file.
+        offset (int, optional): index of first time step of station in netCDF-file, see 'io.index_timeseries_file'. Defaults to None.
+        count (int, optional): number of time steps of station in netCDF-file. Defaults to None.
+        dpi (int, optional): resolution of figure. Defaults to 300.
+
+    Returns:
+        str: path to png-file.
+    """
+
+    df = pcrglobwb_utils.io.read_station_timeseries(fo, station, offset=offset, count=count)
+    os.makedirs(os.path.dirname(out_file), exist_ok=True)
+
+    return plot_timeseries(df, out_file, dpi=dpi)
+
+def plot_polygon_scores(fo: str, scores=POLY_SCORES, dpi=300) -> str:
+    """Plots a map per score of polygons as stored in a vector file, e.g. the output of 'eval.POLY'.
+    The figure is saved next to the vector file with the same name.
+
+    Args:
+        fo (str): path to vector file with polygons and scores.
+        scores (list, optional): scores to be plotted, one panel each. Defaults to POLY_SCORES.
+        dpi (int, optional): resolution of figure. Defaults to 300.
+
+    Returns:
+        str: path to png-file.
+    """
+
+    gdf = pcrglobwb_utils.io.read_vector(fo, columns=scores)
+    out_file = os.path.splitext(fo)[0] + '.png'
+
+    n_cols = min(len(scores), 2)
+    n_rows = int(np.ceil(len(scores) / n_cols))
+
+    fig, axes = plt.subplots(n_rows, n_cols, figsize=(5 * n_cols, 5 * n_rows), sharex=True, sharey=True, squeeze=False)
+    for ax, score in zip(axes.flatten(), scores):
+        gdf.plot(ax=ax, column=score, legend=True)
+        ax.set_title(score)
+    fig.savefig(out_file, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+
+    return out_file
+
+def _call(task):
+
+    return task()
+
+def get_plot_tasks(out: str, dpi=300) -> list:
+    """Finds saved results of an evaluation in an output folder and prepares one plotting task per figure.
+    No files or folders are created here, this is done by the tasks.
+    Supported are
+
+    * csv-files with evaluated timeseries in a sub-folder per station, as written by 'eval.GRDC', 'eval.GSIM', and 'eval.EXCEL';
+    * single files with evaluated timeseries of all stations (see 'io.timeseries_writer'), which are plotted to a sub-folder per file and of which only the stations are listed here;
+    * vector files with scores per polygon, as written by 'eval.POLY'.
+
+    Args:
+        out (str): output folder of evaluation.
+        dpi (int, optional): resolution of figures. Defaults to 300.
+
+    Returns:
+        list: tasks which render and save one figure each when called.
+    """
+
+    out = os.path.abspath(out)
+    tasks = list()
+
+    for fo in sorted(glob.glob(os.path.join(out, '*', 'evaluated_timeseries*.csv'))):
+        tasks.append(partial(plot_timeseries_file, fo, dpi=dpi))
+
+    for ext in ['nc', 'parquet']:
+        for fo in sorted(glob.glob(os.path.join(out, 'evaluated_timeseries*.{}'.format(ext)))):
+            plot_dir = os.path.splitext(fo)[0] + '_plots'
+            # timeseries are read per station when plotting, i.e. by the workers
+            for station, offset, count in pcrglobwb_utils.io.index_timeseries_file(fo):
+                tasks.append(partial(plot_station_timeseries, fo, station, os.path.join(plot_dir, '{}.png'.format(station)), offset=offset, count=count, dpi=dpi))
+
+    for vector_format in pcrglobwb_utils.io.VECTOR_FORMATS.keys():
+        ext = pcrglobwb_utils.io.VECTOR_FORMATS[vector_format][0]
+        for fo in sorted(glob.glob(os.path.join(out, '*_vs_*{}'.format(ext)))):
+            tasks.append(partial(plot_polygon_scores, fo, dpi=dpi))
+
+    return tasks
+
+def plot_output(out: str, number_processes=None, dpi=300, verbose=False) -> list:
+    """Renders all figures of the saved results of an evaluation in an output folder.
+    Plotting is a separate stage after the evaluation, such that it can also be deferred and run later, e.g. with 'pcru_plot'.
+    If specified, figures are rendered in parallel, since rendering is independent per figure.
+
+    Args:
+        out (str): output folder of evaluation.
+        number_processes (int, optional): number of processes to be used for rendering. Defaults to None, i.e. no multiprocessing.
+        dpi (int, optional): resolution of figures. Defaults to 300.
+        verbose (bool, optional): whether or not to print more info. Defaults to False.
+
+    Returns:
+        list: paths to png-files.
+    """
+
+    tasks = get_plot_tasks(out, dpi=dpi)
+    click.echo('INFO -- rendering {} figures from results in {}.'.format(len(tasks), os.path.abspath(out)))
+
+    if (number_processes != None) and (len(tasks) > 0):
+
+        min_number_processes = min(number_processes, len(tasks), mp.cpu_count())
+        click.echo('INFO -- using {} CPUs for plotting'.format(min_number_processes))
+        pool = mp.Pool(processes=min_number_processes)
+        results = pool.imap_unordered(_call, tasks)
+
+    else:
+
+        pool = None
+        results = (_call(task) for task in tasks)
+
+    out_files = list()
+    for out_file in results:
+        if verbose: click.echo('VERBOSE -- saved figure to {}.'.format(out_file))
+        out_files.append(out_file)
+
+    if pool != None:
+        pool.close()
+        pool.join()
+
+    return sorted(out_files)
@@ -9,6 +9,8 @@ import geopandas as gpd
 import matplotlib.pyplot as plt
 from shapely.geometry import Point
 import pickle
+import netCDF4
+import multiprocessing as mp
 import click
 from datetime import datetime
 import os
@@ -52,7 +54,7 @@ def mask_polygons(ncf, poly, out, var_name, out_file_name, poly_id, crs_system='
 
     # read shapefile with one or more polygons
     click.echo(click.style('INFO -- reading polygons from {}'.format(os.path.abspath(poly)), fg='red'))
-    poly_gdf = gpd.read_file(poly, crs=crs_system, driver='GeoJSON')
+    poly_gdf = pcrglobwb_utils.io.read_vector(poly, crs=crs_system, columns=[poly_id])
 
     # initiate lists for polygon ID and path to pickled mask
     ll_ID = list()
@@ -131,7 +133,7 @@ def mask_polygons(ncf, poly, out, var_name, out_file_name, poly_id, crs_system='
     click.echo(click.style('INFO -- done.', fg='green'))
     click.echo(click.style('INFO -- run time: {}.'.format(delta_t), fg='green'))
 
-def select_grdc_stations(in_dir, out, grdc_column, verbose, encoding, cat_area_thld, nr_years_thld, timeseries_end, timeseries_start, geojson=True):
+def select_grdc_stations(in_dir, out, grdc_column, verbose, encoding, cat_area_thld, nr_years_thld, timeseries_end, timeseries_start, geojson=True, number_processes=None, catalog=None):
 
     t_start = datetime.now()
     
@@ -156,27 +158,47 @@ def select_grdc_stations(in_dir, out, grdc_column, verbose, encoding, cat_area_t
         click.echo('INFO -- preparing geo-dict for GeoJSON output')
         geo_dict = {'station': list(), 'geometry': list()}
 
-    # collect all GRDC-files in the input folder
-    data = pcrglobwb_utils.utils.glob_GRDC_folder(in_dir, grdc_column, verbose, encoding=encoding)
+    # if a station catalog is provided, it is refreshed for the input folder and queried
+    # this avoids reading the GRDC-files again
+    if catalog != None:
 
-    # from each file, collect properties and apply selection
-    click.echo('INFO -- applying selection criteria')
-    for key in data.keys():
+        df_all = pcrglobwb_utils.catalog.build_catalog(in_dir, catalog, source='GRDC', encoding=encoding, number_processes=number_processes, verbose=verbose)
+        click.echo('INFO -- applying selection criteria to catalog {}'.format(os.path.abspath(catalog)))
+        df_sel = pcrglobwb_utils.catalog.select_stations(catalog, source='GRDC', in_dir=in_dir, cat_area_thld=cat_area_thld, nr_years_thld=nr_years_thld, timeseries_end=timeseries_end, timeseries_start=timeseries_start)
 
-        loc_data = data[str(key)]
-        props = loc_data[0]
+        out_ll = df_sel['station'].to_list()
+        if geojson:
+            geo_dict['station'] = out_ll
+            geo_dict['geometry'] = gpd.points_from_xy(df_sel['longitude'], df_sel['latitude'])
 
-        # apply thresholds to station properties
-        if (props['cat_area'] >= cat_area_thld) and (props['no_years'] >= nr_years_thld) and (props['ts_end'] >= pd.to_datetime(timeseries_end)) and (props['ts_start'] >= pd.to_datetime(timeseries_start)):
-    
-            # if both criteria are met, station is selected and appended to list
-            if verbose: click.echo('... selected!')
-            out_ll.append(props['station'])
-            if geojson: 
-                geo_dict['station'].append(props['station'])
-                geo_dict['geometry'].append(Point(props['longitude'], props['latitude']))
-
-    click.echo('INFO -- {}/{} stations selected'.format(len(out_ll), len(data.keys())))
+        nr_stations = len(df_all)
+
+    else:
+
+        # collect all GRDC-files in the input folder
+        # all selection criteria refer to station properties, hence only the headers of the files are read
+        data = pcrglobwb_utils.utils.index_GRDC_folder(in_dir, grdc_column, verbose, encoding=encoding, number_processes=number_processes)
+
+        # from each file, collect properties and apply selection
+        click.echo('INFO -- applying selection criteria')
+        for key in data.keys():
+
+            loc_data = data[str(key)]
+            props = loc_data[0]
+
+            # apply thresholds to station properties
+            if (props['cat_area'] >= cat_area_thld) and (props['no_years'] >= nr_years_thld) and (props['ts_end'] >= pd.to_datetime(timeseries_end)) and (props['ts_start'] >= pd.to_datetime(timeseries_start)):
+        
+                # if both criteria are met, station is selected and appended to list
+                if verbose: click.echo('... selected!')
+                out_ll.append(props['station'])
+                if geojson: 
+                    geo_dict['station'].append(props['station'])
+                    geo_dict['geometry'].append(Point(props['longitude'], props['latitude']))
+
+        nr_stations = len(data.keys())
+
+    click.echo('INFO -- {}/{} stations selected'.format(len(out_ll), nr_stations))
     
     if geojson: 
         gdf = gpd.GeoDataFrame(geo_dict, crs="EPSG:4326")
@@ -193,4 +215,125 @@ def select_grdc_stations(in_dir, out, grdc_column, verbose, encoding, cat_area_t
     delta_t  = t_end - t_start
 
     click.echo(click.style('INFO -- done.', fg='green'))
-    click.echo(click.style('INFO -- run time: {}.'.format(delta_t), fg='green'))
\ No newline at end of file
+    click.echo(click.style('INFO -- run time: {}.'.format(delta_t), fg='green'))
+
+
+def pack_obs_store(in_dir: str, out_file: str, source='GRDC', col_name=None, encoding='ISO-8859-1', number_processes=None, batch_size=500, verbose=False) -> None:
+    """Packs all GRDC or GSIM files in a folder into a single observation store.
+    The store is a netCDF-file following the CF conventions for a contiguous ragged array of timeseries.
+    All values and dates are stored in one 'obs' dimension, with the number of values and the offset per station stored along the 'station' dimension.
+    That way, single stations can be read from the store without parsing any text file, see 'obs_data.store_data'.
+    Only the headers of all files are read first, values are read and written to the store in batches of stations to limit memory use.
+
+    Args:
+        in_dir (str): path to folder with GRDC or GSIM files.
+        out_file (str): path to netCDF-file to which the store is written.
+        source (str, optional): either 'GRDC' or 'GSIM'. Defaults to 'GRDC'.
+        col_name (str, optional): column to be read from the files. If None, ' Value' is used for GRDC and '"MEAN"' for GSIM files. Defaults to None.
+        encoding (str, optional): encoding of GRDC files. Defaults to 'ISO-8859-1'.
+        number_processes (int, optional): number of processes to be used for reading files. Defaults to None.
+        batch_size (int, optional): number of stations read before writing them to the store. Defaults to 500.
+        verbose (bool, optional): whether or not to print more info. Defaults to False.
+    """
+
+    t_start = datetime.now()
+
+    click.echo(click.style('INFO -- start preprocessing: pack-obs-store.', fg='green'))
+    click.echo(click.style('INFO -- pcrglobwb_utils version {}.'.format(pcrglobwb_utils.__version__), fg='green'))
+
+    if source == 'GRDC':
+        if col_name == None: col_name = ' Value'
+        data = pcrglobwb_utils.utils.index_GRDC_folder(in_dir, col_name, verbose=verbose, encoding=encoding, number_processes=number_processes)
+    elif source == 'GSIM':
+        if col_name == None: col_name = '"MEAN"'
+        data = pcrglobwb_utils.utils.index_GSIM_folder(in_dir, col_name=col_name, verbose=verbose, number_processes=number_processes)
+    else:
+        raise ValueError('ERROR -- source must be either "GRDC" or "GSIM", not {}.'.format(source))
+
+    if len(data) == 0:
+        raise ValueError('ERROR -- no {} files found in folder {}.'.format(source, os.path.abspath(in_dir)))
+
+    stations = list(data.keys())
+
+    out_file = os.path.abspath(out_file)
+    click.echo('INFO -- writing {} stations to {}'.format(len(stations), out_file))
+
+    nc = netCDF4.Dataset(out_file, 'w')
+    try:
+        nc.createDimension('station', len(stations))
+        nc.createDimension('obs', None)
+        nc.createVariable('station_name', str, ('station',)).setncatts({'cf_role': 'timeseries_id', 'long_name': 'station name'})
+        nc.createVariable('latitude', 'f8', ('station',), fill_value=np.nan).setncatts({'standard_name': 'latitude', 'units': 'degrees_north'})
+        nc.createVariable('longitude', 'f8', ('station',), fill_value=np.nan).setncatts({'standard_name': 'longitude', 'units': 'degrees_east'})
+        nc.createVariable('row_size', 'i8', ('station',)).setncatts({'long_name': 'number of observations for this station', 'sample_dimension': 'obs'})
+        nc.createVariable('row_offset', 'i8', ('station',)).setncatts({'long_name': 'index of first observation for this station'})
+        # station properties differ between GRDC and GSIM and are stored as JSON per station
+        nc.createVariable('properties', str, ('station',)).setncatts({'long_name': 'station properties as JSON'})
+        nc.createVariable('time', 'i4', ('obs',)).setncatts({'standard_name': 'time', 'units': 'days since 1700-01-01', 'calendar': 'proleptic_gregorian'})
+        nc.createVariable('value', 'f8', ('obs',), zlib=True, complevel=1, chunksizes=(65536,), fill_value=np.nan).setncatts({'long_name': str(col_name).strip().strip('"')})
+        nc.setncatts({'Conventions': 'CF-1.8', 'featureType': 'timeSeries', 'source': source, 'col_name': str(col_name), 
+                      'history': 'created with pcrglobwb_utils version {} from folder {}'.format(pcrglobwb_utils.__version__, os.path.abspath(in_dir))})
+
+        read_funcs = [data[station][1] for station in stations]
+
+        if (number_processes != None) and (len(read_funcs) > 1):
+
+            min_number_processes = min(number_processes, len(read_funcs), mp.cpu_count())
+            click.echo('INFO -- reading {} files with {} processes'.format(len(read_funcs), min_number_processes))
+            pool = mp.Pool(processes=min_number_processes)
+            # stations are returned in order, such that they are stored in the order of the sorted file names
+            results = pool.imap(_read_station, read_funcs, chunksize=max(1, min(batch_size, len(read_funcs) // (4 * min_number_processes))))
+
+        else:
+
+            pool = None
+            results = (_read_station(read_func) for read_func in read_funcs)
+
+        buffer = list()
+        n_stations, n_obs = 0, 0
+        for station, (props, series) in zip(stations, results):
+            buffer.append((station, props, series))
+            if (len(buffer) == batch_size) or (n_stations + len(buffer) == len(stations)):
+                n_obs += _write_store_batch(nc, buffer, n_stations, n_obs)
+                n_stations += len(buffer)
+                if verbose: click.echo('VERBOSE -- {}/{} stations written.'.format(n_stations, len(stations)))
+                buffer = list()
+
+        if pool != None:
+            pool.close()
+            pool.join()
+
+    finally:
+        nc.close()
+
+    click.echo('INFO -- written {} stations with {} values to {}'.format(n_stations, n_obs, out_file))
+
+    t_end = datetime.now()
+    delta_t  = t_end - t_start
+
+    click.echo(click.style('INFO -- done.', fg='green'))
+    click.echo(click.style('INFO -- run time: {}.'.format(delta_t), fg='green'))
+
+def _read_station(read_func):
+
+    return read_func()
+
+def _write_store_batch(nc: netCDF4.Dataset, batch: list, s0: int, o0: int) -> int:
+
+    row_size = np.array([len(series) for station, props, series in batch], dtype=np.int64)
+    row_offset = o0 + np.concatenate([[0], np.cumsum(row_size)[:-1]]).astype(np.int64)
+    s1, o1 = s0 + len(batch), o0 + int(row_size.sum())
+
+    nc['station_name'][s0:s1] = np.array([station for station, props, series in batch], dtype=object)
+    nc['latitude'][s0:s1] = np.array([props['latitude'] for station, props, series in batch], dtype=np.float64)
+    nc['longitude'][s0:s1] = np.array([props['longitude'] for station, props, series in batch], dtype=np.float64)
+    nc['row_size'][s0:s1] = row_size
+    nc['row_offset'][s0:s1] = row_offset
+    nc['properties'][s0:s1] = np.array([pcrglobwb_utils.obs_data.props_to_json(props) for station, props, series in batch], dtype=object)
+
+    if o1 > o0:
+        dates = np.concatenate([series.get_dates().values.astype('datetime64[D]') for station, props, series in batch])
+        nc['time'][o0:o1] = (dates - np.datetime64('1700-01-01', 'D')).astype(np.int32)
+        nc['value'][o0:o1] = np.concatenate([series.to_pandas().iloc[:, 0].values.astype(np.float64) for station, props, series in batch])
+
+    return o1 - o0
@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import pcrglobwb_utils
+import xarray as xr
+import numpy as np
+import scipy.sparse
+import hashlib
+import click
+import os
+
+def get_spatial_dims(da: xr.DataArray) -> tuple[str, str]:
+    """Determines the names of the latitude and longitude dimensions of a data array.
+
+    Args:
+        da (xr.DataArray): data array with either 'lat'/'lon' or 'latitude'/'longitude' dimensions.
+
+    Returns:
+        tuple[str, str]: name of latitude dimension, name of longitude dimension.
+    """
+
+    if ('lat' in da.dims) and ('lon' in da.dims):
+        return 'lat', 'lon'
+    elif ('latitude' in da.dims) and ('longitude' in da.dims):
+        return 'latitude', 'longitude'
+    else:
+        raise ValueError('ERROR -- no lat/lon or latitude/longitude dimensions found in data array.')
+
+def get_grid_signature(lat: np.ndarray, lon: np.ndarray) -> str:
+    """Creates a signature of a regular lat/lon grid.
+    Two grids with identical cell centers yield the same signature.
+
+    Args:
+        lat (np.ndarray): latitude of cell centers.
+        lon (np.ndarray): longitude of cell centers.
+
+    Returns:
+        str: hexadecimal signature of the grid.
+    """
+
+    h = hashlib.sha1()
+    for coords in [lat, lon]:
+        coords = np.round(np.asarray(coords, dtype=np.float64), 8)
+        h.update(str(coords.size).encode())
+        h.update(coords.tobytes())
+
+    return h.hexdigest()
+
+def calc_cell_bounds(coords: np.ndarray) -> np.ndarray:
+    """Derives the lower and upper bounds of grid cells from their center coordinates.
+    Works for both ascending and descending coordinates.
+
+    Args:
+        coords (np.ndarray): center coordinates of grid cells along one dimension.
+
+    Returns:
+        np.ndarray: array of shape (n, 2) with lower and upper bound per cell.
+    """
+
+    coords = np.asarray(coords, dtype=np.float64)
+
+    if coords.size == 1:
+        raise ValueError('ERROR -- cannot derive cell bounds from a single coordinate.')
+
+    # edges are placed halfway between cell centers and extrapolated at both ends
+    mid = 0.5 * (coords[1:] + coords[:-1])
+    first = coords[0] - (mid[0] - coords[0])
+    last = coords[-1] + (coords[-1] - mid[-1])
+    edges = np.concatenate([[first], mid, [last]])
+
+    bounds = np.stack([np.minimum(edges[:-1], edges[1:]), np.maximum(edges[:-1], edges[1:])], axis=1)
+
+    return bounds
+
+def calc_cell_area(lat: np.ndarray, lon: np.ndarray, radius=6371007.2) -> np.ndarray:
+    """Computes the area of the cells of a regular lat/lon grid on the sphere.
+
+    Args:
+        lat (np.ndarray): latitude of cell centers.
+        lon (np.ndarray): longitude of cell centers.
+        radius (float, optional): radius of the sphere in m. Defaults to the authalic radius of the earth, 6371007.2 m.
+
+    Returns:
+        np.ndarray: array of shape (n_lat, n_lon) with cell area in m2.
+    """
+
+    lat_bounds = np.sin(np.deg2rad(np.clip(calc_cell_bounds(lat), -90, 90)))
+    lon_bounds = np.deg2rad(calc_cell_bounds(lon))
+
+    area = radius ** 2 * np.outer(lat_bounds[:, 1] - lat_bounds[:, 0], lon_bounds[:, 1] - lon_bounds[:, 0])
+
+    return area
+
+def calc_overlap_matrix(src_bounds: np.ndarray, dst_bounds: np.ndarray) -> scipy.sparse.csr_matrix:
+    """Computes the overlap between source and destination cells along one dimension.
+
+    Args:
+        src_bounds (np.ndarray): array of shape (n_src, 2) with cell bounds of source grid.
+        dst_bounds (np.ndarray): array of shape (n_dst, 2) with cell bounds of destination grid.
+
+    Returns:
+        scipy.sparse.csr_matrix: matrix of shape (n_dst, n_src) with overlapping length per cell pair.
+    """
+
+    # sort source cells by lower bound so that candidate cells can be found with a binary search
+    order = np.argsort(src_bounds[:, 0])
+    src_lo = src_bounds[order, 0]
+    src_hi = src_bounds[order, 1]
+
+    rows, cols, vals = list(), list(), list()
+
+    for i, (lo, hi) in enumerate(dst_bounds):
+
+        # all source cells starting before the upper bound of the destination cell are candidates
+        end = np.searchsorted(src_lo, hi, side='left')
+        overlap = np.minimum(src_hi[:end], hi) - np.maximum(src_lo[:end], lo)
+        idx = np.nonzero(overlap > 0)[0]
+
+        rows.append(np.full(idx.size, i))
+        cols.append(order[idx])
+        vals.append(overlap[idx])
+
+    W = scipy.sparse.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                                shape=(len(dst_bounds), len(src_bounds)))
+
+    return W
+
+def calc_conservative_weights(src_lat: np.ndarray, src_lon: np.ndarray, dst_lat: np.ndarray, dst_lon: np.ndarray) -> scipy.sparse.csr_matrix:
+    """Computes conservative, area-weighted remapping weights between two regular lat/lon grids.
+    Each weight is proportional to the area on the sphere shared by a source and a destination cell.
+    Since both grids are regular, the weights are the Kronecker product of the overlap in latitude (in sine of latitude) and longitude.
+    Weights are not normalized here, this is done when applying them to account for missing values.
+
+    .. note::
+        Both grids are assumed to use the same longitude convention (i.e., either -180 to 180 or 0 to 360).
+
+    Args:
+        src_lat (np.ndarray): latitude of cell centers of source grid.
+        src_lon (np.ndarray): longitude of cell centers of source grid.
+        dst_lat (np.ndarray): latitude of cell centers of destination grid.
+        dst_lon (np.ndarray): longitude of cell centers of destination grid.
+
+    Returns:
+        scipy.sparse.csr_matrix: matrix of shape (n_dst_cells, n_src_cells) with cells flattened in row-major order.
+    """
+
+    # on the sphere, cell area is proportional to the difference in sine of latitude
+    src_lat_bounds = np.sin(np.deg2rad(np.clip(calc_cell_bounds(src_lat), -90, 90)))
+    dst_lat_bounds = np.sin(np.deg2rad(np.clip(calc_cell_bounds(dst_lat), -90, 90)))
+
+    W_lat = calc_overlap_matrix(src_lat_bounds, dst_lat_bounds)
+    W_lon = calc_overlap_matrix(calc_cell_bounds(src_lon), calc_cell_bounds(dst_lon))
+
+    W = scipy.sparse.kron(W_lat, W_lon, format='csr')
+
+    return W
+
+def get_weights(src_da: xr.DataArray, dst_da: xr.DataArray, weights_dir=None, verbose=False) -> scipy.sparse.csr_matrix:
+    """Returns conservative remapping weights from the grid of 'src_da' to the grid of 'dst_da'.
+    If 'weights_dir' is specified, weights are stored there as sparse matrix keyed by the signatures of both grids.
+    Previously stored weights are re-used, such that they are computed only once per pair of grids.
+
+    Args:
+        src_da (xr.DataArray): data array on source grid.
+        dst_da (xr.DataArray): data array on destination grid.
+        weights_dir (str, optional): folder where weights are stored. If None, weights are not stored. Defaults to None.
+        verbose (bool, optional): whether or not to print more info. Defaults to False.
+
+    Returns:
+        scipy.sparse.csr_matrix: remapping weights.
+    """
+
+    src_lat_dim, src_lon_dim = get_spatial_dims(src_da)
+    dst_lat_dim, dst_lon_dim = get_spatial_dims(dst_da)
+
+    src_lat, src_lon = src_da[src_lat_dim].values, src_da[src_lon_dim].values
+    dst_lat, dst_lon = dst_da[dst_lat_dim].values, dst_da[dst_lon_dim].values
+
+    key = '{}_{}'.format(get_grid_signature(src_lat, src_lon)[:16], get_grid_signature(dst_lat, dst_lon)[:16])
+
+    if weights_dir != None:
+        weights_dir = os.path.abspath(weights_dir)
+        fo = os.path.join(weights_dir, 'conservative_{}.npz'.format(key))
+        if os.path.isfile(fo):
+            if verbose: click.echo('VERBOSE -- loading remapping weights from {}.'.format(fo))
+            return scipy.sparse.load_npz(fo).tocsr()
+
+    click.echo('INFO -- computing conservative remapping weights.')
+    W = calc_conservative_weights(src_lat, src_lon, dst_lat, dst_lon)
+
+    if weights_dir != None:
+        os.makedirs(weights_dir, exist_ok=True)
+        click.echo('INFO -- storing remapping weights to {}.'.format(fo))
+        # write to temporary file first so that concurrent runs never read a partial file
+        tmp = os.path.join(weights_dir, '.conservative_{}_{}.npz'.format(key, os.getpid()))
+        scipy.sparse.save_npz(tmp, W)
+        os.replace(tmp, fo)
+
+    return W
+
+def regrid_conservative(src_da: xr.DataArray, dst_da: xr.DataArray, weights=None, weights_dir=None, chunk_size=12, out_file=None, verbose=False) -> xr.DataArray:
+    """Regrids a data array conservatively onto the grid of another data array.
+    The remapping is applied as sparse matrix multiplication, chunk-wise along the time dimension.
+    Missing values in the source data are accounted for by normalizing with the valid area per destination cell.
+    If an output file is specified, each chunk is written to it directly and the regridded data is returned as lazily loaded data array from this file.
+    Otherwise, or if the data has no time dimension, the regridded data is returned in memory.
+
+    Args:
+        src_da (xr.DataArray): data array to be regridded.
+        dst_da (xr.DataArray): data array defining the destination grid.
+        weights (scipy.sparse.csr_matrix, optional): pre-computed remapping weights. If None, they are retrieved with 'get_weights'. Defaults to None.
+        weights_dir (str, optional): folder where weights are stored. Defaults to None.
+        chunk_size (int, optional): number of time steps regridded at once. Defaults to 12.
+        out_file (str, optional): path to netCDF-file to which regridded data is written. Defaults to None.
+        verbose (bool, optional): whether or not to print more info. Defaults to False.
+
+    Returns:
+        xr.DataArray: regridded data array on the destination grid.
+    """
+
+    if weights is None:
+        weights = get_weights(src_da, dst_da, weights_dir=weights_dir, verbose=verbose)
+
+    src_lat_dim, src_lon_dim = get_spatial_dims(src_da)
+    dst_lat_dim, dst_lon_dim = get_spatial_dims(dst_da)
+    ny, nx = dst_da[dst_lat_dim].size, dst_da[dst_lon_dim].size
+
+    has_time = 'time' in src_da.dims
+    if has_time:
+        src_da = src_da.transpose('time', src_lat_dim, src_lon_dim)
+    else:
+        src_da = src_da.transpose(src_lat_dim, src_lon_dim).expand_dims('time')
+
+    nt = src_da.sizes['time']
+    var_name = src_da.name if src_da.name != None else 'regridded'
+
+    if not has_time:
+        out_file = None
+
+    if out_file != None:
+        out_file = os.path.abspath(out_file)
+        click.echo('INFO -- writing regridded data to {}.'.format(out_file))
+        nc = pcrglobwb_utils.io.create_netcdf(out_file, dst_da[dst_lat_dim].values, dst_da[dst_lon_dim].values, [var_name], lat_dim=dst_lat_dim, lon_dim=dst_lon_dim, dtype='f8',
+                                              attrs={'history': 'regridded conservatively with pcrglobwb_utils version {}'.format(pcrglobwb_utils.__version__)})
+    else:
+        out = np.full((nt, ny * nx), np.nan, dtype=np.float64)
+
+    try:
+        for start in range(0, nt, chunk_size):
+
+            if verbose: click.echo('VERBOSE -- regridding time steps {} to {}.'.format(start, min(start + chunk_size, nt)))
+
+            block = src_da.isel(time=slice(start, start + chunk_size))
+            times = block['time'].values if has_time else None
+            block = block.values
+            block = block.reshape(block.shape[0], -1).T
+
+            valid = ~np.isnan(block)
+            num = weights @ np.where(valid, block, 0.0)
+            den = weights @ valid.astype(np.float64)
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                regridded = np.where(den > 0, num / den, np.nan).T
+
+            if out_file != None:
+                pcrglobwb_utils.io.write_netcdf_block(nc, start, times, {var_name: regridded.reshape(-1, ny, nx)})
+            else:
+                out[start:start + chunk_size] = regridded
+    finally:
+        if out_file != None:
+            nc.close()
+
+    if out_file != None:
+        da = xr.open_dataset(out_file)[var_name]
+        da.attrs = src_da.attrs
+        return da
+
+    coords = {dst_lat_dim: dst_da[dst_lat_dim].values, dst_lon_dim: dst_da[dst_lon_dim].values}
+    if has_time:
+        coords['time'] = src_da['time'].values
+        da = xr.DataArray(out.reshape(nt, ny, nx), coords=coords, dims=('time', dst_lat_dim, dst_lon_dim), name=src_da.name, attrs=src_da.attrs)
+    else:
+        da = xr.DataArray(out.reshape(ny, nx), coords=coords, dims=(dst_lat_dim, dst_lon_dim), name=src_da.name, attrs=src_da.attrs)
+
+    return da
@@ -19,12 +19,18 @@ import click
 @click.option('-om', '--obs-masks', default=None, help='path to file with pickled paths to preprocessed masks per polygon for observations.', type=str)
 @click.option('-sm', '--sim-masks', default=None, help='path to file with pickled paths to preprocessed masks per polygon for simulations.', type=str)
 @click.option('--anomaly/--no-anomaly', default=False, help='whether or not to compute anomalies of simulations.')
+@click.option('-at', '--anomaly-type', default='mean', help='type of anomalies (only used with --anomaly): "mean" subtracts the mean of the zonal series of simulations, "monthly" and "dayofyear" subtract the gridded climatology of both observations and simulations.', type=click.Choice(['mean', 'monthly', 'dayofyear']))
 @click.option('--sim-log/--no-sim-log', default=False, help='whether or not to compute log10 of simulations.')
 @click.option('--obs-log/--no-obs-log', default=False, help='whether or not to compute log10 of observations.')
-@click.option('--plot/--no-plot', default=False, help='whether or not to save a simple plot of results.')
+@click.option('--regrid/--no-regrid', default=False, help='whether or not to regrid observations conservatively to grid of simulations.')
+@click.option('-wd', '--weights-dir', default=None, help='folder where remapping weights are stored and re-used (only used with --regrid).', type=str)
+@click.option('-cd', '--cache-dir', default=None, help='folder where zonal series per polygon are cached and re-used in later runs. Must not be inside OUT.', type=str)
+@click.option('--resume/--no-resume', default=False, help='resume an interrupted run with identical settings in OUT, polygons evaluated already are skipped.')
+@click.option('-vf', '--vector-format', default='geojson', help='format of file with polygons and scores: GeoJSON, FlatGeobuf, or GeoParquet.', type=click.Choice(['geojson', 'fgb', 'parquet']))
+@click.option('--plot/--no-plot', default=False, help='whether or not to save a simple plot of results. Can also be done later with pcru_plot.')
 @click.option('--verbose/--no-verbose', default=False, help='more or less print output.')
 
-def main(ply, sim, obs, out, ply_id, obs_var_name, sim_var_name, obs_masks, sim_masks, time_step, number_processes, anomaly, conversion_factor, coordinate_system, obs_log, sim_log, plot, verbose):
+def main(ply, sim, obs, out, ply_id, obs_var_name, sim_var_name, obs_masks, sim_masks, time_step, number_processes, anomaly, anomaly_type, conversion_factor, coordinate_system, obs_log, sim_log, plot, verbose, regrid, weights_dir, cache_dir, resume, vector_format):
     """
 
     Computes r, MSE, and RMSE for multiple polygons as provided by a shape-file between simulated and observed data.
@@ -34,7 +40,7 @@ def main(ply, sim, obs, out, ply_id, obs_var_name, sim_var_name, obs_masks, sim_
     Returns a GeoJSON-file of r, MSE, and RMSE per polygon, and if specified as simple plot. 
     Also returns scores of r, MSE, RMSE, and RRMSE per polygon as dataframe.
     
-    PLY: path to shp-file or geojson-file with one or more polygons.
+    PLY: path to shp-file, geojson-file, FlatGeobuf-file, or GeoParquet-file with one or more polygons.
 
     SIM: path to netCDF-file with simulated data.
 
@@ -44,5 +50,5 @@ def main(ply, sim, obs, out, ply_id, obs_var_name, sim_var_name, obs_masks, sim_
 
     """  
 
-    pcrglobwb_utils.eval.POLY(ply, sim, obs, out, ply_id, obs_var_name, sim_var_name, obs_masks, sim_masks, time_step, number_processes, anomaly, conversion_factor, coordinate_system, obs_log, sim_log, plot, verbose)
+    pcrglobwb_utils.eval.POLY(ply, sim, obs, out, ply_id, obs_var_name, sim_var_name, obs_masks, sim_masks, time_step, number_processes, anomaly, conversion_factor, coordinate_system, obs_log, sim_log, plot, verbose, regrid=regrid, weights_dir=weights_dir, cache_dir=cache_dir, anomaly_type=anomaly_type, resume=resume, vector_format=vector_format)
 
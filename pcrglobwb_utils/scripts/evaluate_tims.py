@@ -20,9 +20,14 @@ def cli():
 @click.option('-sf', '--selection-file', default=None, help='path to file produced by pcru_sel_grdc function (only used with -f option)', type=str)
 @click.option('-t', '--time-scale', default=None, help='time scale at which analysis is performed if resampling is desired. String needs to follow pandas conventions.', type=str)
 @click.option('-N', '--number-processes', default=None, help='number of processes to be used in multiprocessing.Pool()', type=int)
+@click.option('--signatures/--no-signatures', default=False, help='compute hydrological signatures (FDC slope, Q5, Q95, BFI) and their errors per station.')
+@click.option('-of', '--output-format', default='csv', help='format of evaluated timeseries: csv-files per station, or a single netCDF-file or Parquet-file for all stations.', type=click.Choice(['csv', 'netcdf', 'parquet']))
+@click.option('--resume/--no-resume', default=False, help='resume an interrupted run with identical settings in OUT, stations evaluated already are skipped.')
+@click.option('-vf', '--vector-format', default='geojson', help='format of file with scores per location: GeoJSON, FlatGeobuf, or GeoParquet.', type=click.Choice(['geojson', 'fgb', 'parquet']))
+@click.option('-cat', '--catalog', default=None, help='path to station catalog created with build-catalog. If provided, it is refreshed and station properties are taken from it (only used with -f option)', type=str)
 @click.option('--verbose/--no-verbose', default=False, help='more or less print output.')
 
-def GRDC(ncf, var_name, out, data_loc, grdc_column, window, encoding, selection_file, time_scale, number_processes, verbose):
+def GRDC(ncf, var_name, out, data_loc, grdc_column, window, encoding, selection_file, time_scale, number_processes, signatures, output_format, resume, vector_format, catalog, verbose):
     """Uses pcrglobwb_utils to validate simulated time series (currently only discharge is supported) 
     with observations (currently only GRDC) for one or more stations. The station name and file with GRDC data
     need to be provided in a separate yml-file. Per station, it is also possible to provide lat/lon coordinates
@@ -36,12 +41,12 @@ def GRDC(ncf, var_name, out, data_loc, grdc_column, window, encoding, selection_
 
     NCF: Path to the netCDF-file with simulations.
 
-    DATA_LOC: either yaml-file or folder with GRDC files.
+    DATA_LOC: either yaml-file, folder with GRDC files, or observation store created with 'pcru_preprocess pack-obs-store'.
         
     OUT: Main output directory. Per station, a sub-directory will be created.
     """   
 
-    pcrglobwb_utils.eval.GRDC(ncf, out, var_name, data_loc, grdc_column=grdc_column, search_window=window, encoding=encoding, selection_file=selection_file, time_scale=time_scale, number_processes=number_processes, verbose=verbose)
+    pcrglobwb_utils.eval.GRDC(ncf, out, var_name, data_loc, grdc_column=grdc_column, search_window=window, encoding=encoding, selection_file=selection_file, time_scale=time_scale, number_processes=number_processes, signatures=signatures, output_format=output_format, resume=resume, vector_format=vector_format, catalog=catalog, verbose=verbose)
 
 #------------------------------
 
@@ -54,9 +59,15 @@ def GRDC(ncf, var_name, out, data_loc, grdc_column, window, encoding, selection_
 @click.option('-w', '--window', default=5, help='size of search window to be applied.', type=int)
 @click.option('-sf', '--selection-file', default=None, help='file containing only selected stations to be considered', type=str)
 @click.option('-N', '--number-processes', default=None, help='number of processes to be used in multiprocessing.Pool()', type=int)
+@click.option('--update-props/--no-update-props', default=False, help='update longitude, latitude, and area of stations with snapped values from selection file.')
+@click.option('--signatures/--no-signatures', default=False, help='compute hydrological signatures (FDC slope, Q5, Q95, BFI) and their errors per station.')
+@click.option('-of', '--output-format', default='csv', help='format of evaluated timeseries: csv-files per station, or a single netCDF-file or Parquet-file for all stations.', type=click.Choice(['csv', 'netcdf', 'parquet']))
+@click.option('--resume/--no-resume', default=False, help='resume an interrupted run with identical settings in OUT, stations evaluated already are skipped.')
+@click.option('-vf', '--vector-format', default='geojson', help='format of file with scores per location: GeoJSON, FlatGeobuf, or GeoParquet.', type=click.Choice(['geojson', 'fgb', 'parquet']))
+@click.option('-cat', '--catalog', default=None, help='path to station catalog created with build-catalog. If provided, it is refreshed and station properties are taken from it (only used with -f option)', type=str)
 @click.option('--verbose/--no-verbose', default=False, help='more or less print output.')
 
-def GSIM(ncf, var_name, out, data_loc, gsim_column, window, selection_file, number_processes, verbose):
+def GSIM(ncf, var_name, out, data_loc, gsim_column, window, selection_file, number_processes, update_props, signatures, output_format, resume, vector_format, catalog, verbose):
     """Uses pcrglobwb_utils to validate simulated time series (currently only discharge is supported) 
     with GSIM observations or one or more stations. The station name and file with GSIM data
     need to be provided in a separate yml-file. Per station, it is also possible to provide lat/lon coordinates
@@ -69,12 +80,12 @@ def GSIM(ncf, var_name, out, data_loc, gsim_column, window, selection_file, numb
 
     NCF: Path to the netCDF-file with simulations.
 
-    DATA_LOC: either yaml-file or folder with GRDC files.
+    DATA_LOC: either yaml-file, folder with GSIM files, or observation store created with 'pcru_preprocess pack-obs-store'.
         
     OUT: Main output directory. Per station, a sub-directory will be created.
     """   
 
-    pcrglobwb_utils.eval.GSIM(ncf, out, var_name, data_loc, gsim_column=gsim_column, search_window=window, selection_file=selection_file, time_scale='M', number_processes=number_processes, verbose=verbose)
+    pcrglobwb_utils.eval.GSIM(ncf, out, var_name, data_loc, gsim_column=gsim_column, search_window=window, selection_file=selection_file, time_scale='M', number_processes=number_processes, update_props=update_props, signatures=signatures, output_format=output_format, resume=resume, vector_format=vector_format, catalog=catalog, verbose=verbose)
 
 #------------------------------
 
@@ -86,11 +97,12 @@ def GSIM(ncf, var_name, out, data_loc, gsim_column, window, selection_file, numb
 @click.option('-v', '--var-name', help='variable name in netCDF-file', default='discharge', type=str)
 @click.option('-id', '--location-id', help='unique identifier in locations file.', default='name', type=str)
 @click.option('-t', '--time-scale', default=None, help='time scale at which analysis is performed if upscaling is desired: month, year', type=str)
-@click.option('--plot/--no-plot', default=False, help='simple output plots.')
+@click.option('--plot/--no-plot', default=False, help='simple output plots, rendered after all stations are evaluated. Can also be done later with pcru_plot.')
 @click.option('--geojson/--no-geojson', default=True, help='create GeoJSON file with KGE per GRDC station.')
+@click.option('-N', '--number-processes', default=None, help='number of processes to be used in multiprocessing.Pool() for plotting.', type=int)
 @click.option('--verbose/--no-verbose', default=False, help='more or less print output.')
 
-def EXCEL(ncf, xls, loc, out, var_name, location_id, time_scale, plot, geojson, verbose):
+def EXCEL(ncf, xls, loc, out, var_name, location_id, time_scale, plot, geojson, number_processes, verbose):
     """Uses pcrglobwb_utils to validate simulated time series
     with observations for one or more stations. The station names and their locations need to be provided via geojson-file.
     Observations are read from Excel-file and analysis will be performed for all stations with matching names in Excel-file columns and geojson-file.
@@ -113,5 +125,5 @@ def EXCEL(ncf, xls, loc, out, var_name, location_id, time_scale, plot, geojson,
 
     """
 
-    pcrglobwb_utils.eval.EXCEL(ncf, xls, loc, out, var_name, location_id, time_scale, plot, geojson, verbose)
+    pcrglobwb_utils.eval.EXCEL(ncf, xls, loc, out, var_name, location_id, time_scale, plot, geojson, verbose, number_processes=number_processes)
 #------------------------------
\ No newline at end of file
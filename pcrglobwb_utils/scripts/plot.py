@@ -0,0 +1,20 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import pcrglobwb_utils
+import click
+
+@click.command()
+@click.argument('out',)
+@click.option('-N', '--number-processes', default=None, help='number of processes to be used in multiprocessing.Pool()', type=int)
+@click.option('-dpi', '--dpi', default=300, help='resolution of figures.', type=int)
+@click.option('--verbose/--no-verbose', default=False, help='more or less print output.')
+
+def main(out, number_processes, dpi, verbose):
+    """Renders figures from the saved results of an evaluation, such that plotting can be deferred until after evaluation.
+    Plotted are the evaluated timeseries per station (of pcru_eval_tims) and the maps of scores per polygon (of pcru_eval_poly).
+
+    OUT: output folder of the evaluation. Figures are saved next to the results.
+    """
+
+    pcrglobwb_utils.plotting.plot_output(out, number_processes=number_processes, dpi=dpi, verbose=verbose)
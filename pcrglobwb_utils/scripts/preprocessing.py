@@ -40,10 +40,12 @@ def create_POLY_mask(ncf, poly, out, var_name, out_file_name, poly_id, crs_syste
 @click.option('-ts_end', '--timeseries-end', default='1900-01', help='end date of observed timeseries to be considered in selection (format="YYYY-MM")', type=str)
 @click.option('-gc', '--grdc-column', default=' Calculated', help='name of column in GRDC file to be read', type=str)
 @click.option('-e', '--encoding', default='ISO-8859-1', help='encoding of GRDC-files.', type=str)
+@click.option('-N', '--number-processes', default=None, help='number of processes to be used in multiprocessing.Pool() for reading GRDC-files.', type=int)
+@click.option('-cat', '--catalog', default=None, help='path to station catalog created with build-catalog. If provided, it is refreshed and queried instead of reading all GRDC-files.', type=str)
 @click.option('--geojson/--no-geojson', default=True, help='create GeoJSON file with KGE per GRDC station.')
 @click.option('--verbose/--no-verbose', default=False, help='more or less print output.')
 
-def select_GRDC_stations(in_dir, out, grdc_column, verbose, encoding, cat_area_thld, nr_years_thld, timeseries_end, timeseries_start, geojson):
+def select_GRDC_stations(in_dir, out, grdc_column, verbose, encoding, cat_area_thld, nr_years_thld, timeseries_end, timeseries_start, geojson, number_processes, catalog):
     """This simple function can be run to select GRDC stations based on their properties.
     This can be handy to reduce the number of stations to evaluate in a subsequent step.
     The properties on which selection critieria can be applied are upstream area, number of years of data record, and end date of data record.
@@ -56,4 +58,47 @@ def select_GRDC_stations(in_dir, out, grdc_column, verbose, encoding, cat_area_t
     OUT_DIR: path to folder where txt-file is written.
     """    
 
-    pcrglobwb_utils.pre.select_grdc_stations(in_dir, out, grdc_column, verbose, encoding, cat_area_thld, nr_years_thld, timeseries_end, timeseries_start, geojson)
\ No newline at end of file
+    pcrglobwb_utils.pre.select_grdc_stations(in_dir, out, grdc_column, verbose, encoding, cat_area_thld, nr_years_thld, timeseries_end, timeseries_start, geojson, number_processes=number_processes, catalog=catalog)
+
+@cli.command()
+@click.argument('in_dir')
+@click.argument('catalog')
+@click.option('-s', '--source', default='GRDC', help='type of station files in IN_DIR.', type=click.Choice(['GRDC', 'GSIM']))
+@click.option('-e', '--encoding', default=None, help='encoding of station files. Defaults to ISO-8859-1 for GRDC and UTF-8 for GSIM.', type=str)
+@click.option('-N', '--number-processes', default=None, help='number of processes to be used in multiprocessing.Pool() for reading files.', type=int)
+@click.option('--verbose/--no-verbose', default=False, help='more or less print output.')
+
+def build_catalog(in_dir, catalog, source, encoding, number_processes, verbose):
+    """Builds or refreshes a catalog with the header properties of all GRDC or GSIM files in a folder.
+    The catalog is a SQLite-file which also stores path, size and modification time per file.
+    When run again, only new or modified files are read.
+
+    IN_DIR: path to folder where GRDC- or GSIM-files are located.
+
+    CATALOG: path to SQLite-file containing the catalog.
+    """
+
+    df = pcrglobwb_utils.catalog.build_catalog(in_dir, catalog, source=source, encoding=encoding, number_processes=number_processes, verbose=verbose)
+
+    click.echo('INFO -- catalog contains {} {} stations from folder {}.'.format(len(df), source, in_dir))
+
+@cli.command()
+@click.argument('in_dir')
+@click.argument('out_file')
+@click.option('-s', '--source', default='GRDC', help='type of station files in IN_DIR.', type=click.Choice(['GRDC', 'GSIM']))
+@click.option('-c', '--column', default=None, help='name of column in station files to be stored. Defaults to " Value" for GRDC and "MEAN" for GSIM.', type=str)
+@click.option('-e', '--encoding', default='ISO-8859-1', help='encoding of GRDC-files.', type=str)
+@click.option('-N', '--number-processes', default=None, help='number of processes to be used in multiprocessing.Pool() for reading files.', type=int)
+@click.option('--verbose/--no-verbose', default=False, help='more or less print output.')
+
+def pack_obs_store(in_dir, out_file, source, column, encoding, number_processes, verbose):
+    """Packs all GRDC or GSIM files in a folder into a single observation store.
+    The store is a netCDF-file with all timeseries stored as contiguous ragged array.
+    It can be used instead of the folder when evaluating with 'pcru_eval_tims', such that no text files need to be parsed.
+
+    IN_DIR: path to folder where GRDC- or GSIM-files are located.
+
+    OUT_FILE: path to netCDF-file to which the store is written.
+    """
+
+    pcrglobwb_utils.pre.pack_obs_store(in_dir, out_file, source=source, col_name=column, encoding=encoding, number_processes=number_processes, verbose=verbose)
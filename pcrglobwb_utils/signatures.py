@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import pandas as pd
+import numpy as np
+
+# signatures computed per timeseries, in order of output
+SIGNATURES = ['FDC_slope', 'Q5', 'Q95', 'BFI']
+
+def sort_values(values: np.ndarray) -> tuple:
+    """Sorts each timeseries (row) of a 2D-array of timeseries ascending, with missing values placed at the end.
+    The sorted array can be used to compute several quantiles without sorting again.
+
+    Args:
+        values (np.ndarray): array of shape (n_series, n_time).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: sorted values; number of valid values per timeseries.
+    """
+
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+
+    # numpy sorts NaN to the end
+    sorted_values = np.sort(values, axis=1)
+    n_valid = np.sum(~np.isnan(values), axis=1)
+
+    return sorted_values, n_valid
+
+def get_quantile(sorted_values: np.ndarray, n_valid: np.ndarray, q: float) -> np.ndarray:
+    """Computes a quantile per timeseries from sorted values, interpolating linearly as numpy's default method.
+
+    Args:
+        sorted_values (np.ndarray): sorted values as returned by 'sort_values'.
+        n_valid (np.ndarray): number of valid values per timeseries as returned by 'sort_values'.
+        q (float): quantile between 0 and 1.
+
+    Returns:
+        np.ndarray: quantile per timeseries, NaN if there are no valid values.
+    """
+
+    rank = q * np.maximum(n_valid - 1, 0)
+    lower = np.floor(rank).astype(np.int64)
+    upper = np.minimum(lower + 1, np.maximum(n_valid - 1, 0))
+
+    lower_value = np.take_along_axis(sorted_values, lower[:, np.newaxis], axis=1)[:, 0]
+    upper_value = np.take_along_axis(sorted_values, upper[:, np.newaxis], axis=1)[:, 0]
+
+    quantile = lower_value + (rank - lower) * (upper_value - lower_value)
+
+    return np.where(n_valid > 0, quantile, np.nan)
+
+def calc_fdc_slope(sorted_values: np.ndarray, n_valid: np.ndarray, lower=0.33, upper=0.66) -> np.ndarray:
+    """Computes the slope of the flow duration curve between two exceedance probabilities, following Sawicz et al. (2011).
+    The slope is computed in log-space, such that timeseries with zero flow at one of the exceedance probabilities yield NaN.
+
+    Args:
+        sorted_values (np.ndarray): sorted values as returned by 'sort_values'.
+        n_valid (np.ndarray): number of valid values per timeseries as returned by 'sort_values'.
+        lower (float, optional): lower exceedance probability. Defaults to 0.33.
+        upper (float, optional): upper exceedance probability. Defaults to 0.66.
+
+    Returns:
+        np.ndarray: slope of flow duration curve per timeseries.
+    """
+
+    # flow exceeded with probability p is the (1 - p) quantile
+    q_lower = get_quantile(sorted_values, n_valid, 1 - lower)
+    q_upper = get_quantile(sorted_values, n_valid, 1 - upper)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = (np.log(q_lower) - np.log(q_upper)) / (upper - lower)
+
+    return np.where(np.isfinite(slope), slope, np.nan)
+
+def calc_baseflow(values: np.ndarray, alpha=0.925, passes=3) -> np.ndarray:
+    """Separates baseflow from timeseries with the recursive digital filter of Lyne and Hollick (1979).
+    The filter is applied alternately forward and backward in time, and recursion runs over time steps while all timeseries (rows) are filtered at once.
+    After a missing value, the filter is restarted.
+
+    Args:
+        values (np.ndarray): array of shape (n_series, n_time).
+        alpha (float, optional): filter parameter. Defaults to 0.925.
+        passes (int, optional): number of passes. Defaults to 3.
+
+    Returns:
+        np.ndarray: baseflow with same shape as 'values'.
+    """
+
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    baseflow = values.copy()
+
+    for i in range(passes):
+
+        # every second pass runs backward in time
+        q = baseflow if i % 2 == 0 else baseflow[:, ::-1]
+        quickflow = np.zeros_like(q)
+
+        for t in range(1, q.shape[1]):
+            qf = alpha * quickflow[:, t - 1] + 0.5 * (1 + alpha) * (q[:, t] - q[:, t - 1])
+            # quickflow can neither be negative nor exceed total flow
+            qf = np.clip(qf, 0, q[:, t])
+            quickflow[:, t] = np.where(np.isnan(qf), 0, qf)
+
+        bf = np.where(np.isnan(q), np.nan, q - quickflow)
+        baseflow = bf if i % 2 == 0 else bf[:, ::-1]
+
+    return baseflow
+
+def calc_bfi(values: np.ndarray, alpha=0.925, passes=3) -> np.ndarray:
+    """Computes the baseflow index, i.e. the ratio of baseflow and total flow, per timeseries.
+    Baseflow is separated with 'calc_baseflow'. Note that the baseflow index is best computed from daily timeseries.
+
+    Args:
+        values (np.ndarray): array of shape (n_series, n_time).
+        alpha (float, optional): filter parameter. Defaults to 0.925.
+        passes (int, optional): number of passes. Defaults to 3.
+
+    Returns:
+        np.ndarray: baseflow index per timeseries.
+    """
+
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    baseflow = calc_baseflow(values, alpha=alpha, passes=passes)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        bfi = np.nansum(baseflow, axis=1) / np.nansum(values, axis=1)
+
+    return np.where(np.isfinite(bfi), bfi, np.nan)
+
+def calc_signatures(values: np.ndarray) -> dict:
+    """Computes hydrological signatures for a 2D-array of timeseries.
+    Q5 is the flow exceeded 5% of the time (high flow), Q95 the flow exceeded 95% of the time (low flow).
+    All timeseries are sorted only once for the flow duration curve and the quantiles.
+
+    Args:
+        values (np.ndarray): array of shape (n_series, n_time).
+
+    Returns:
+        dict: array of values per signature, with one value per timeseries.
+    """
+
+    sorted_values, n_valid = sort_values(values)
+
+    dd = {'FDC_slope': calc_fdc_slope(sorted_values, n_valid),
+          'Q5': get_quantile(sorted_values, n_valid, 0.95),
+          'Q95': get_quantile(sorted_values, n_valid, 0.05),
+          'BFI': calc_bfi(values)}
+
+    return dd
+
+def calc_signature_scores(df: pd.DataFrame, obs_var_name: str, sim_var_name: str) -> dict:
+    """Computes hydrological signatures of observed and simulated timeseries plus the relative error of each signature.
+    Both timeseries are evaluated as one array, see 'calc_signature_scores_batch' to evaluate many stations at once.
+
+    Args:
+        df (pd.DataFrame): dataframe containing simulated and observed values.
+        obs_var_name (str): column name of observed values.
+        sim_var_name (str): column name of simulated values.
+
+    Returns:
+        dict: dictionary containing per signature the observed and simulated value as well as the relative error, rounded to three decimals.
+    """
+
+    return calc_signature_scores_batch([df[[obs_var_name, sim_var_name]]])[0]
+
+def calc_signature_scores_batch(dfs: list) -> list:
+    """Computes hydrological signatures and their relative errors for many stations in one call.
+    Per station, rows with missing values are dropped and the remaining values of both timeseries are placed in one row each of a single array, padded with NaN.
+    Since signatures only depend on the order of values, not on their dates, the results equal those of one call per station, but the time loop of the baseflow filter runs only once.
+
+    Args:
+        dfs (list): dataframes with observed values in the first and simulated values in the second column, one per station.
+
+    Returns:
+        list: dictionary per station as returned by 'calc_signature_scores'.
+    """
+
+    dfs = [df.iloc[:, :2].dropna() for df in dfs]
+    n_time = max([len(df) for df in dfs] + [1])
+
+    # observed and simulated values of station i are stored in rows 2i and 2i+1
+    values = np.full((2 * len(dfs), n_time), np.nan)
+    for i, df in enumerate(dfs):
+        values[2 * i: 2 * i + 2, :len(df)] = df.values.T
+
+    signatures = calc_signatures(values)
+
+    out = list()
+    for i in range(len(dfs)):
+        dd = dict()
+        for key in SIGNATURES:
+            obs, sim = signatures[key][2 * i], signatures[key][2 * i + 1]
+            dd['{}_obs'.format(key)] = obs
+            dd['{}_sim'.format(key)] = sim
+            with np.errstate(invalid='ignore', divide='ignore'):
+                dd['{}_err'.format(key)] = (sim - obs) / np.abs(obs)
+        out.append({key : round(float(dd[key]), 3) for key in dd})
+
+    return out
@@ -8,6 +8,7 @@ from pathlib import Path
 
 from . import time_funcs
 from . import eval
+from . import signatures as sigs
 
 ## OBJECT AND METHODS
 class from_nc:
@@ -338,7 +339,7 @@ def read_at_coords(ds_obs: xr.Dataset, lon: float, lat: float, var_name='dischar
 
     return df
 
-def validate_timeseries(df_sim: pd.DataFrame, df_obs: pd.DataFrame, out_dir: str, station: str, suffix=None, var_name_obs=None, var_name_sim=None, time_scale=None,return_all_KGE=False) -> dict:
+def validate_timeseries(df_sim: pd.DataFrame, df_obs: pd.DataFrame, out_dir: str, station: str, suffix=None, var_name_obs=None, var_name_sim=None, time_scale=None,return_all_KGE=False, signatures=False, return_timeseries=False) -> dict:
     """Validates two timeseries with each other, i.e., observations with simulations.
     Timeseries are stored in dataframes.
     If dataframes containg multiple columns, a column can be specified with 'var_name_obs' and 'var_name_sim', respectively.
@@ -348,20 +349,23 @@ def validate_timeseries(df_sim: pd.DataFrame, df_obs: pd.DataFrame, out_dir: str
     Args:
         df_sim (pd.DataFrame): dataframe containing simulated timeseries.
         df_obs (pd.DataFrame): dataframe containing observed timeseries.
-        out_dir (str): directory where to store csv-files of timeseries and metrics.
+        out_dir (str): directory where to store csv-files of timeseries and metrics. If None, no files are written.
         station (str): name of station or location where simulation is evaluated. Can also be any form of unique ID.
         suffix (str, optional): suffix to be added to csv-files. Defaults to None.
         var_name_obs (str, optional): column name in 'df_obs' containing timeseries. Defaults to None.
         var_name_sim (str, optional): column name in 'df_sim' containing timeseries. Defaults to None.
         time_scale (str, optional):
         return_all_KGE (bool, optional): whether or not to return all components of the KGE. Defaults to False.
+        signatures (bool, optional): whether or not to add hydrological signatures of both timeseries and their relative errors. Defaults to False.
+        return_timeseries (bool, optional): whether or not to also return the evaluated timeseries, e.g. to write them to a single file for all stations. Defaults to False.
 
     Returns:
-        dict: dictionary containing evaluation metric values.
+        dict: dictionary containing evaluation metric values. If 'return_timeseries' is True, also the dataframe with evaluated timeseries is returned.
     """
 
     # create output folder, if needed
-    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    if out_dir != None:
+        Path(out_dir).mkdir(parents=True, exist_ok=True)
 
     # if variable name is not None, then pick values from specified column
     if var_name_obs != None:
@@ -378,8 +382,8 @@ def validate_timeseries(df_sim: pd.DataFrame, df_obs: pd.DataFrame, out_dir: str
 
     if time_scale != None:
         click.echo('INFO -- Resampling timeseries to period {}'.format(time_scale))
-        df_obs = time_funcs.resample_time(df_obs, resampling_period=time_scale).mean()
-        df_sim = time_funcs.resample_time(df_sim, resampling_period=time_scale).mean()
+        df_obs = time_funcs.resample_frame(df_obs, time_scale, stat_func='mean')
+        df_sim = time_funcs.resample_frame(df_sim, time_scale, stat_func='mean')
     
     # concatenate both dataframes
     try:
@@ -394,7 +398,9 @@ def validate_timeseries(df_sim: pd.DataFrame, df_obs: pd.DataFrame, out_dir: str
     if both.empty:
         warnings.warn('WARNING: no common time period of observed and simulated values found in dataframes!')
 
-    if suffix != None:
+    if out_dir == None:
+        pass
+    elif suffix != None:
         both.to_csv(os.path.join(out_dir, 'evaluated_timeseries_{}.csv'.format(suffix)))
     else:
         both.to_csv(os.path.join(out_dir, 'evaluated_timeseries.csv'))
@@ -409,15 +415,23 @@ def validate_timeseries(df_sim: pd.DataFrame, df_obs: pd.DataFrame, out_dir: str
     # # apply objective functions
     metrics_dict = eval.calc_metrics(both_noMV, both_noMV.columns[0], both_noMV.columns[1], return_all=return_all_KGE)
 
+    if signatures:
+        metrics_dict.update(sigs.calc_signature_scores(both_noMV, both_noMV.columns[0], both_noMV.columns[1]))
+
     # save dict to csv
     try:
         df_out = pd.DataFrame().from_dict(metrics_dict, columns=[station], orient='index')
     except:
         df_out = pd.DataFrame().from_dict(metrics_dict, columns=[station])
 
-    if suffix != None:
+    if out_dir == None:
+        pass
+    elif suffix != None:
         df_out.to_csv(os.path.join(out_dir, 'evaluation_{}.csv'.format(suffix)))
     else:
         df_out.to_csv(os.path.join(out_dir, 'evaluation.csv'))
 
+    if return_timeseries:
+        return metrics_dict, both
+
     return metrics_dict
\ No newline at end of file
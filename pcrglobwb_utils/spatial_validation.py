@@ -10,6 +10,9 @@ import datetime
 import spotpy
 import os, sys
 
+from . import regrid
+from . import time_funcs
+
 #TODO: remove all stupid print statements
 
 class validate_per_shape:
@@ -22,14 +25,18 @@ class validate_per_shape:
         shp_key (str): Column name in shp-file to be used as unique identifier per entry in shp-file.
         crs (str, optional): Definition of projection system in which validation takes place. Defaults to 'epsg:4326'.
         out_dir (str, optional): Path to output directory. In None, then no output is stored. Defaults to None.
+        regrid_obs (bool, optional): Whether or not to regrid observations conservatively to the grid of PCR-GLOBWB before clipping. Defaults to False.
+        weights_dir (str, optional): Path to folder where remapping weights are stored and re-used. Defaults to None.
     """      
 
-    def __init__(self, shp_fo, shp_key, crs='epsg:4326', out_dir=None):
+    def __init__(self, shp_fo, shp_key, crs='epsg:4326', out_dir=None, regrid_obs=False, weights_dir=None):
   
         self.shp_fo = shp_fo
         self.key = shp_key
         self.crs = crs
         self.out_dir = out_dir
+        self.regrid_obs = regrid_obs
+        self.weights_dir = weights_dir
 
         print('reading shp-file {}'.format(os.path.abspath(self.shp_fo)))
         self.extent_gdf = gpd.read_file(self.shp_fo, crs=self.crs)
@@ -66,6 +73,10 @@ class validate_per_shape:
         GLEAM_data = GLEAM_data.T
         PCR_data = PCR_ds[PCR_var_name] # m
         PCR_data = PCR_data  * convFactor # m * 1000 = mm
+
+        if self.regrid_obs:
+            print('regridding GLEAM data to PCR-GLOBWB grid')
+            GLEAM_data = regrid.regrid_conservative(GLEAM_data, PCR_data, weights_dir=self.weights_dir)
         
         GLEAM_idx = pd.to_datetime(pd.to_datetime(GLEAM_ds.time.values).strftime('%Y-%m'))
         GLEAM_daysinmonth = GLEAM_idx.daysinmonth.values
@@ -168,6 +179,10 @@ class validate_per_shape:
         PCR_data = PCR_ds[PCR_var_name] # m
         PCR_data = PCR_data  * convFactor # m * 100 = cm
 
+        if self.regrid_obs:
+            print('regridding GRACE data to PCR-GLOBWB grid')
+            GRACE_data = regrid.regrid_conservative(GRACE_data, PCR_data, weights_dir=self.weights_dir)
+
         GRACE_idx = pd.to_datetime(pd.to_datetime(GRACE_ds.time.values).strftime('%Y-%m'))
         PCR_idx = pd.to_datetime(pd.to_datetime(PCR_ds.time.values).strftime('%Y-%m'))
 
@@ -222,8 +237,8 @@ class validate_per_shape:
             PCR_df = pd.DataFrame(data=PCR_anomaly, index=PCR_idx, columns=['PCR data'])
 
             # accounting for missing values in time series (and thus missing index values!)
-            GRACE_df = GRACE_df.resample('D').mean().fillna(np.nan).resample('M').mean()
-            PCR_df = PCR_df.resample('D').mean().fillna(np.nan).resample('M').mean()
+            GRACE_df = time_funcs.fill_missing_periods(GRACE_df, 'M')
+            PCR_df = time_funcs.fill_missing_periods(PCR_df, 'M')
 
             GRACE_df = GRACE_df.loc[GRACE_df.index >= PCR_df.index.min()]
             GRACE_df = GRACE_df.loc[GRACE_df.index <= PCR_df.index.max()]
@@ -2,70 +2,53 @@
 # coding: utf-8
 
 import pandas as pd
+import numpy as np
 import click
 
-def resample_to_month(df: pd.DataFrame, stat_func='mean', suffix=None) -> pd.DataFrame:
+def resample_to_month(df: pd.DataFrame, stat_func='mean', suffix=None, min_valid_frac=None) -> pd.DataFrame:
     """Resamples a timeseries at sub-monthly time step to monthly values. 
     A range of monthly statistics can be chosen.
     If desired, the column name of the returned dataframe can contain a suffix for better distinguishment.
     By default, column names are unaltered.
+    All columns are resampled at once, see 'resample_frame'.
 
     Args:
         df (pd.DataFrame): dataframe containing timeseries. Note, only tested with dataframes containing one column.
         stat_func (str, optional): Statistical method to be used. Either 'mean', 'max', 'min' or 'sum'. Defaults to 'mean'.
         suffix (str, optional): Suffix to be added to column of returned dataframe. Defaults to None.
+        min_valid_frac (float, optional): minimum fraction of valid values per period, otherwise the period is set to NaN. Defaults to None.
 
     Returns:
         pd.DataFrame: dataframe containing resampled timeseries.
     """
 
-    df = resample_time(df, 'M')
-
     click.echo('INFO -- resampling data to monthly time scale.')
-    if stat_func == 'mean':
-        df = df.mean()
-    elif stat_func == 'max':
-        df = df.max()
-    elif stat_func == 'min':
-        df = df.min()
-    elif stat_func == 'sum':
-        df = df.sum()
-    else:
-        raise ValueError('no supported statistical function provided - choose between mean, max, min or sum')
+    df = resample_frame(df, 'M', stat_func=stat_func, min_valid_frac=min_valid_frac)
 
     if suffix != None:
         df = df.add_suffix(suffix)
 
     return df
 
-def resample_to_annual(df: pd.DataFrame, stat_func='mean', suffix=None) -> pd.DataFrame:
+def resample_to_annual(df: pd.DataFrame, stat_func='mean', suffix=None, min_valid_frac=None) -> pd.DataFrame:
     """Resamples a timeseries at sub-annual time step to annual values. 
     A range of annual statistics can be chosen.
     If desired, the column name of the returned dataframe can contain a suffix for better distinguishment.
     By default, column names are unaltered.
+    All columns are resampled at once, see 'resample_frame'.
 
     Args:
         df (pd.DataFrame): dataframe containing timeseries. Note, only tested with dataframes containing one column.
         stat_func (str, optional): Statistical method to be used. Either 'mean', 'max', 'min' or 'sum'. Defaults to 'mean'.
         suffix (str, optional): Suffix to be added to column of returned dataframe. Defaults to None.
+        min_valid_frac (float, optional): minimum fraction of valid values per period, otherwise the period is set to NaN. Defaults to None.
 
     Returns:
         pd.DataFrame: dataframe containing resampled timeseries.
     """
 
-    df = resample_time(df, 'Y')
-
     click.echo('INFO -- resampling data to yearly time scale.')
-    if stat_func == 'mean':
-        df = df.mean()
-    elif stat_func == 'max':
-        df = df.max()
-    elif stat_func == 'min':
-        df = df.min()
-    elif stat_func == 'sum':
-        df = df.sum()
-    else:
-        raise ValueError('no supported statistical function provided - choose between mean, max, min or sum')
+    df = resample_frame(df, 'Y', stat_func=stat_func, min_valid_frac=min_valid_frac)
 
     if suffix != None:
         df = df.add_suffix(suffix)
@@ -89,6 +72,166 @@ def resample_time(df: pd.DataFrame, resampling_period: str) -> pd.DataFrame:
 
     return df
 
+def get_period_bounds(days: np.ndarray, freq: str) -> tuple[np.ndarray, pd.PeriodIndex]:
+    """Determines the periods of a sorted time axis and the index at which each period starts.
+
+    Args:
+        days (np.ndarray): sorted dates of time axis.
+        freq (str): period frequency following pandas conventions, e.g. 'M' or 'Y'.
+
+    Returns:
+        tuple[np.ndarray, pd.PeriodIndex]: index of first time step per period; periods.
+    """
+
+    periods = pd.PeriodIndex(pd.DatetimeIndex(days), freq=freq)
+
+    codes = periods.asi8
+    starts = np.flatnonzero(np.concatenate([[True], codes[1:] != codes[:-1]]))
+
+    return starts, periods[starts]
+
+def count_period_steps(periods: pd.PeriodIndex, days: np.ndarray) -> np.ndarray:
+    """Counts the number of time steps a complete period contains.
+    For a daily time axis, this is the number of days per period, for a monthly time axis the number of months.
+    For all other time axes, periods are assumed to be complete.
+
+    Args:
+        periods (pd.PeriodIndex): periods.
+        days (np.ndarray): sorted dates of time axis.
+
+    Returns:
+        np.ndarray: number of time steps per period.
+    """
+
+    step = np.median(np.diff(np.asarray(days, dtype='datetime64[D]')).astype(np.int64)) if len(days) > 1 else 1
+
+    if step <= 1:
+        return ((periods.end_time.normalize() - periods.start_time).days + 1).values
+    elif 28 <= step <= 31:
+        return (periods.end_time.to_period('M').asi8 - periods.start_time.to_period('M').asi8) + 1
+    else:
+        return None
+
+def resample_batch(values: np.ndarray, days: np.ndarray, freq='M', stat_func='mean', min_valid_frac=None) -> tuple[np.ndarray, pd.DatetimeIndex]:
+    """Resamples many timeseries sharing the same time axis in one go.
+    The boundaries of all periods are determined once, after which the statistic is computed per period for all series with a single reduction along the time axis.
+    Missing values (NaN) are ignored. As for pandas, periods without any valid value are NaN, except for 'sum' where they are 0.
+    Periods missing entirely from the time axis are inserted with NaN.
+
+    Args:
+        values (np.ndarray): array of shape (series, time) with values.
+        days (np.ndarray): sorted dates of time axis, shared by all series.
+        freq (str, optional): period frequency following pandas conventions, e.g. 'M' or 'Y'. Defaults to 'M'.
+        stat_func (str, optional): Statistical method to be used. Either 'mean', 'max', 'min' or 'sum'. Defaults to 'mean'.
+        min_valid_frac (float, optional): minimum fraction of valid values per period, otherwise the period is set to NaN. 
+                                          For daily and monthly time axes, the fraction refers to the complete period, otherwise to the time steps available. Defaults to None.
+
+    Returns:
+        tuple[np.ndarray, pd.DatetimeIndex]: array of shape (series, periods) with resampled values; end date of each period.
+    """
+
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+
+    if values.shape[1] != len(days):
+        raise ValueError('ERROR -- time axis has {} time steps, but values have {}.'.format(len(days), values.shape[1]))
+
+    if len(days) == 0:
+        return np.empty((values.shape[0], 0)), pd.DatetimeIndex([])
+
+    starts, periods = get_period_bounds(days, freq)
+
+    valid = ~np.isnan(values)
+    count = np.add.reduceat(valid, starts, axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if stat_func == 'mean':
+            out = np.add.reduceat(np.where(valid, values, 0.0), starts, axis=1) / count
+        elif stat_func == 'sum':
+            out = np.add.reduceat(np.where(valid, values, 0.0), starts, axis=1)
+        elif stat_func == 'max':
+            out = np.fmax.reduceat(values, starts, axis=1)
+        elif stat_func == 'min':
+            out = np.fmin.reduceat(values, starts, axis=1)
+        else:
+            raise ValueError('no supported statistical function provided - choose between mean, max, min or sum')
+
+    if min_valid_frac != None:
+        expected = count_period_steps(periods, days)
+        if expected is None:
+            expected = np.diff(np.append(starts, len(days)))
+        out[count < min_valid_frac * expected] = np.nan
+
+    # insert periods which are not on the time axis at all
+    full = pd.period_range(periods[0], periods[-1], freq=periods.freq)
+    if len(full) != len(periods):
+        out_full = np.full((values.shape[0], len(full)), 0.0 if (stat_func == 'sum') and (min_valid_frac == None) else np.nan)
+        out_full[:, periods.asi8 - full.asi8[0]] = out
+        out, periods = out_full, full
+
+    return out, periods.to_timestamp(how='end').normalize()
+
+def resample_frame(df: pd.DataFrame, freq: str, stat_func='mean', min_valid_frac=None) -> pd.DataFrame:
+    """Resamples all columns of a dataframe with datetime index at once, see 'resample_batch'.
+    Periods are labelled by their end date, as with pandas.
+    Frequencies which cannot be expressed as period, e.g. 'MS', and multiples of a frequency, e.g. '2M', are resampled with pandas.
+
+    Args:
+        df (pd.DataFrame): dataframe with datetime index, e.g. one column per station. A series is resampled as dataframe with one column.
+        freq (str): period frequency following pandas conventions, e.g. 'M' or 'Y'.
+        stat_func (str, optional): Statistical method to be used. Either 'mean', 'max', 'min' or 'sum'. Defaults to 'mean'.
+        min_valid_frac (float, optional): minimum fraction of valid values per period, otherwise the period is set to NaN. Defaults to None.
+
+    Returns:
+        pd.DataFrame: dataframe containing resampled timeseries.
+    """
+
+    if isinstance(df, pd.Series):
+        return resample_frame(df.to_frame(), freq, stat_func=stat_func, min_valid_frac=min_valid_frac).iloc[:, 0]
+
+    df = df.sort_index()
+
+    # frequencies without period equivalent, e.g. 'MS', and multiples of a frequency, e.g. '2M' or '10D', are left to pandas
+    try:
+        pd.Period('2000-01-01', freq=freq)
+        if pd.tseries.frequencies.to_offset(freq).n != 1:
+            raise ValueError
+    except ValueError:
+        if min_valid_frac != None:
+            raise ValueError('ERROR -- a minimum fraction of valid values is not supported for frequency {}.'.format(freq))
+        return getattr(resample_time(df, freq), stat_func)()
+
+    out, dates = resample_batch(df.values.T, df.index.values, freq=freq, stat_func=stat_func, min_valid_frac=min_valid_frac)
+
+    return pd.DataFrame(data=out.T, index=pd.DatetimeIndex(dates, name=df.index.name), columns=df.columns)
+
+def fill_missing_periods(df: pd.DataFrame, freq='M') -> pd.DataFrame:
+    """Aggregates a timeseries to periods and inserts missing periods with NaN.
+    Values are first averaged per day and then per period, periods are labelled by their end date.
+    Gives the same result as "df.resample('D').mean().resample(freq).mean()", but works on the period index directly instead of expanding the timeseries to daily values.
+
+    Args:
+        df (pd.DataFrame): dataframe with datetime index.
+        freq (str, optional): period frequency following pandas conventions, e.g. 'M' or 'Y'. Defaults to 'M'.
+
+    Returns:
+        pd.DataFrame: dataframe with one row per period between first and last time step.
+    """
+
+    if df.empty:
+        return df
+
+    # only if there are multiple time steps per day, they need to be averaged first
+    days = df.index.floor('D')
+    if not days.is_unique:
+        df = df.groupby(days).mean()
+        days = df.index
+
+    df_out = df.groupby(days.to_period(freq)).mean()
+    df_out = df_out.reindex(pd.period_range(df_out.index[0], df_out.index[-1], freq=df_out.index.freq))
+    df_out.index = pd.DatetimeIndex(df_out.index.to_timestamp(how='end').normalize(), name=df.index.name)
+
+    return df_out
+
 def calc_monthly_climatology(df_in: pd.DataFrame, col_name=None) -> pd.DataFrame:
     """Calculates the climatological mean of each month across a timeseries at sub-monthly timestep.
 
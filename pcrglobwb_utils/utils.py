@@ -10,6 +10,8 @@ import rioxarray as rio
 import rasterio
 import yaml
 import click
+import multiprocessing as mp
+from functools import partial
 import glob
 import os
 import shutil
@@ -31,16 +33,19 @@ def get_idx_as_strftime(df, strftime_format='%Y-%m-%d'):
     return idx
 
 def check_mode(data_loc: str) -> str:
-    """Checks whether GRDC data is read via a yml-file or all files within a folder are used.
+    """Checks whether GRDC data is read via a yml-file, an observation store, or all files within a folder are used.
+    Observation stores are netCDF-files created with 'pre.pack_obs_store'.
 
     Args:
-        data_loc (str): path to yml-file or folder.
+        data_loc (str): path to yml-file, observation store, or folder.
 
     Returns:
-        str: mode of evaluation, either 'yml' or 'fld'.
+        str: mode of evaluation, either 'yml', 'store', or 'fld'.
     """
 
-    if os.path.isfile(data_loc):
+    if os.path.isfile(data_loc) and (os.path.splitext(data_loc)[1] in ['.nc', '.nc4']):
+        mode = 'store'
+    elif os.path.isfile(data_loc):
         mode = 'yml'
     elif os.path.isdir(data_loc):
         mode = 'fld'
@@ -68,17 +73,21 @@ def read_yml(yaml_file: str) -> dict:
 
     return data
 
-def glob_GRDC_folder(folder: str, col_name: str, verbose=False, encoding='ISO-8859-1') -> dict:
+def glob_GRDC_folder(folder: str, col_name: str, verbose=False, encoding='ISO-8859-1', number_processes=None) -> dict:
     """Collects and reads all files within a folder.
     Assumes all files are GRDC files and retrieves station properties and values from file.
     Returns all of this info as dictionary.
     In this dictionary, GRDC stations are keys and per key a list with GRDC properties and values is stored.
+    Values are stored as compact 'obs_data.station_series' objects.
+    If a number of processes is provided, files are read in parallel.
+    Stations are always stored in the order of the sorted file names.
 
     Args:
         folder (str): path to folder where GRDC files are stored. Note that no other files should be stored here.
         col_name (str): column name in GRDC files to be read from.
         verbose (bool, optional): whether or not to print more info. Defaults to False.
         encoding (str, optional): encoding of GRDC files.. Defaults to 'ISO-8859-1'.
+        number_processes (int, optional): number of processes to be used for reading files. Defaults to None.
 
     Returns:
         dict: dictionary containing properties and values for all GRDC stations found in 'folder'.
@@ -88,34 +97,26 @@ def glob_GRDC_folder(folder: str, col_name: str, verbose=False, encoding='ISO-88
     click.echo('INFO -- folder with GRDC data is {}'.format(folder))
     files = sorted(glob.glob(os.path.join(folder,'*')))
 
-    dd = dict()
+    read_file = partial(_read_GRDC_file, col_name=col_name, encoding=encoding, verbose=verbose)
 
-    for f in files:
-
-        if verbose: click.echo('VERBOSE -- loading GRDC file {} with encoding {}.'.format(f, encoding))
-
-        grdc_data = pcrglobwb_utils.obs_data.grdc_data(f)
-        props = grdc_data.get_grdc_station_properties(encoding=encoding)
-
-        # retrieving values from GRDC file
-        df_obs = grdc_data.get_grdc_station_values(col_name=col_name, var_name='OBS', encoding=encoding, verbose=verbose)
-        # not sure if that's needed, but better be safe than sorry
-        df_obs.set_index(pd.to_datetime(df_obs.index), inplace=True)
-
-        dd[str(props['station'])] = [props, df_obs]
+    dd = dict(_map_files(read_file, files, number_processes))
 
     return dd
 
-def glob_GSIM_folder(folder: str, col_name='"MEAN"', verbose=False) -> dict:
+def glob_GSIM_folder(folder: str, col_name='"MEAN"', verbose=False, number_processes=None) -> dict:
     """Collects and reads all files within a folder.
     Assumes all files are GSIM files and retrieves station properties and values from file.
     Returns all of this info as dictionary.
     In this dictionary, GSIM stations are keys and per key a list with GSIM properties and values is stored.
+    Values are stored as compact 'obs_data.station_series' objects.
+    If a number of processes is provided, files are read in parallel.
+    Stations are always stored in the order of the sorted file names.
 
     Args:
         folder (str): path to folder where GSIM files are stored. Note that no other files should be stored here.
         col_name (str, optional): column name in GSIM files to be read from. Defaults to '"MEAN".
         verbose (bool, optional): whether or not to print more info. Defaults to False.
+        number_processes (int, optional): number of processes to be used for reading files. Defaults to None.
 
     Returns:
         dict: dictionary containing properties and values for all GSIM stations found in 'folder'.
@@ -125,36 +126,163 @@ def glob_GSIM_folder(folder: str, col_name='"MEAN"', verbose=False) -> dict:
     click.echo(click.style('INFO -- folder with GSIM data is {}.'.format(folder), fg='red'))
     files = sorted(glob.glob(os.path.join(folder,'*')))
 
-    dd = dict()
+    read_file = partial(_read_GSIM_file, col_name=col_name, verbose=verbose)
+
+    dd = dict(_map_files(read_file, files, number_processes))
+
+    return dd
+
+def index_GRDC_folder(folder: str, col_name: str, verbose=False, encoding='ISO-8859-1', number_processes=None, catalog=None) -> dict:
+    """Collects all files within a folder and reads only their headers.
+    Assumes all files are GRDC files.
+    Returns a dictionary with the same layout as 'glob_GRDC_folder', but instead of values a function is stored per station.
+    Calling this function reads station properties and values from the file, such that values are only read for stations which are actually used.
+    If a station catalog is provided, it is refreshed for the folder and station properties are taken from it, such that only headers of new or modified files are read.
+
+    Args:
+        folder (str): path to folder where GRDC files are stored. Note that no other files should be stored here.
+        col_name (str): column name in GRDC files to be read from.
+        verbose (bool, optional): whether or not to print more info. Defaults to False.
+        encoding (str, optional): encoding of GRDC files. Defaults to 'ISO-8859-1'.
+        number_processes (int, optional): number of processes to be used for reading headers. Defaults to None.
+        catalog (str, optional): path to SQLite-file containing a station catalog, see 'catalog.build_catalog'. Defaults to None.
+
+    Returns:
+        dict: dictionary containing properties and a function to read values for all GRDC stations found in 'folder'.
+    """
 
-    for f in files:
+    folder = os.path.abspath(folder)
 
-        if verbose: click.echo('VERBOSE -- loading GSIM file {}.'.format(f))
+    if catalog != None:
+        df = pcrglobwb_utils.catalog.build_catalog(folder, catalog, source='GRDC', encoding=encoding, number_processes=number_processes, verbose=verbose)
+        return dict(_index_GRDC_file(f, col_name, encoding, verbose, props=pcrglobwb_utils.obs_data.props_from_json(props)) for f, props in zip(df['file'], df['properties']))
 
-        gsim_data = pcrglobwb_utils.obs_data.gsim_data(f)
-        props = gsim_data.get_gsim_station_properties()
+    click.echo('INFO -- indexing folder with GRDC data {}'.format(folder))
+    files = sorted(glob.glob(os.path.join(folder,'*')))
 
-        # retrieving values from GRDC file
-        df_obs, props = gsim_data.get_gsim_station_values(col_name=col_name, var_name='OBS', verbose=verbose)
-        # not sure if that's needed, but better be safe than sorry
-        df_obs.set_index(pd.to_datetime(df_obs.index), inplace=True)
+    index_file = partial(_index_GRDC_file, col_name=col_name, encoding=encoding, verbose=verbose)
 
-        dd[str(props['gsim_no'])] = [props, df_obs]
+    dd = dict(_map_files(index_file, files, number_processes))
 
     return dd
 
-def create_out_dir(out_dir: str) -> None:
+def index_GSIM_folder(folder: str, col_name='"MEAN"', verbose=False, number_processes=None, catalog=None) -> dict:
+    """Collects all files within a folder and reads only their headers.
+    Assumes all files are GSIM files.
+    Returns a dictionary with the same layout as 'glob_GSIM_folder', but instead of values a function is stored per station.
+    Calling this function reads station properties and values from the file, such that values are only read for stations which are actually used.
+    If a station catalog is provided, it is refreshed for the folder and station properties are taken from it, such that only headers of new or modified files are read.
+
+    Args:
+        folder (str): path to folder where GSIM files are stored. Note that no other files should be stored here.
+        col_name (str, optional): column name in GSIM files to be read from. Defaults to '"MEAN".
+        verbose (bool, optional): whether or not to print more info. Defaults to False.
+        number_processes (int, optional): number of processes to be used for reading headers. Defaults to None.
+        catalog (str, optional): path to SQLite-file containing a station catalog, see 'catalog.build_catalog'. Defaults to None.
+
+    Returns:
+        dict: dictionary containing properties and a function to read values for all GSIM stations found in 'folder'.
+    """
+
+    folder = os.path.abspath(folder)
+
+    if catalog != None:
+        df = pcrglobwb_utils.catalog.build_catalog(folder, catalog, source='GSIM', number_processes=number_processes, verbose=verbose)
+        return dict(_index_GSIM_file(f, col_name, verbose, props=pcrglobwb_utils.obs_data.props_from_json(props)) for f, props in zip(df['file'], df['properties']))
+
+    click.echo(click.style('INFO -- indexing folder with GSIM data {}.'.format(folder), fg='red'))
+    files = sorted(glob.glob(os.path.join(folder,'*')))
+
+    index_file = partial(_index_GSIM_file, col_name=col_name, verbose=verbose)
+
+    dd = dict(_map_files(index_file, files, number_processes))
+
+    return dd
+
+def _index_GRDC_file(f: str, col_name: str, encoding: str, verbose: bool, props=None) -> tuple[str, list]:
+
+    # properties may be known already from a station catalog
+    if props == None:
+        if verbose: click.echo('VERBOSE -- reading header of GRDC file {} with encoding {}.'.format(f, encoding))
+        with open(f, 'rb') as fo:
+            props, _ = pcrglobwb_utils.obs_data.parse_grdc_header(fo, encoding=encoding)
+    pcrglobwb_utils.obs_data.check_grdc_station_properties(props)
+
+    # partial objects of module-level functions can be sent to other processes
+    read_values = partial(pcrglobwb_utils.obs_data.load_station_series, pcrglobwb_utils.obs_data.read_grdc_file, f, col_name=col_name, var_name='OBS', encoding=encoding, verbose=verbose)
+
+    return str(props['station']), [props, read_values]
+
+def _index_GSIM_file(f: str, col_name: str, verbose: bool, props=None) -> tuple[str, list]:
+
+    if props == None:
+        if verbose: click.echo('VERBOSE -- reading header of GSIM file {}.'.format(f))
+        with open(f, 'rb') as fo:
+            props, _ = pcrglobwb_utils.obs_data.parse_gsim_header(fo)
+    pcrglobwb_utils.obs_data.check_gsim_station_properties(props, f)
+
+    read_values = partial(pcrglobwb_utils.obs_data.load_station_series, pcrglobwb_utils.obs_data.read_gsim_file, f, col_name=col_name, var_name='OBS', verbose=verbose)
+
+    return str(props['gsim_no']), [props, read_values]
+
+def _read_GRDC_file(f: str, col_name: str, encoding: str, verbose: bool) -> tuple[str, list]:
+
+    if verbose: click.echo('VERBOSE -- loading GRDC file {} with encoding {}.'.format(f, encoding))
+
+    # retrieving properties and values from GRDC file in one go
+    props, obs = pcrglobwb_utils.obs_data.load_station_series(pcrglobwb_utils.obs_data.read_grdc_file, f, col_name=col_name, var_name='OBS', encoding=encoding, verbose=verbose)
+
+    return str(props['station']), [props, obs]
+
+def _read_GSIM_file(f: str, col_name: str, verbose: bool) -> tuple[str, list]:
+
+    if verbose: click.echo('VERBOSE -- loading GSIM file {}.'.format(f))
+
+    # retrieving properties and values from GSIM file in one go
+    props, obs = pcrglobwb_utils.obs_data.load_station_series(pcrglobwb_utils.obs_data.read_gsim_file, f, col_name=col_name, var_name='OBS', verbose=verbose)
+
+    return str(props['gsim_no']), [props, obs]
+
+def _map_files(func, files: list, number_processes=None) -> list:
+    """Applies a function to a list of files, either sequentially or with a pool of processes.
+    Files are submitted to the pool in chunks to limit the communication overhead.
+    The returned list has the same order as 'files'.
+
+    Args:
+        func (function): function to be applied per file.
+        files (list): list of paths to files.
+        number_processes (int, optional): number of processes to be used. If None, files are processed sequentially. Defaults to None.
+
+    Returns:
+        list: return values of 'func' per file.
+    """
+
+    if (number_processes == None) or (len(files) < 2):
+        return [func(f) for f in files]
+
+    min_number_processes = min(number_processes, len(files), mp.cpu_count())
+    click.echo('INFO -- reading {} files with {} processes'.format(len(files), min_number_processes))
+
+    chunksize = max(1, len(files) // (4 * min_number_processes))
+
+    with mp.Pool(processes=min_number_processes) as pool:
+        out = pool.map(func, files, chunksize=chunksize)
+
+    return out
+
+def create_out_dir(out_dir: str, clean=True) -> None:
     """Creates output directory.
-    If directory already exists, it is recreated.
+    If directory already exists, it is recreated unless 'clean' is False.
 
     Args:
         out_dir (str): path of output directory.
+        clean (bool, optional): whether or not to remove an existing directory and its content. Defaults to True.
     """
 
-    if os.path.isdir(out_dir):
+    if os.path.isdir(out_dir) and clean:
         shutil.rmtree(out_dir)
     
-    os.makedirs(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
     click.echo('INFO -- saving output to folder {}'.format(out_dir))
 
 def align_geo(ds, crs_system='epgs:4326', verbose=False):
@@ -201,12 +329,12 @@ def concat_dataframes(obs_data_c, sim_data_c, obs_var_name, sim_var_name, obs_id
     # accounting for missing values in time series (and thus missing index values!)
     if time_step == 'monthly':
         if verbose: click.echo('VERBOSE -- covering missing months in observation or simulation data.')
-        obs_df = obs_df.resample('D').mean().fillna(np.nan).resample('M').mean()
-        sim_df = sim_df.resample('D').mean().fillna(np.nan).resample('M').mean()  
+        obs_df = pcrglobwb_utils.time_funcs.fill_missing_periods(obs_df, 'M')
+        sim_df = pcrglobwb_utils.time_funcs.fill_missing_periods(sim_df, 'M')
     if time_step == 'annual':
         if verbose: click.echo('VERBOSE -- covering missing years in observation or simulation data.')
-        obs_df = obs_df.resample('D').mean().fillna(np.nan).resample('Y').mean()
-        sim_df = sim_df.resample('D').mean().fillna(np.nan).resample('Y').mean()  
+        obs_df = pcrglobwb_utils.time_funcs.fill_missing_periods(obs_df, 'Y')
+        sim_df = pcrglobwb_utils.time_funcs.fill_missing_periods(sim_df, 'Y')
 
     # concatenating both dataframes to drop rows with missing values in one of the columns
     # dropping rows with missing values is import because time extents of both files probably do not match
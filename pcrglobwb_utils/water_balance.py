@@ -1,71 +1,276 @@
+import pcrglobwb_utils
 import pandas as pd
+import numpy as np
+import xarray as xr
 import matplotlib.pyplot as plt
+import multiprocessing as mp
+import click
 import glob
+import json
+import time
+import os
+import re
+
+# water balance components reported in the log-file
+WATER_BALANCE_VARS = ["precipitation", "actualET", "runoff", "totalPotentialGrossDemand", "baseflow", "storage"]
+
+# only lines matching this pattern can contain a year or an annual value, all other lines are skipped without splitting them
+LINE_PATTERN = re.compile(rb' pcrglobwb | days 1 to ')
+
+def _empty_var_data() -> dict:
+
+    var_data = {"year": []}
+    var_data.update({var: [] for var in WATER_BALANCE_VARS})
+
+    return var_data
+
+def parse_log_file(fo: str, offset=0, var_data=None) -> tuple:
+    """Parses water balance information from a PCR-GLOBWB log-file, starting at a given byte offset.
+    The file is streamed line by line, and only complete lines are parsed.
+    That way, parsing can be continued later at the returned offset once more lines have been appended to the file.
+
+    Args:
+        fo (str): path to log-file.
+        offset (int, optional): byte offset from which the file is parsed. Defaults to 0.
+        var_data (dict, optional): values parsed from preceding part of the file, which are extended. Defaults to None.
+
+    Returns:
+        tuple[dict, int]: years and values per water balance component; byte offset after the last complete line parsed.
+    """
+
+    if var_data == None:
+        var_data = _empty_var_data()
+
+    try:
+        f = open(fo, "rb")
+    except OSError:
+        return var_data, offset
+
+    with f:
+        f.seek(offset)
+        for line in f:
+
+            # a line without line break is still being written
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+
+            if LINE_PATTERN.search(line) == None:
+                continue
+
+            varFields = line.decode("utf-8", errors="replace").split(" ")
+
+            if varFields[2] == "pcrglobwb" and len(varFields) == 9:
+                try:
+                    year = int(varFields[-1][:4])
+                except ValueError:
+                    year = None
+                if (year != None) and (year not in var_data["year"]):
+                    var_data["year"].append(year)
+
+            if len(varFields) > 15 and varFields[7] == "days" and varFields[8] == "1" and varFields[9] == "to":
+                if varFields[6] in var_data:
+                    var_data[varFields[6]].append(float(varFields[14]))
+
+            if len(varFields) > 14 and varFields[6] == "days" and varFields[7] == "1" and varFields[8] == "to":
+                if varFields[5] in var_data:
+                    var_data[varFields[5]].append(float(varFields[13]))
+
+    return var_data, offset
+
+def _parse_log_file_state(args: tuple) -> tuple:
+
+    fo, state = args
+
+    # a file smaller than the offset was truncated or replaced, hence it is parsed from the start
+    if os.path.getsize(fo) < state["offset"]:
+        state = {"offset": 0, "data": _empty_var_data()}
+
+    var_data, offset = parse_log_file(fo, offset=state["offset"], var_data=state["data"])
+
+    return fo, {"offset": offset, "data": var_data}
+
+def get_annual_values_from_netcdf(files: dict, polygon=None, poly_id=None, zones=None, zone=None, crs_system='epsg:4326', conversion_factor=1, block_size=365, verbose=False) -> pd.DataFrame:
+    """Get annual values for a range of water balance components by aggregating gridded output of PCR-GLOBWB.
+    Per time step, values are multiplied with the cell area and summed over all cells, optionally restricted to a polygon or zone.
+    Fluxes (e.g. precipitation in m per time step) are summed per year, yielding annual volumes in m3 as reported in the log-file.
+    For 'storage' (e.g. total water storage thickness in m), the change in storage per year is returned, i.e. the difference between the last time step of a year and the last time step of the preceding year.
+    For the first year, the first time step is used as reference.
+    Files are read in blocks along the time dimension, such that also long daily timeseries can be processed with bounded memory.
+
+    Args:
+        files (dict): component names (e.g. 'precipitation', 'actualET', 'runoff', 'baseflow', 'storage') mapped to a tuple of path to netCDF-file and variable name, or to path only if the file contains only one variable.
+        polygon (str, optional): path to geojson-file or shp-file with polygon(s) to which aggregation is restricted. Defaults to None.
+        poly_id (str, optional): unique identifier of polygons. If provided together with 'zone', only the polygon with this identifier is used. Defaults to None.
+        zones (str, optional): path to netCDF-file with zone per cell on the same grid as the output, used instead of a polygon. Defaults to None.
+        zone (int, optional): zone (or polygon identifier) to which aggregation is restricted. Defaults to None.
+        crs_system (str, optional): coordinate system. Defaults to 'epsg:4326'.
+        conversion_factor (int, optional): conversion factor applied to all values, e.g. to convert to m. Defaults to 1.
+        block_size (int, optional): number of time steps loaded at once. Defaults to 365.
+        verbose (bool, optional): whether or not to print more info. Defaults to False.
+
+    Returns:
+        dataframe: dataframe containing annual values of water balance components
+    """
+
+    annual = dict()
+    weights = None
+
+    for var, fo in files.items():
+
+        fo, var_name = fo if isinstance(fo, (tuple, list)) else (fo, None)
+        click.echo('INFO -- aggregating {} from {}.'.format(var, os.path.abspath(fo)))
+
+        with xr.open_dataset(fo) as ds:
+
+            da = ds[var_name] if var_name != None else ds[list(ds.data_vars)[0]]
+            lat_dim, lon_dim = pcrglobwb_utils.regrid.get_spatial_dims(da)
+            da = da.transpose('time', lat_dim, lon_dim)
+
+            # all files are assumed to be on the same grid, hence weights are computed only once
+            if weights is None:
+                weights = _get_area_weights(da.isel(time=0), polygon=polygon, poly_id=poly_id, zones=zones, zone=zone, crs_system=crs_system)
+
+            totals = list()
+            for start, times, block in pcrglobwb_utils.climatology.iter_time_blocks(da, block_size=block_size):
+                if verbose: click.echo('VERBOSE -- aggregating time steps {} to {}.'.format(start, start + len(times)))
+                totals.append(pd.Series(np.nansum(block * weights, axis=(1, 2)) * conversion_factor, index=pd.DatetimeIndex(times)))
+
+        totals = pd.concat(totals)
+
+        if var == 'storage':
+            storage = totals.groupby(totals.index.year).last()
+            annual[var] = storage.diff()
+            annual[var].iloc[0] = storage.iloc[0] - totals.iloc[0]
+        else:
+            annual[var] = totals.groupby(totals.index.year).sum()
+
+    df = pd.DataFrame(annual)
+    df.index.name = 'year'
+    df = df.reset_index()
+
+    return df
+
+def _get_area_weights(da: xr.DataArray, polygon=None, poly_id=None, zones=None, zone=None, crs_system='epsg:4326') -> np.ndarray:
+
+    lat_dim, lon_dim = pcrglobwb_utils.regrid.get_spatial_dims(da)
+    area = pcrglobwb_utils.regrid.calc_cell_area(da[lat_dim].values, da[lon_dim].values)
+
+    if polygon != None:
+        poly_gdf = pcrglobwb_utils.io.read_vector(polygon, columns=None if poly_id == None else [poly_id])
+        if (poly_id != None) and (zone != None):
+            poly_gdf = poly_gdf.loc[poly_gdf[poly_id] == zone]
+        da_area = xr.DataArray(area, coords={lat_dim: da[lat_dim].values, lon_dim: da[lon_dim].values}, dims=(lat_dim, lon_dim))
+        da_area = pcrglobwb_utils.utils.align_geo(da_area, crs_system=crs_system)
+        area = da_area.rio.clip(poly_gdf.geometry, drop=False, all_touched=True).values
+
+    elif zones != None:
+        with xr.open_dataarray(zones) as da_zones:
+            zone_lat_dim, zone_lon_dim = pcrglobwb_utils.regrid.get_spatial_dims(da_zones)
+            mask = (da_zones.transpose(zone_lat_dim, zone_lon_dim).values == zone)
+        if mask.shape != area.shape:
+            raise ValueError('ERROR -- zones must be on the same grid as the gridded output.')
+        area = np.where(mask, area, np.nan)
+
+    return area
 
 class water_balance:
     """Annual water balance information of a PCR-GLOBWB run. Data is retrieved from the log-file of this run.
 
     Arguments:
-        fo (str): path to log-file
+        fo (str): path to log-file, may contain wildcards to combine multiple log-files.
+        checkpoint (str, optional): path to JSON-file in which byte offsets and parsed values per log-file are stored. If provided, only lines appended since the last call are parsed. Defaults to None.
     """
 
-    def __init__(self, fo):
+    def __init__(self, fo, checkpoint=None):
         """Initiates water balance object based on PCR-GLOBWB log-file.
         """
 
         self.pcr_log_file = fo
+        self.checkpoint = checkpoint
+
+        self.state = {}
+        if (checkpoint != None) and os.path.isfile(checkpoint):
+            with open(checkpoint, "r") as f:
+                self.state = json.load(f)
 
-    def get_annual_values(self):
+    def get_annual_values(self, number_processes=None):
         """Get annual values for a range of water balance components by parsing the log-file.
+        Log-files are parsed incrementally, i.e. only lines appended since the last call are parsed.
+        If multiple log-files are matched, they can be parsed in parallel.
+
+        Args:
+            number_processes (int, optional): number of processes to be used to parse multiple log-files. Defaults to None.
 
         Returns:
             dataframe: dataframe containing annual values of water balance components
         """
 
-        varData = {
-                "year" : [],
-                "precipitation" : [],
-                "actualET": [],
-                "runoff": [],
-                "totalPotentialGrossDemand": [],
-                "baseflow": [],
-                "storage": [],}
-
-        varNames = varData.keys()
-
-        for fileName in glob.glob(self.pcr_log_file):
-            try:
-                f = open(fileName, "r")
-                lines = f.readlines()
-                f.close()
-            except:
-                lines = ""
-            for line in lines:
-                varFields = line.split(" ")
-                if len(varFields) > 2:
-                    if varFields[2] == "pcrglobwb" and len(varFields) == 9:
-                        try:
-                            year = int(varFields[-1][:4])
-                        except:
-                            if varFields[2] == "pcrglobwb" and len(varFields) == 16: 
-                                year = int(varFields[11][:4])
-                        if year not in varData["year"]: 
-                            varData["year"].append(year)
-                    if len(varFields) > 15:
-                        if varFields[7] == "days" and varFields[8] == "1" and varFields[9] == "to":
-                            for var in varNames:
-                                if varFields[6] == var:
-                                    varData[var].append(float(varFields[14]))
-                    if len(varFields) > 14:
-                        if varFields[6] == "days" and varFields[7] == "1" and varFields[8] == "to":
-                            for var in varNames:
-                                if varFields[5] == var:
-                                    varData[var].append(float(varFields[13]))
-                                
-        self.df = pd.DataFrame.from_dict(varData, orient='columns')
+        files = sorted(glob.glob(self.pcr_log_file))
+        args = [(fo, self.state.get(fo, {"offset": 0, "data": _empty_var_data()})) for fo in files]
+
+        if (number_processes == None) or (len(files) < 2):
+            results = list(map(_parse_log_file_state, args))
+        else:
+            min_number_processes = min(number_processes, len(files), mp.cpu_count())
+            pool = mp.Pool(processes=min_number_processes)
+            results = pool.map(_parse_log_file_state, args)
+            pool.close()
+            pool.join()
+
+        self.state = dict(results)
+
+        if self.checkpoint != None:
+            with open(self.checkpoint, "w") as f:
+                json.dump(self.state, f)
+
+        # values of all files are combined in order of files, and each year is only listed once
+        varData = _empty_var_data()
+        for fo in files:
+            for key, values in self.state[fo]["data"].items():
+                if key == "year":
+                    varData[key].extend([year for year in values if year not in varData[key]])
+                else:
+                    varData[key].extend(values)
+
+        # for running simulations, a year may be listed before all its values are reported
+        self.df = pd.DataFrame({key: pd.Series(values, dtype=float if key != "year" else int) for key, values in varData.items()})
 
         return self.df
 
+    def follow(self, interval=60, timeout=None, number_processes=None, verbose=False):
+        """Tails the log-file(s) of a running simulation and updates the annual values incrementally.
+        Each time new values were parsed, the updated dataframe is yielded.
+
+        Args:
+            interval (int, optional): seconds between checks for new lines. Defaults to 60.
+            timeout (int, optional): seconds without new lines after which following stops. If None, following does not stop. Defaults to None.
+            number_processes (int, optional): number of processes to be used to parse multiple log-files. Defaults to None.
+            verbose (bool, optional): whether or not to print more info. Defaults to False.
+
+        Yields:
+            dataframe: dataframe containing annual values of water balance components
+        """
+
+        last_offsets = None
+        last_update = time.time()
+
+        while True:
+
+            df = self.get_annual_values(number_processes=number_processes)
+            offsets = {fo: state["offset"] for fo, state in self.state.items()}
+
+            if offsets != last_offsets:
+                if verbose: click.echo('VERBOSE -- parsed log-files up to {} bytes in total.'.format(sum(offsets.values())))
+                last_offsets = offsets
+                last_update = time.time()
+                yield df
+
+            elif (timeout != None) and (time.time() - last_update >= timeout):
+                break
+
+            time.sleep(interval)
+
     def bar_plot(self, **kwargs):
         """Creates a bar plot of water balance components per year. This adds to the regular plotting options with pandas dataframes.
         """
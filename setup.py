@@ -17,6 +17,9 @@ setup_requirements = ['pytest-runner', ]
 
 test_requirements = ['pytest>=3', ]
 
+# pyarrow is needed for GeoParquet and Parquet output only
+extras_requirements = {'parquet': ['pyarrow>=10.0.0'], }
+
 setup(
     author="Jannis M. Hoch",
     author_email='j.m.hoch@uu.nl',
@@ -37,9 +40,11 @@ setup(
             'pcru_eval_tims = pcrglobwb_utils.scripts.evaluate_tims:cli',
             'pcru_eval_poly = pcrglobwb_utils.scripts.evaluate_poly:main',
             'pcru_preprocess = pcrglobwb_utils.scripts.preprocessing:cli',
+            'pcru_plot = pcrglobwb_utils.scripts.plot:main',
         ],
     },
     install_requires=requirements,
+    extras_require=extras_requirements,
     license="GNU General Public License v3",
     long_description=readme + '\n\n' + history,
     include_package_data=True,
@@ -7,6 +7,7 @@ import pytest
 import pcrglobwb_utils
 import pandas as pd
 import numpy as np
+import os
 from datetime import datetime, timedelta
 
 def test_daily2monthly():
@@ -49,3 +50,627 @@ def test_get_grdc_station_properties():
     assert properties['station'] == 'OBIDOS - PORTO'
 
 
+
+def test_regrid_conservative(tmp_path):
+
+    import xarray as xr
+
+    lat = np.arange(-9.75, 10, 0.5)
+    lon = np.arange(0.25, 10, 0.5)
+    np.random.seed(seed=1111)
+    src = xr.DataArray(np.random.rand(2, lat.size, lon.size), coords={'time': pd.date_range('2000-01-01', periods=2), 'lat': lat, 'lon': lon}, dims=('time', 'lat', 'lon'))
+    dst = xr.DataArray(np.zeros((lat.size // 2, lon.size // 2)), coords={'lat': lat[::2] + 0.25, 'lon': lon[::2] + 0.25}, dims=('lat', 'lon'))
+
+    out = pcrglobwb_utils.regrid.regrid_conservative(src, dst)
+
+    # area-weighted means must be conserved when both grids cover the same extent
+    w_src = np.cos(np.deg2rad(lat))[:, None] * np.ones(lon.size)
+    w_dst = np.cos(np.deg2rad(dst.lat.values))[:, None] * np.ones(dst.lon.size)
+    for t in range(2):
+        mean_src = np.sum(src.values[t] * w_src) / np.sum(w_src)
+        mean_dst = np.sum(out.values[t] * w_dst) / np.sum(w_dst)
+        assert np.isclose(mean_src, mean_dst, rtol=1e-4)
+
+    # streaming chunks to a file gives the same result, read lazily from that file
+    src.name = 'var'
+    out_lazy = pcrglobwb_utils.regrid.regrid_conservative(src, dst, chunk_size=1, out_file=str(tmp_path / 'regridded.nc'))
+    assert out_lazy.encoding['source'] == str(tmp_path / 'regridded.nc')
+    np.testing.assert_allclose(out_lazy.values, out.values)
+    np.testing.assert_array_equal(out_lazy['time'].values, src['time'].values)
+
+def test_zonal_cache(tmp_path):
+
+    from shapely.geometry import box
+
+    run_key = pcrglobwb_utils.cache.settings_key(obs_var_name='E', sim_var_name='total_evaporation', conversion_factor=1000)
+    key = pcrglobwb_utils.cache.zonal_cache_key([box(0, 0, 1, 1)], run_key)
+
+    # modified geometries or settings must not be served from the cache
+    assert key != pcrglobwb_utils.cache.zonal_cache_key([box(0, 0, 1, 2)], run_key)
+    assert key != pcrglobwb_utils.cache.zonal_cache_key([box(0, 0, 1, 1)], pcrglobwb_utils.cache.settings_key(obs_var_name='E', sim_var_name='total_evaporation', conversion_factor=1))
+
+    assert pcrglobwb_utils.cache.load_zonal_series(str(tmp_path), key) is None
+    df = pd.DataFrame({'E': [1.0, 2.0]}, index=pd.date_range('2010-01-31', periods=2, freq='M'))
+    pcrglobwb_utils.cache.store_zonal_series(str(tmp_path), key, df)
+    assert pcrglobwb_utils.cache.load_zonal_series(str(tmp_path), key).equals(df)
+
+def test_read_grdc_file():
+
+    fo = './examples/example_data/GRDC/files/3629000_Obidos.day'
+
+    props, df = pcrglobwb_utils.obs_data.read_grdc_file(fo, col_name=' Calculated', var_name='OBS')
+
+    assert props == pcrglobwb_utils.obs_data.grdc_data(fo).get_grdc_station_properties()
+    assert props['no_years'] == 72
+    assert isinstance(df.index, pd.DatetimeIndex)
+    assert df.columns.to_list() == ['OBS']
+    assert (df['OBS'] != -999).all()
+
+def test_read_gsim_file():
+
+    fo = './examples/example_data/GSIM/files/BR_0000099.mon'
+
+    props, df = pcrglobwb_utils.obs_data.read_gsim_file(fo, col_name='"MEAN"', var_name='OBS')
+
+    assert props['gsim_no'] == 'BR_0000099'
+    assert props['ts_start'] == pd.Timestamp('1977-01-31')
+    # column names can be given with or without quotes
+    assert df.equals(pcrglobwb_utils.obs_data.read_gsim_file(fo, col_name='MEAN', var_name='OBS')[1])
+    assert np.isnan(df['OBS'].iloc[0])
+
+def test_station_catalog(tmp_path):
+
+    in_dir = './examples/example_data/GRDC/files'
+    catalog = str(tmp_path / 'stations.sqlite')
+
+    df = pcrglobwb_utils.catalog.build_catalog(in_dir, catalog, source='GRDC')
+    assert len(df) == 2
+
+    # unchanged files are not read again
+    mtime = df['mtime'].to_list()
+    assert pcrglobwb_utils.catalog.build_catalog(in_dir, catalog, source='GRDC')['mtime'].to_list() == mtime
+
+    df_sel = pcrglobwb_utils.catalog.select_stations(catalog, source='GRDC', in_dir=in_dir, nr_years_thld=40)
+    assert df_sel['station'].to_list() == ['OBIDOS - PORTO']
+
+def test_index_folder_catalog(tmp_path):
+
+    import sqlite3
+
+    for source, in_dir, col_name in [('GRDC', './examples/example_data/GRDC/files', ' Calculated'), ('GSIM', './examples/example_data/GSIM/files', '"MEAN"')]:
+
+        catalog = str(tmp_path / 'stations.sqlite')
+
+        # catalogs without stored properties are updated when refreshed
+        con = sqlite3.connect(catalog)
+        con.execute("CREATE TABLE IF NOT EXISTS stations (file TEXT PRIMARY KEY, source TEXT, size INTEGER, mtime INTEGER, station TEXT, station_no TEXT, latitude REAL, longitude REAL, cat_area REAL, no_years INTEGER, ts_start TEXT, ts_end TEXT, altitude REAL, river TEXT)")
+        con.close()
+
+        if source == 'GRDC':
+            index = pcrglobwb_utils.utils.index_GRDC_folder(in_dir, col_name=col_name)
+            index_catalog = pcrglobwb_utils.utils.index_GRDC_folder(in_dir, col_name=col_name, catalog=catalog)
+        else:
+            index = pcrglobwb_utils.utils.index_GSIM_folder(in_dir, col_name=col_name)
+            index_catalog = pcrglobwb_utils.utils.index_GSIM_folder(in_dir, col_name=col_name, catalog=catalog)
+
+        # properties from the catalog equal those from the headers
+        assert list(index_catalog.keys()) == list(index.keys())
+        for station in index.keys():
+            # missing values are NaN, hence compared as JSON
+            assert pcrglobwb_utils.obs_data.props_to_json(index_catalog[station][0]) == pcrglobwb_utils.obs_data.props_to_json(index[station][0])
+            assert index_catalog[station][1]()[1].to_pandas().equals(index[station][1]()[1].to_pandas())
+
+def test_obs_store(tmp_path):
+
+    import xarray as xr
+
+    in_dir = './examples/example_data/GRDC/files'
+    store_file = str(tmp_path / 'GRDC.nc')
+
+    pcrglobwb_utils.pre.pack_obs_store(in_dir, store_file, source='GRDC', col_name=' Calculated')
+    assert pcrglobwb_utils.utils.check_mode(store_file) == 'store'
+
+    store = pcrglobwb_utils.obs_data.store_data(store_file)
+    props, df = pcrglobwb_utils.obs_data.read_grdc_file(os.path.join(in_dir, '3629000_Obidos.day'), col_name=' Calculated', var_name='OBS')
+
+    assert store.get_station_properties('OBIDOS - PORTO') == props
+    # values in the store went through the compact float32 representation
+    assert store.get_station_values('OBIDOS - PORTO').equals(pcrglobwb_utils.obs_data.station_series.from_pandas(df).to_pandas())
+
+    # writing stations in batches gives the same store
+    batch_file = str(tmp_path / 'GRDC_batches.nc')
+    pcrglobwb_utils.pre.pack_obs_store(in_dir, batch_file, source='GRDC', col_name=' Calculated', batch_size=1)
+    with xr.open_dataset(store_file) as ds, xr.open_dataset(batch_file) as ds_batch:
+        assert ds.equals(ds_batch)
+
+    # functions in the index read the slice of their station only
+    index = store.get_station_index()
+    for station in store.stations:
+        props_index, series = index[station][1]()
+        assert props_index == store.get_station_properties(station)
+        assert series.to_pandas().equals(store.get_station_values(station))
+
+def test_index_GRDC_folder():
+
+    in_dir = './examples/example_data/GRDC/files'
+
+    index = pcrglobwb_utils.utils.index_GRDC_folder(in_dir, col_name=' Calculated')
+    data = pcrglobwb_utils.utils.glob_GRDC_folder(in_dir, col_name=' Calculated')
+
+    assert list(index.keys()) == list(data.keys())
+    for station in index.keys():
+        # values are only read when calling the function stored per station
+        props, df = index[station][1]()
+        assert props == index[station][0] == data[station][0]
+        assert df.to_pandas().equals(data[station][1].to_pandas())
+
+def test_gsim_overrides(tmp_path):
+
+    in_dir = './examples/example_data/GSIM/files'
+    fo = str(tmp_path / 'gsim_catalog.csv')
+    pd.DataFrame({'gsim.no': ['BR_0000099', 'XX_0000001'], 'lon_snapped': [-64.825, 0.0], 'lat_snapped': [-0.475, 0.0], 'area_snapped': [293500.0, 1.0]}).to_csv(fo)
+
+    table = pcrglobwb_utils.obs_data.read_gsim_override_table(fo)
+    data = pcrglobwb_utils.obs_data.apply_gsim_overrides(pcrglobwb_utils.utils.index_GSIM_folder(in_dir), table, fo=fo)
+
+    # stations not listed in the table keep their properties
+    assert data['BR_0000243'][0]['longitude'] == -55.5111
+
+    gsim = pcrglobwb_utils.obs_data.gsim_data(os.path.join(in_dir, 'BR_0000099.mon'))
+    gsim.get_gsim_station_properties()
+    props = gsim.update_props_from_file(fo, table=table)
+    for col, key in pcrglobwb_utils.obs_data.GSIM_OVERRIDE_COLUMNS.items():
+        assert data['BR_0000099'][0][key] == props[key] == table.at['BR_0000099', col]
+
+def test_station_series():
+
+    df = pd.DataFrame({'OBS': [1.5, np.nan, 3.25, 4.0]}, index=pd.DatetimeIndex(['2000-01-01', '2000-01-02', '2000-01-03', '2000-01-06'], name='date'))
+
+    # gaps in the time axis are filled with missing values
+    obs = pcrglobwb_utils.obs_data.station_series.from_pandas(df)
+    assert (obs.freq, len(obs)) == ('D', 6)
+    assert obs.to_pandas().dropna().equals(df.dropna())
+
+    df = pd.DataFrame({'OBS': [1.0, 2.0, 3.0]}, index=pd.DatetimeIndex(['2000-01-31', '2000-02-29', '2000-04-30'], name='date'))
+
+    obs = pcrglobwb_utils.obs_data.station_series.from_pandas(df)
+    assert (obs.freq, len(obs)) == ('M', 4)
+    assert obs.to_pandas().dropna().equals(df)
+
+def test_resample_batch():
+
+    np.random.seed(seed=1111)
+    days = pd.date_range('2000-01-15', '2002-03-10', freq='D')
+    df = pd.DataFrame({'a': np.random.rand(len(days)), 'b': np.random.rand(len(days))}, index=days)
+    df.iloc[10:60, 0] = np.nan
+
+    for freq in ['M', 'Y']:
+        for stat_func in ['mean', 'sum', 'max', 'min']:
+            df_test = pcrglobwb_utils.time_funcs.resample_frame(df, freq, stat_func=stat_func)
+            assert np.allclose(df_test.values, getattr(df.resample(freq), stat_func)().values, equal_nan=True)
+
+    # multiples of a frequency are resampled with pandas
+    for freq in ['2M', '10D']:
+        df_test = pcrglobwb_utils.time_funcs.resample_frame(df, freq)
+        assert df_test.equals(df.resample(freq, convention='start').mean())
+
+    # January 2000 is incomplete, February 2000 has too many missing values
+    df_test = pcrglobwb_utils.time_funcs.resample_frame(df, 'M', min_valid_frac=0.9)
+    assert df_test['a'].isna().to_list()[:4] == [True, True, True, False]
+    assert df_test['b'].isna().to_list()[:4] == [True, False, False, False]
+
+def test_fill_missing_periods():
+
+    np.random.seed(seed=1111)
+    idx = pd.DatetimeIndex(['2000-01-16', '2000-01-16 12:00', '2000-02-15', '2000-05-16', '2001-03-01', '2003-07-31'], name='time')
+    df = pd.DataFrame({'OBS': np.random.rand(len(idx))}, index=idx)
+    df.iloc[2, 0] = np.nan
+
+    for freq in ['M', 'Y']:
+        df_test = pcrglobwb_utils.time_funcs.fill_missing_periods(df, freq)
+        assert df_test.equals(df.resample('D').mean().fillna(np.nan).resample(freq).mean())
+
+def test_gridded_anomalies(tmp_path):
+
+    import xarray as xr
+
+    np.random.seed(seed=1111)
+    time = pd.date_range('2000-01-01', '2002-12-31', freq='D')
+    da = xr.DataArray(np.random.rand(len(time), 3, 4), coords={'time': time, 'lat': np.arange(3.), 'lon': np.arange(4.)}, dims=('time', 'lat', 'lon'), name='E')
+    da[::7, 0, 0] = np.nan
+
+    clim = pcrglobwb_utils.climatology.calc_climatology(da, kind='monthly', block_size=100)
+    assert np.allclose(clim.values, da.groupby('time.month').mean('time').values)
+
+    # anomalies written block by block to file equal those computed in memory
+    anom = pcrglobwb_utils.climatology.calc_anomalies(da, kind='monthly', clim=clim, out_file=str(tmp_path / 'anomalies.nc'), block_size=100)
+    assert np.allclose(anom.values, (da.groupby('time.month') - clim).values, equal_nan=True)
+
+def test_ensemble_stats(tmp_path):
+
+    import xarray as xr
+
+    times = pd.date_range('2000-01-01', '2001-12-31', freq='D')
+    rng = np.random.default_rng(1)
+
+    files = []
+    for i in range(3):
+        values = rng.random((len(times), 2, 3))
+        values[rng.random(values.shape) < 0.2] = np.nan
+        ds = xr.Dataset({'q': (('time', 'lat', 'lon'), values)}, coords={'time': times, 'lat': [0.5, 1.5], 'lon': [0.5, 1.5, 2.5]})
+        ds.to_netcdf(os.path.join(tmp_path, 'member_{}.nc'.format(i)))
+        files.append(os.path.join(tmp_path, 'member_{}.nc'.format(i)))
+
+    out_file = os.path.join(tmp_path, 'ensemble.nc')
+    pcrglobwb_utils.ensembles.calc_ensemble_stats(files, 'q', out_file, block_size=100)
+
+    members = xr.concat([xr.open_dataset(f)['q'] for f in files], dim='member')
+    with xr.open_dataset(out_file) as ds:
+        np.testing.assert_allclose(ds['mean'].values, members.mean('member').values)
+        np.testing.assert_allclose(ds['min'].values, members.min('member').values)
+        np.testing.assert_allclose(ds['max'].values, members.max('member').values)
+        np.testing.assert_allclose(ds['std'].values, members.std('member', ddof=1).values)
+        np.testing.assert_allclose(ds['mean_climatology'].values, members.mean('member').groupby('time.month').mean('time').values)
+
+def test_quantile_sketch():
+
+    rng = np.random.default_rng(2)
+    values = rng.random((50, 100))
+    n_bins = 128
+
+    # two sketches filled with different members are merged
+    sketch = pcrglobwb_utils.ensembles.quantile_sketch(values.min(axis=0), values.max(axis=0), n_bins=n_bins)
+    other = pcrglobwb_utils.ensembles.quantile_sketch(values.min(axis=0), values.max(axis=0), n_bins=n_bins)
+    for member in values[:20]:
+        sketch.add(member)
+    for member in values[20:]:
+        other.add(member)
+    sketch.merge(other)
+
+    quantiles = [0.05, 0.5, 0.95]
+    approx = sketch.quantile(quantiles)
+    exact = np.quantile(values, quantiles, axis=0)
+    width = (values.max(axis=0) - values.min(axis=0)) / n_bins
+
+    assert np.all(np.abs(approx - exact) <= width)
+
+    ens = pcrglobwb_utils.ensembles.ensemble_data(*[pd.DataFrame({i: member}) for i, member in enumerate(values)])
+    df = ens.calc_quantiles(quantiles)
+    assert df.columns.tolist() == ['p5', 'p50', 'p95']
+    np.testing.assert_allclose(df.values, exact.T)
+
+def test_water_balance_checkpoint(tmp_path):
+
+    lines = []
+    for year in range(2000, 2004):
+        lines.append('2020-01-01 00:00:00,000 pcrglobwb INFO Reporting for the year {}-12-31\n'.format(year))
+        for var in pcrglobwb_utils.water_balance.WATER_BALANCE_VARS:
+            lines.append('2020-01-01 00:00:00,000 landSurface INFO Accumulated {} days 1 to 366 in {} = {} m3 = 1.0 mm\n'.format(var, year, float(year)))
+        lines.append('2020-01-01 00:00:00,000 meteo INFO reading forcing\n')
+
+    log_file = os.path.join(tmp_path, 'pcrglobwb.log')
+    checkpoint = os.path.join(tmp_path, 'checkpoint.json')
+
+    # the last line is not complete yet and thus skipped
+    with open(log_file, 'w') as f:
+        f.writelines(lines[:10])
+        f.write(lines[10][:15])
+
+    df = pcrglobwb_utils.water_balance.water_balance(log_file, checkpoint=checkpoint).get_annual_values()
+    assert df['year'].tolist() == [2000, 2001]
+    assert df['storage'].isna().sum() == 1
+
+    with open(log_file, 'w') as f:
+        f.writelines(lines)
+
+    wb = pcrglobwb_utils.water_balance.water_balance(log_file, checkpoint=checkpoint)
+    df = next(wb.follow(interval=0, timeout=0))
+    assert df['year'].tolist() == [2000, 2001, 2002, 2003]
+    assert df['precipitation'].tolist() == [2000., 2001., 2002., 2003.]
+
+def test_water_balance_from_netcdf(tmp_path):
+
+    import xarray as xr
+
+    time = pd.date_range('2000-01-01', '2001-12-31', freq='D')
+    lat, lon = np.arange(-1.75, 2, 0.5), np.arange(10.25, 12, 0.5)
+    coords = {'time': time, 'lat': lat, 'lon': lon}
+
+    xr.Dataset({'P': (('time', 'lat', 'lon'), np.full((len(time), lat.size, lon.size), 0.001))}, coords=coords).to_netcdf(os.path.join(tmp_path, 'P.nc'))
+    storage = np.broadcast_to(np.arange(len(time))[:, np.newaxis, np.newaxis] * 0.001, (len(time), lat.size, lon.size))
+    xr.Dataset({'S': (('time', 'lat', 'lon'), storage)}, coords=coords).to_netcdf(os.path.join(tmp_path, 'S.nc'))
+
+    # zone 1 covers the upper half of the grid
+    zones = xr.DataArray(np.repeat([0, 1], lat.size // 2)[:, np.newaxis] * np.ones(lon.size, dtype=int), coords={'lat': lat, 'lon': lon}, dims=('lat', 'lon'), name='zones')
+    zones.to_netcdf(os.path.join(tmp_path, 'zones.nc'))
+
+    files = {'precipitation': (os.path.join(tmp_path, 'P.nc'), 'P'), 'storage': os.path.join(tmp_path, 'S.nc')}
+    df = pcrglobwb_utils.water_balance.get_annual_values_from_netcdf(files, zones=os.path.join(tmp_path, 'zones.nc'), zone=1, block_size=100)
+
+    area = pcrglobwb_utils.regrid.calc_cell_area(lat, lon)[lat.size // 2:].sum()
+
+    assert df.columns.tolist() == ['year', 'precipitation', 'storage']
+    np.testing.assert_allclose(df['precipitation'].values, [366 * 0.001 * area, 365 * 0.001 * area])
+    np.testing.assert_allclose(df['storage'].values, [365 * 0.001 * area, 365 * 0.001 * area])
+
+def test_signatures():
+
+    rng = np.random.default_rng(3)
+    values = rng.gamma(2, size=(3, 500))
+    values[0, 10] = np.nan
+
+    dd = pcrglobwb_utils.signatures.calc_signatures(values)
+
+    np.testing.assert_allclose(dd['Q5'], np.nanquantile(values, 0.95, axis=1))
+    np.testing.assert_allclose(dd['Q95'], np.nanquantile(values, 0.05, axis=1))
+    np.testing.assert_allclose(dd['FDC_slope'], (np.log(np.nanquantile(values, 0.67, axis=1)) - np.log(np.nanquantile(values, 0.34, axis=1))) / 0.33)
+
+    # without any variation, all flow is baseflow
+    assert np.allclose(pcrglobwb_utils.signatures.calc_bfi(np.ones((2, 100))), 1)
+    # each timeseries is filtered independently
+    bfi = pcrglobwb_utils.signatures.calc_bfi(values)
+    assert np.all((bfi > 0) & (bfi < 1))
+    assert np.isclose(bfi[1], pcrglobwb_utils.signatures.calc_bfi(values[1])[0])
+
+    df = pd.DataFrame({'OBS': values[1], 'SIM': values[2]})
+    scores = pcrglobwb_utils.signatures.calc_signature_scores(df, 'OBS', 'SIM')
+    assert list(scores.keys())[:3] == ['FDC_slope_obs', 'FDC_slope_sim', 'FDC_slope_err']
+    assert scores['BFI_obs'] == round(bfi[1], 3)
+
+def test_create_output():
+
+    outputList = [{'station': 'A', 'longitude': 1., 'latitude': 2., 'KGE': 0.5, 'R2': 0.4, 'NSE': 0.3, 'MSE': 2., 'RMSE': 1.414, 'RRMSE': 0.1},
+                  {'station': 'B', 'longitude': 3., 'latitude': 4., 'KGE': 0.6, 'R2': 0.5, 'NSE': 0.4, 'MSE': 1., 'RMSE': 1., 'RRMSE': 0.2, 'BFI_obs': 0.8}]
+
+    all_scores, geo_dict = pcrglobwb_utils.io.create_output(outputList)
+
+    assert all_scores.columns.tolist() == ['A', 'B']
+    assert all_scores.index.tolist() == ['KGE', 'R2', 'NSE', 'MSE', 'RMSE', 'RRMSE', 'BFI_obs']
+    assert np.isnan(all_scores.loc['BFI_obs', 'A'])
+    assert geo_dict['KGE'] == [0.5, 0.6]
+    assert geo_dict['geometry'][1].x == 3.
+
+def test_timeseries_writer(tmp_path):
+
+    out_file = os.path.join(tmp_path, 'evaluated_timeseries.nc')
+    writer = pcrglobwb_utils.io.timeseries_writer(out_file, output_format='netcdf', batch_size=2)
+
+    # each batch is written to its own file, and the stations written are returned
+    frames, written = dict(), list()
+    for i, station in enumerate(['A', 'B', 'C']):
+        index = pd.date_range('2000-01-31', periods=3 + i, freq='M')
+        frames[station] = pd.DataFrame({'OBS': np.arange(3. + i), 'discharge': np.arange(3. + i) * 2}, index=index)
+        frames[station].iloc[0, 0] = np.nan
+        written.append(writer.add(station, frames[station]))
+    written.append(writer.close())
+
+    assert written == [[], ['A', 'B'], [], ['C']]
+    assert writer.out_files == [out_file, os.path.join(tmp_path, 'evaluated_timeseries_part2.nc')]
+
+    df = pd.concat([pcrglobwb_utils.io.read_timeseries_file(fo) for fo in writer.out_files])
+
+    assert len(df) == 3 + 4 + 5
+    for station, df_station in df.groupby('station'):
+        np.testing.assert_array_equal(df_station[['OBS', 'SIM']].values, frames[station].values)
+        assert (df_station['time'].values == frames[station].index.values).all()
+
+    # single stations are read from their slice of the file
+    index = pcrglobwb_utils.io.index_timeseries_file(out_file)
+    assert [(station, offset) for station, offset, count in index] == [('A', 0), ('B', 3)]
+    for station, offset, count in index:
+        df_station = pcrglobwb_utils.io.read_station_timeseries(out_file, station, offset=offset, count=count)
+        np.testing.assert_array_equal(df_station.values, frames[station].values)
+        assert (df_station.index.values == frames[station].index.values).all()
+    # without offset, the station is looked up in the file
+    np.testing.assert_array_equal(pcrglobwb_utils.io.read_station_timeseries(out_file, 'B').values, frames['B'].values)
+
+    # without timeseries, no file is created
+    writer = pcrglobwb_utils.io.timeseries_writer(out_file, output_format='netcdf')
+    assert writer.close() == []
+    assert sorted(os.listdir(tmp_path)) == ['evaluated_timeseries.nc', 'evaluated_timeseries_part2.nc']
+
+def test_check_output_format(tmp_path, monkeypatch):
+
+    # without pyarrow, parquet output is rejected before the output folder is created
+    monkeypatch.setattr(pcrglobwb_utils.io, '_has_arrow', lambda: False)
+    out = str(tmp_path / 'out')
+
+    with pytest.raises(ImportError):
+        pcrglobwb_utils.eval.GRDC('sim.nc', out, 'discharge', './examples/example_data/GRDC/files', output_format='parquet')
+    with pytest.raises(ImportError):
+        pcrglobwb_utils.eval.GSIM('sim.nc', out, 'discharge', './examples/example_data/GSIM/files', vector_format='parquet')
+    with pytest.raises(ValueError):
+        pcrglobwb_utils.io.check_output_format('xlsx')
+    assert not os.path.isdir(out)
+
+def test_collect_results_crash(tmp_path):
+
+    import subprocess
+    import sys
+
+    # the run is killed after 150 stations, of which only the first batch of 100 was written to file
+    script = """
+import os, numpy as np, pandas as pd, pcrglobwb_utils
+def results():
+    for i in range(150):
+        yield {'station': str(i), 'longitude': 0., 'latitude': 0., 'timeseries': pd.DataFrame({'OBS': np.ones(3), 'SIM': np.ones(3)}, index=pd.date_range('2000-01-01', periods=3))}
+    os._exit(1)
+pcrglobwb_utils.eval.collect_results(results(), OUT, output_format='netcdf', run_key='key')
+""".replace('OUT', repr(str(tmp_path)))
+    subprocess.run([sys.executable, '-c', script], cwd=os.getcwd())
+
+    manifest = pcrglobwb_utils.cache.read_manifest(tmp_path, 'key')
+    df = pcrglobwb_utils.io.read_timeseries_file(os.path.join(tmp_path, 'evaluated_timeseries.nc'))
+    assert list(manifest.keys()) == [str(i) for i in range(100)]
+    assert df['station'].unique().tolist() == list(manifest.keys())
+
+def test_resume_manifest(tmp_path):
+
+    from shapely.geometry import box
+
+    pcrglobwb_utils.cache.append_manifest(tmp_path, 'key_a', 'A', {'station': 'A', 'KGE': np.float64(0.5), 'KGE_NP': np.nan})
+    pcrglobwb_utils.cache.append_manifest(tmp_path, 'key_b', 'B', {'station': 'B', 'KGE': 0.6})
+    pcrglobwb_utils.cache.append_manifest(tmp_path, 'key_a', 1, {'ID': np.int64(1), 'geometry': np.array([box(0, 0, 1, 1)]), 'R2': 0.9})
+
+    # a run interrupted while writing leaves an incomplete line
+    with open(pcrglobwb_utils.cache.manifest_file(tmp_path), 'a') as f:
+        f.write('{"run_key": "key_a", "unit": "C", "res')
+
+    previous = pcrglobwb_utils.cache.read_manifest(tmp_path, 'key_a')
+
+    assert list(previous.keys()) == ['A', '1']
+    assert np.isnan(previous['A']['KGE_NP'])
+    assert previous['1']['geometry'][0].equals(box(0, 0, 1, 1))
+
+    # the incomplete line was removed, such that new results can be appended
+    pcrglobwb_utils.cache.append_manifest(tmp_path, 'key_a', 'C', {'station': 'C', 'KGE': 0.7})
+    assert list(pcrglobwb_utils.cache.read_manifest(tmp_path, 'key_a').keys()) == ['A', '1', 'C']
+
+    merged = pcrglobwb_utils.eval.merge_results(['A', 'C', 'D'], {'A': previous['A']}, [{'station': 'D', 'KGE': 0.1}, {'station': 'C', 'KGE': 0.7}])
+    assert [dd['station'] for dd in merged] == ['A', 'C', 'D']
+
+def test_collect_results(tmp_path):
+
+    scores_file = os.path.join(tmp_path, 'all_scores.csv')
+    previous = {'A': {'station': 'A', 'longitude': 0., 'latitude': 0., 'KGE': 0.1}}
+
+    # results arrive in order of completion
+    results = ({'station': station, 'longitude': 0., 'latitude': 0., 'KGE': kge} for station, kge in [('C', 0.3), ('B', 0.2)])
+    outputList = pcrglobwb_utils.eval.collect_results(results, str(tmp_path), run_key='key', scores_file=scores_file, previous=previous, total=3)
+
+    df = pd.read_csv(scores_file, index_col=0)
+    assert df.index.tolist() == ['A', 'C', 'B']
+    assert df['KGE'].tolist() == [0.1, 0.3, 0.2]
+    assert list(pcrglobwb_utils.cache.read_manifest(tmp_path, 'key').keys()) == ['C', 'B']
+
+    merged = pcrglobwb_utils.eval.merge_results(['A', 'B', 'C'], previous, outputList)
+    assert [dd['station'] for dd in merged] == ['A', 'B', 'C']
+
+def test_collect_results_signatures(tmp_path):
+
+    index = pd.date_range('2000-01-01', periods=730, freq='D')
+    rng = np.random.default_rng(1)
+    timeseries = dict()
+    for station, n in [('A', 730), ('B', 400), ('C', 100)]:
+        obs = rng.gamma(2., 10., size=len(index))
+        df = pd.DataFrame({'OBS': obs, 'SIM': obs * rng.uniform(0.5, 1.5, size=len(index))}, index=index)
+        # stations have different lengths and missing values
+        df.iloc[n:] = np.nan
+        df.iloc[::7, 0] = np.nan
+        timeseries[station] = df
+
+    results = ({'station': station, 'longitude': 0., 'latitude': 0., 'timeseries': df} for station, df in timeseries.items())
+    outputList = pcrglobwb_utils.eval.collect_results(results, str(tmp_path), output_format='netcdf', signatures=True, batch_size=2)
+
+    # signatures computed in batches equal those computed per station
+    for gdd in outputList:
+        assert 'timeseries' not in gdd.keys()
+        df = timeseries[gdd['station']].dropna()
+        expected = pcrglobwb_utils.signatures.calc_signature_scores(df, 'OBS', 'SIM')
+        for key in expected.keys():
+            np.testing.assert_allclose(gdd[key], expected[key])
+
+def test_vector_io(tmp_path):
+
+    import geopandas as gpd
+    from shapely.geometry import box
+
+    gdf = gpd.GeoDataFrame({'ID': [1, 2], 'R2': [0.5, 0.7]}, geometry=[box(0, 0, 1, 1), box(1, 0, 2, 1)], crs='EPSG:4326')
+
+    # the extension is set according to the format
+    fo = pcrglobwb_utils.io.write_vector(gdf, os.path.join(tmp_path, 'scores.geojson'), vector_format='fgb')
+    assert fo.endswith('scores.fgb')
+    assert pcrglobwb_utils.io.get_vector_format(fo) == 'fgb'
+
+    # only the columns needed are read
+    # FlatGeobuf orders features along its spatial index
+    gdf_read = pcrglobwb_utils.io.read_vector(fo, columns=['ID']).sort_values('ID').reset_index(drop=True)
+    assert gdf_read.columns.tolist() == ['ID', 'geometry']
+    assert gdf_read['ID'].tolist() == [1, 2]
+    assert gdf_read.geometry.geom_equals(gdf.geometry).all()
+
+    with pytest.raises(ValueError):
+        pcrglobwb_utils.io.write_vector(gdf, os.path.join(tmp_path, 'scores'), vector_format='shp')
+
+def test_vector_io_default_engine(tmp_path, monkeypatch):
+
+    import geopandas as gpd
+    from shapely.geometry import box
+
+    # without pyogrio, the default engine of geopandas is used
+    monkeypatch.setattr(pcrglobwb_utils.io, '_has_pyogrio', lambda: False)
+
+    gdf = gpd.GeoDataFrame({'ID': [1, 2], 'R2': [0.5, 0.7]}, geometry=[box(0, 0, 1, 1), box(1, 0, 2, 1)], crs='EPSG:4326')
+    fo = pcrglobwb_utils.io.write_vector(gdf, os.path.join(tmp_path, 'scores'), vector_format='geojson')
+
+    gdf_read = pcrglobwb_utils.io.read_vector(fo, columns=['ID'])
+    assert gdf_read.columns.tolist() == ['ID', 'geometry']
+    assert gdf_read['ID'].tolist() == [1, 2]
+
+def test_plot_output(tmp_path):
+
+    import geopandas as gpd
+    from shapely.geometry import box
+
+    # saved results of a station evaluation and of a polygon evaluation
+    idx = pd.date_range('2000-01-01', periods=12, freq='MS')
+    os.makedirs(os.path.join(tmp_path, 'A'))
+    pd.DataFrame({'OBS': np.arange(12.), 'SIM': np.arange(12.) + 1}, index=idx).to_csv(os.path.join(tmp_path, 'A', 'evaluated_timeseries_M.csv'))
+
+    gdf = gpd.GeoDataFrame({'ID': [1, 2], 'R2': [0.5, 0.7], 'MSE': [1., 2.], 'RMSE': [1., 1.4], 'RRMSE': [0.1, 0.2]}, geometry=[box(0, 0, 1, 1), box(1, 0, 2, 1)], crs='EPSG:4326')
+    pcrglobwb_utils.io.write_vector(gdf, os.path.join(tmp_path, 'sim_vs_obs'), vector_format='fgb')
+
+    # timeseries of all stations in a single file
+    writer = pcrglobwb_utils.io.timeseries_writer(os.path.join(tmp_path, 'evaluated_timeseries.nc'))
+    for station in ['B', 'C']:
+        writer.add(station, pd.DataFrame({'OBS': np.arange(12.), 'SIM': np.arange(12.) + 1}, index=idx))
+    writer.close()
+
+    # listing the tasks has no side effects
+    assert len(pcrglobwb_utils.plotting.get_plot_tasks(str(tmp_path))) == 4
+    assert not os.path.isdir(os.path.join(tmp_path, 'evaluated_timeseries_plots'))
+
+    out_files = pcrglobwb_utils.plotting.plot_output(str(tmp_path), dpi=50)
+
+    plot_dir = os.path.join(tmp_path, 'evaluated_timeseries_plots')
+    assert out_files == [os.path.join(tmp_path, 'A', 'timeseries_M.png'), os.path.join(plot_dir, 'B.png'), os.path.join(plot_dir, 'C.png'), os.path.join(tmp_path, 'sim_vs_obs.png')]
+    assert all(os.path.isfile(fo) for fo in out_files)
+
+def test_benchmark_generators(tmp_path):
+
+    from benchmarks import generators
+
+    fo = generators.make_sim_cube(os.path.join(tmp_path, 'sim.nc'), periods=60)
+    files = generators.make_grdc_files(os.path.join(tmp_path, 'grdc'), fo, 3)
+
+    # generated data is deterministic
+    with open(files[0]) as f1, open(generators.make_grdc_files(os.path.join(tmp_path, 'grdc_2'), fo, 3)[0]) as f2:
+        assert f1.read() == f2.read()
+
+    # files can be read like original GRDC-files
+    props, df = pcrglobwb_utils.obs_data.read_grdc_file(files[0], col_name=' Value', var_name='OBS')
+    station = generators.sample_stations(fo, 3).iloc[0]
+    assert (props['latitude'], props['longitude']) == (station['latitude'], station['longitude'])
+    assert len(df) == 60
+
+    props, df = pcrglobwb_utils.obs_data.read_gsim_file(generators.make_gsim_files(os.path.join(tmp_path, 'gsim'), fo, 3)[0], var_name='OBS')
+    assert len(df) == 2
+
+def test_poly_log_anomalies(tmp_path):
+
+    from benchmarks import generators
+
+    extent = (-70., -10., -60., 0.)
+    sim = generators.make_sim_cube(os.path.join(tmp_path, 'sim.nc'), extent=extent, periods=36, freq='MS', missing=0.)
+    obs = generators.make_sim_cube(os.path.join(tmp_path, 'obs.nc'), extent=extent, periods=36, freq='MS', var_name='Q', missing=0., seed=1)
+    ply = generators.make_polygons(os.path.join(tmp_path, 'polygons.geojson'), 4, extent=extent)
+
+    out = os.path.join(tmp_path, 'out')
+    pcrglobwb_utils.eval.POLY(ply, sim, obs, out, 'ID', 'Q', 'discharge', anomaly=True, anomaly_type='monthly', obs_log=True, sim_log=True)
+
+    # anomalies are computed of log-transformed values, such that negative anomalies remain valid
+    import xarray as xr
+    with xr.open_dataset(os.path.join(out, 'sim_anomalies_monthly.nc')) as ds:
+        assert (ds['discharge'] < 0).any()
+    df = pd.read_csv(os.path.join(out, 'discharge_vs_Q.csv'), index_col=0)
+    assert df.notna().all().all()